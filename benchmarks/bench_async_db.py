@@ -0,0 +1,92 @@
+# File: benchmarks/bench_async_db.py
+
+"""
+Event-loop stall and update throughput: blocking pymongo calls vs the
+awaitable data layer in database/mongo.py.
+
+Runs against the local stand-in Mongo (benchmarks/fakemongo.py) with a
+fixed per-round-trip latency, so no server is needed:
+
+    python benchmarks/bench_async_db.py [--latency-ms 5] [--updates 400]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import fakemongo  # noqa: E402
+
+
+async def _heartbeat(stop: asyncio.Event, interval: float, lags: list):
+    """Sleep `interval` repeatedly and record how late each wake-up was."""
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, time.perf_counter() - t0 - interval))
+
+
+async def _run(mode: str, mongo, n_updates: int, concurrency: int):
+    async def one(i):
+        uid = 10_000 + (i % 500)
+        if mode == "blocking":
+            # Pre-change behaviour: sync driver called straight from a handler
+            user = mongo._get_user_sync(uid)
+            mongo._update_user_sync(uid, {"bronze": user.get("bronze", 0) + 1})
+        else:
+            user = await mongo.get_user(uid)
+            await mongo.update_user(uid, {"bronze": user.get("bronze", 0) + 1})
+
+    sem = asyncio.Semaphore(concurrency)
+
+    async def guarded(i):
+        async with sem:
+            await one(i)
+
+    stop = asyncio.Event()
+    lags = []
+    hb = asyncio.create_task(_heartbeat(stop, 0.001, lags))
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(guarded(i) for i in range(n_updates)))
+    elapsed = time.perf_counter() - t0
+
+    stop.set()
+    await hb
+
+    return {
+        "elapsed": elapsed,
+        "throughput": n_updates / elapsed,
+        "max_stall_ms": max(lags, default=0.0) * 1000,
+        "total_stall_ms": sum(lags) * 1000,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--latency-ms", type=float, default=5.0)
+    ap.add_argument("--updates", type=int, default=400)
+    ap.add_argument("--concurrency", type=int, default=64)
+    args = ap.parse_args()
+
+    fakemongo.install(latency=args.latency_ms / 1000)
+    from database import mongo
+
+    print(
+        f"stand-in latency={args.latency_ms}ms  updates={args.updates}  "
+        f"concurrency={args.concurrency}  MONGO_WORKERS={mongo.MONGO_WORKERS}"
+    )
+    print(f"{'mode':<10}{'elapsed s':>11}{'updates/s':>12}{'max stall ms':>15}{'total stall ms':>17}")
+    for mode in ("blocking", "async"):
+        r = asyncio.run(_run(mode, mongo, args.updates, args.concurrency))
+        print(
+            f"{mode:<10}{r['elapsed']:>11.2f}{r['throughput']:>12.0f}"
+            f"{r['max_stall_ms']:>15.1f}{r['total_stall_ms']:>17.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# File: benchmarks/bench_commands.py
+
+"""
+Load test: per-message routing overhead as modules are added.
+
+- old   every module registers its own handlers, as before: two
+        filters.command handlers in group 0 and, for every third module,
+        a free-text handler in its own group behind `filters.text &
+        <sync state check>`. Dispatch follows Pyrogram: every group is
+        tried, the first matching handler in each group runs, async
+        filters are awaited and sync custom filters inside a combined
+        filter go through the client's thread pool.
+- new   utils/commands.py: one handler, command parsed once and looked
+        up in a dict, free text only to modules active in that chat.
+
+Handlers are no-ops; the mix is mostly chatter with a few commands and
+game messages, like a busy group.
+
+    python benchmarks/bench_commands.py [--messages 4000]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import re
+import sys
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.commands import CommandDispatcher, active  # noqa: E402
+
+USERNAME = "gamebot"
+GAME_CHATS = 10     # chats with a running game
+CHATS = 200
+
+
+class _Msg:
+    def __init__(self, text, chat_id, user_id):
+        self.text, self.caption = text, None
+        self.chat = types.SimpleNamespace(id=chat_id)
+        self.from_user = types.SimpleNamespace(id=user_id)
+        self.command = None
+
+
+# -------------------------------------------------
+# Pyrogram-style filters (old)
+# -------------------------------------------------
+def command_filter(cmds):
+    async def check(client, m):
+        # Mirrors pyrogram 2.0 filters.command: a regex per command per message
+        text = m.text or m.caption
+        m.command = None
+        if not text or not text.startswith("/"):
+            return False
+        without_prefix = text[1:]
+        for cmd in cmds:
+            if not re.match(rf"^(?:{cmd}(?:@?{USERNAME})?)(?:\s|$)", without_prefix, flags=re.IGNORECASE):
+                continue
+            rest = re.sub(rf"{cmd}(?:@?{USERNAME})?\s?", "", without_prefix, count=1, flags=re.IGNORECASE)
+            m.command = [cmd] + rest.split()
+            return True
+        return False
+    return check
+
+
+def text_and(state_check):
+    async def check(client, m):
+        if not m.text:              # filters.text (async)
+            return False
+        # sync custom filter in an AndFilter: run in the client's executor
+        return await client.loop.run_in_executor(client.executor, state_check, client, m)
+    return check
+
+
+async def old_dispatch(groups, client, m):
+    for handlers in groups:
+        for flt, fn in handlers:
+            if await flt(client, m):
+                await fn(client, m)
+                break
+
+
+async def _noop(client, m):
+    pass
+
+
+def build(n_modules: int):
+    states = [set(range(-GAME_CHATS, 0)) for _ in range(n_modules)]
+    group0, text_groups = [], []
+    new = CommandDispatcher()
+    for i in range(n_modules):
+        for cmd in (f"game{i}", f"game{i}info"):
+            group0.append((command_filter([cmd]), _noop))
+            new.command(cmd)(_noop)
+        if i % 3 == 0:
+            live = states[i]
+            text_groups.append([(text_and(lambda c, m, live=live: m.chat.id in live), _noop)])
+            new.text(f"m{i}", order=i + 1)(_noop)
+            for chat in live:
+                active.add(f"m{i}", chat=chat)
+    return [group0] + text_groups, new
+
+
+def messages(n_modules: int, count: int) -> list:
+    rng = random.Random(11)
+    out = []
+    for _ in range(count):
+        r = rng.random()
+        if r < 0.15:
+            i = rng.randrange(n_modules)
+            text, chat = f"/game{i} 50", rng.randrange(-CHATS, 0)
+        elif r < 0.25:
+            text, chat = "apple", rng.randrange(-GAME_CHATS, 0)      # a game move
+        else:
+            text, chat = "lol same", rng.randrange(-CHATS, -GAME_CHATS)  # chatter
+        out.append(_Msg(text, chat, rng.randrange(1, 5000)))
+    return out
+
+
+async def _time(fn, msgs) -> float:
+    t0 = time.perf_counter()
+    for m in msgs:
+        await fn(m)
+    return (time.perf_counter() - t0) / len(msgs) * 1e6
+
+
+async def main_async(count: int):
+    loop = asyncio.get_running_loop()
+    client = types.SimpleNamespace(loop=loop, executor=ThreadPoolExecutor(1), me=types.SimpleNamespace(username=USERNAME))
+    print(f"{'modules':>8}{'old µs/msg':>14}{'new µs/msg':>14}")
+    for n in (5, 10, 20, 40, 80):
+        for scope in (active.chats, active.users):
+            scope.clear()
+        groups, new = build(n)
+        msgs = messages(n, count)
+        old_us = await _time(lambda m: old_dispatch(groups, client, m), msgs)
+        new_us = await _time(lambda m: new.dispatch(client, m), msgs)
+        print(f"{n:>8}{old_us:>14.1f}{new_us:>14.1f}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--messages", type=int, default=4000)
+    args = ap.parse_args()
+    asyncio.run(main_async(args.messages))
+
+
+if __name__ == "__main__":
+    main()
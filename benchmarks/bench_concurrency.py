@@ -0,0 +1,289 @@
+# File: benchmarks/bench_concurrency.py
+
+"""
+Update throughput and latency vs Pyrogram worker count, against a fake
+update stream run through utils/commands.py the way Pyrogram delivers
+it: one queue, N worker tasks each taking the next update and awaiting
+its handler. Handlers are modelled on the real ones:
+- anim   /fight, /flip, /roll, /spin, /work, /rob: a Mongo call, an
+         animation sleep, another Mongo call
+- quick  /bal, /profile, /top: one Mongo round trip
+
+1. Even load: a burst of commands over many chats (animation scaled down,
+   see --anim). Rows: workers=1 (what main.py used to run), N workers with
+   the per-chat / per-user queues, and N workers without them, counting
+   overlaps (two updates of one chat or one user in handlers at once).
+
+2. One hot chat: a chat spams animated commands with real 1-3 s sleeps
+   while other chats send quick commands. Only the other chats' latency
+   is measured. "lock in worker" is the first version of this change:
+   a keyed asyncio.Lock awaited inside the worker, so every update queued
+   behind the hot chat holds a worker while it waits.
+
+    python benchmarks/bench_concurrency.py [--updates 2000] [--chats 50] [--anim 0.03]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import os
+import random
+import sys
+import time
+import types
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.commands import CommandDispatcher  # noqa: E402
+from utils.locks import UPDATE_QUEUE_MAX, update_queues  # noqa: E402
+
+ANIM_COMMANDS = ("fight", "flip", "roll", "spin", "work", "rob")
+QUICK_COMMANDS = ("bal", "profile", "top")
+MONGO_RTT = 0.002
+HOT_CHAT = -1
+
+
+class _Msg:
+    def __init__(self, text, chat_id, user_id):
+        self.text, self.caption = text, None
+        self.chat = types.SimpleNamespace(id=chat_id)
+        self.from_user = types.SimpleNamespace(id=user_id)
+        self.command = None
+        self.queued = 0.0
+        self.done = None
+        self.dropped = False
+
+
+class _Probe:
+    """Counts handlers of one chat / one user running at the same time."""
+
+    def __init__(self):
+        self.inside = Counter()
+        self.overlaps = 0
+
+    @contextlib.contextmanager
+    def enter(self, msg):
+        keys = (("chat", msg.chat.id), ("user", msg.from_user.id))
+        for key in keys:
+            if self.inside[key]:
+                self.overlaps += 1
+            self.inside[key] += 1
+        try:
+            yield
+        finally:
+            for key in keys:
+                self.inside[key] -= 1
+
+
+def build(probe: _Probe, anim) -> CommandDispatcher:
+    """`anim` is the animation sleep, or a callable returning one."""
+    dispatcher = CommandDispatcher()
+
+    async def animated(client, msg):
+        with probe.enter(msg):
+            await asyncio.sleep(MONGO_RTT)                          # get_user / cooldown
+            await asyncio.sleep(anim() if callable(anim) else anim)  # "Rolling dice..."
+            await asyncio.sleep(MONGO_RTT)                          # credit / debit
+            msg.done = time.perf_counter()
+
+    async def quick(client, msg):
+        with probe.enter(msg):
+            await asyncio.sleep(MONGO_RTT)
+            msg.done = time.perf_counter()
+
+    for name in ANIM_COMMANDS:
+        dispatcher.command(name)(animated)
+    for name in QUICK_COMMANDS:
+        dispatcher.command(name)(quick)
+    return dispatcher
+
+
+# -------------------------------------------------
+# Serialization modes
+# -------------------------------------------------
+class LockInWorker:
+    """The first version: keyed locks awaited in the worker itself."""
+
+    def __init__(self):
+        self._locks = {}
+
+    async def submit(self, keys, fn, *args):
+        held = []
+        try:
+            for key in sorted(keys):
+                lock = self._locks.setdefault(key, asyncio.Lock())
+                await lock.acquire()
+                held.append(lock)
+            await fn(*args)
+        finally:
+            for lock in reversed(held):
+                lock.release()
+        return True
+
+
+async def _unserialized(keys, fn, *args):
+    await fn(*args)
+    return True
+
+
+@contextlib.contextmanager
+def mode(name: str):
+    submit, enter = update_queues.submit, update_queues.enter
+    if name != "queues":
+        # No fast path: every update goes through the replacement submit()
+        update_queues.enter = lambda chat_id, user_id: None
+    if name == "lock in worker":
+        update_queues.submit = LockInWorker().submit
+    elif name == "none":
+        update_queues.submit = _unserialized
+    try:
+        yield
+    finally:
+        update_queues.submit, update_queues.enter = submit, enter
+
+
+# -------------------------------------------------
+# Pyrogram's dispatcher
+# -------------------------------------------------
+class Pool:
+    """One update queue drained by `workers` tasks."""
+
+    def __init__(self, dispatcher, workers: int):
+        self.queue = asyncio.Queue()
+        client = types.SimpleNamespace(me=types.SimpleNamespace(username="gamebot"))
+
+        async def worker():
+            while True:
+                msg = await self.queue.get()
+                try:
+                    if await dispatcher.dispatch(client, msg) is False:
+                        msg.dropped = True
+                finally:
+                    self.queue.task_done()
+
+        self.tasks = [asyncio.get_running_loop().create_task(worker()) for _ in range(workers)]
+
+    def put(self, msg):
+        msg.queued = time.perf_counter()
+        self.queue.put_nowait(msg)
+
+    async def close(self):
+        for t in self.tasks:
+            t.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+
+
+async def _settle(msgs, deadline: float):
+    # Wait for every message's handler, including ones queued off-worker
+    end = time.perf_counter() + deadline
+    while any(m.done is None and not m.dropped for m in msgs) and time.perf_counter() < end:
+        await asyncio.sleep(0.005)
+
+
+def _latency(msgs, deadline: float) -> tuple:
+    msgs = [m for m in msgs if not m.dropped]
+    lat = sorted((m.done - m.queued) if m.done else float("inf") for m in msgs)
+    p50, p95 = lat[len(lat) // 2], lat[int(len(lat) * 0.95)]
+    fmt = lambda v: f"{v * 1000:.0f}" if v != float("inf") else f">{deadline:.0f}s"  # noqa: E731
+    return fmt(p50), fmt(p95), sum(m.done is None for m in msgs)
+
+
+# -------------------------------------------------
+# 1. Even load
+# -------------------------------------------------
+def burst(count: int, chats: int, users: int) -> list:
+    rng = random.Random(5)
+    out = []
+    for _ in range(count):
+        cmd = rng.choice(ANIM_COMMANDS) if rng.random() < 0.4 else rng.choice(QUICK_COMMANDS)
+        out.append(_Msg(f"/{cmd}", -rng.randrange(2, chats + 2), rng.randrange(1, users + 1)))
+    return out
+
+
+async def even_load(args):
+    rows = [(1, "queues")]
+    for n in args.workers:
+        rows += [(n, "queues"), (n, "none")]
+    print(f"1. even load: updates={args.updates} chats={args.chats} users={args.users} anim={args.anim}s")
+    # A burst queues ~updates/chats per chat at once: don't drop any here
+    update_queues.max_waiting = args.updates
+    print(f"{'workers':<18}{'updates/s':>12}{'p50 ms':>10}{'p95 ms':>10}{'overlaps':>10}")
+    for workers, how in rows:
+        probe = _Probe()
+        msgs = burst(args.updates, args.chats, args.users)
+        with mode(how):
+            pool = Pool(build(probe, args.anim), workers)
+            t0 = time.perf_counter()
+            for msg in msgs:
+                pool.put(msg)
+            await pool.queue.join()
+            await _settle(msgs, 60)
+            elapsed = time.perf_counter() - t0
+            await pool.close()
+        p50, p95, _ = _latency(msgs, 60)
+        label = f"{workers}" + (" unserialized" if how == "none" else "")
+        print(f"{label:<18}{len(msgs) / elapsed:>12,.0f}{p50:>10}{p95:>10}{probe.overlaps:>10}")
+    assert len(update_queues) == 0, "queues leaked"
+    update_queues.max_waiting = UPDATE_QUEUE_MAX
+
+
+# -------------------------------------------------
+# 2. One hot chat, real animation lengths
+# -------------------------------------------------
+async def hot_chat(args):
+    workers = args.hot_workers
+    print(f"\n2. one hot chat: {args.hot} animated commands (1-3 s) in one chat over 2 s, "
+          f"{args.cold} quick commands from {args.chats} other chats over 3 s, workers={workers}")
+    print(f"{'mode':<18}{'other p50 ms':>14}{'other p95 ms':>14}{'unfinished':>12}{'hot dropped':>13}")
+    for how in ("lock in worker", "queues"):
+        rng = random.Random(9)
+        probe = _Probe()
+        dispatcher = build(probe, lambda: rng.uniform(1, 3))
+        hot = [_Msg(f"/{rng.choice(ANIM_COMMANDS)}", HOT_CHAT, rng.randrange(1, 30)) for _ in range(args.hot)]
+        cold = [_Msg(f"/{rng.choice(QUICK_COMMANDS)}", -rng.randrange(2, args.chats + 2),
+                     rng.randrange(1000, 1000 + args.users)) for _ in range(args.cold)]
+        arrivals = sorted([(i * 2 / args.hot, m) for i, m in enumerate(hot)]
+                          + [(i * 3 / args.cold, m) for i, m in enumerate(cold)], key=lambda a: a[0])
+        with mode(how):
+            pool = Pool(dispatcher, workers)
+            t0 = time.perf_counter()
+            for at, msg in arrivals:
+                delay = t0 + at - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                pool.put(msg)
+            await _settle(cold, args.deadline)
+            await pool.close()
+        p50, p95, unfinished = _latency(cold, args.deadline)
+        print(f"{how:<18}{p50:>14}{p95:>14}{unfinished:>12}{sum(m.dropped for m in hot):>13}")
+        # Let the hot chat's backlog drain (or drop it) before the next mode
+        for task in asyncio.all_tasks() - {asyncio.current_task()}:
+            task.cancel()
+        await asyncio.sleep(0)
+    print(f"(queues: {update_queues.stats()})")
+
+
+async def main_async(args):
+    await even_load(args)
+    await hot_chat(args)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--updates", type=int, default=2000)
+    ap.add_argument("--chats", type=int, default=50)
+    ap.add_argument("--users", type=int, default=400)
+    ap.add_argument("--anim", type=float, default=0.03, help="even load animation sleep (real: 1-3 s)")
+    ap.add_argument("--workers", type=int, nargs="+", default=[4, 16, 64])
+    ap.add_argument("--hot", type=int, default=80, help="hot chat commands")
+    ap.add_argument("--hot-workers", type=int, default=16, help="workers for the hot chat run (WORKERS default)")
+    ap.add_argument("--cold", type=int, default=300, help="other chats' commands")
+    ap.add_argument("--deadline", type=float, default=20, help="seconds to wait for the other chats")
+    args = ap.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# File: benchmarks/bench_feedback.py
+
+"""
+Wordle feedback throughput on the real word assets (games/assets/*.json):
+the previous Counter-based scorer vs utils/feedback.pattern vs the
+bitmap LengthIndex.partition. Every sampled guess is scored against
+every word of its length.
+
+Then partition's one consumer, utils/calibrate.py, end to end: picking
+the highest-entropy guess of a bucket (best_guess) with partition vs by
+grouping pattern() over the candidates.
+
+    python benchmarks/bench_feedback.py [--guesses 100]
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.calibrate import _members, best_guess  # noqa: E402
+from utils.feedback import marks, pattern  # noqa: E402
+from utils.wordindex import LengthIndex, WordIndex  # noqa: E402
+
+
+def counter_score(guess: str, target: str) -> str:
+    # The scorer compute_feedback used before the table-driven engine
+    out = ["r"] * len(guess)
+    left = Counter()
+    for i, ch in enumerate(target):
+        if i < len(guess) and guess[i] == ch:
+            out[i] = "g"
+        else:
+            left[ch] += 1
+    for i, ch in enumerate(guess):
+        if out[i] != "g" and left[ch] > 0:
+            out[i] = "y"
+            left[ch] -= 1
+    return "".join(out)
+
+
+def best_guess_by_pattern(index: LengthIndex, mask: int, guesses) -> str:
+    # best_guess with the classes counted per word instead of partitioned
+    targets = [index.words[k] for k in _members(mask)]
+    total = len(targets)
+
+    def entropy(guess):
+        sizes = Counter(pattern(guess, t) for t in targets).values()
+        return -sum(n / total * math.log2(n / total) for n in sizes)
+
+    return max(guesses, key=lambda g: (entropy(g), [-ord(c) for c in g]))
+
+
+def _time(fn, jobs):
+    t0 = time.perf_counter()
+    for guess, index in jobs:
+        fn(guess, index)
+    return time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--guesses", type=int, default=100, help="sampled guesses per difficulty")
+    ap.add_argument("--candidates", type=int, default=100, help="guesses tried per bucket by best_guess")
+    args = ap.parse_args()
+
+    assets = os.path.join(ROOT, "games", "assets")
+    words = WordIndex({
+        d: (os.path.join(assets, f"{d.title()}.json"), None)
+        for d in ("easy", "medium", "hard")
+    })
+    asyncio.run(words.reload())
+
+    rng = random.Random(11)
+    jobs = []
+    for diff, lengths in words.lengths.items():
+        pool = [w.lower() for w in words.words[diff]]
+        for guess in rng.sample(pool, min(args.guesses, len(pool))):
+            jobs.append((guess, lengths[len(guess)]))
+    pairs = sum(len(index.words) for _, index in jobs)
+
+    # Same answers from every engine before timing anything
+    for guess, index in jobs[:20]:
+        part = index.partition(guess)
+        for k, w in enumerate(index.words):
+            code = pattern(guess, w)
+            assert marks(code, len(guess)) == counter_score(guess, w)
+            assert part[code] >> k & 1
+
+    engines = [
+        ("counter (old)", lambda g, ix: [counter_score(g, w) for w in ix.words]),
+        ("pattern", lambda g, ix: [pattern(g, w) for w in ix.words]),
+        ("partition", lambda g, ix: ix.partition(g)),
+    ]
+
+    print(f"{len(jobs)} guesses x words of the same length = {pairs} pairs")
+    print(f"{'engine':<15}{'seconds':>10}{'pairs/s':>14}{'speedup':>10}")
+    base = None
+    for label, fn in engines:
+        secs = _time(fn, jobs)
+        base = base or secs
+        print(f"{label:<15}{secs:>10.3f}{pairs / secs:>14,.0f}{base / secs:>9.1f}x")
+
+    sizes = [LengthIndex.count(m) for g, ix in jobs[:50] for m in ix.partition(g).values()]
+    print(f"(partition: {len(sizes)} classes over first 50 guesses, largest {max(sizes)})")
+
+    # Consumer: calibration's root-guess search on the biggest buckets
+    buckets = sorted((ix for lengths in words.lengths.values() for ix in lengths.values()),
+                     key=lambda ix: -len(ix.words))[:3]
+    print(f"\nbest_guess over {args.candidates} candidates, buckets of "
+          f"{', '.join(str(len(ix.words)) for ix in buckets)} words")
+    rows = []
+    for label, fn in (("pattern", best_guess_by_pattern), ("partition", best_guess)):
+        t0 = time.perf_counter()
+        picks = [fn(ix, ix.all, ix.words[:args.candidates]) for ix in buckets]
+        rows.append((label, time.perf_counter() - t0, picks))
+    assert rows[0][2] == rows[1][2]
+    for label, secs, _ in rows:
+        print(f"{label:<15}{secs:>10.3f}{rows[0][1] / secs:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
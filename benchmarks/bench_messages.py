@@ -0,0 +1,96 @@
+# File: benchmarks/bench_messages.py
+
+"""
+Message-counter ingestion rate on a single event loop: one $inc round trip
+per message vs tallying in the write-behind buffer (games/messages.py).
+
+Runs against the local stand-in Mongo (benchmarks/fakemongo.py):
+
+    python benchmarks/bench_messages.py [--latency-ms 5] [--messages 200000] [--users 2000]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import fakemongo  # noqa: E402
+
+
+async def _per_message(mongo, senders, concurrency):
+    # Pre-change shape: every message awaits its own update
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(uid):
+        async with sem:
+            await mongo.run_db(mongo.users.update_one, {"_id": uid}, {"$inc": {"messages": 1}}, upsert=True)
+
+    await asyncio.gather(*(one(uid) for uid in senders))
+
+
+async def _buffered(mongo, senders, _concurrency):
+    # Same body as games/messages.py::count_message; sleep(0) hands the
+    # loop back between updates the way the dispatcher does, so the flush
+    # task gets to run mid-stream
+    for uid in senders:
+        await mongo.buffer_write(uid, inc={"messages": 1})
+        await asyncio.sleep(0)
+    await mongo.write_behind.close()
+
+
+async def _run(mode, mongo, senders, concurrency):
+    mongo.users.delete_many({})
+    mongo.user_cache.invalidate()
+    trips0 = mongo.users.round_trips
+    fn = _per_message if mode == "per-message" else _buffered
+
+    t0 = time.perf_counter()
+    await fn(mongo, senders, concurrency)
+    elapsed = time.perf_counter() - t0
+
+    stored = sum(d.get("messages", 0) for d in mongo.users.find({}))
+    return {
+        "elapsed": elapsed,
+        "rate": len(senders) / elapsed,
+        "round_trips": mongo.users.round_trips - trips0,
+        "stored": stored,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--latency-ms", type=float, default=5.0)
+    ap.add_argument("--messages", type=int, default=200_000)
+    ap.add_argument("--users", type=int, default=2000)
+    ap.add_argument("--concurrency", type=int, default=64)
+    ap.add_argument("--per-message-cap", type=int, default=5000,
+                    help="messages to push through the slow baseline")
+    args = ap.parse_args()
+
+    fakemongo.install(latency=args.latency_ms / 1000)
+    from database import mongo
+
+    rng = random.Random(7)
+    senders = [str(rng.randrange(args.users)) for _ in range(args.messages)]
+
+    print(
+        f"stand-in latency={args.latency_ms}ms  messages={args.messages}  users={args.users}  "
+        f"WRITE_BEHIND_MS={mongo.WRITE_BEHIND_MS}  WRITE_BEHIND_OPS={mongo.WRITE_BEHIND_OPS}"
+    )
+    print(f"{'mode':<13}{'messages':>10}{'elapsed s':>11}{'msgs/s':>12}{'round trips':>13}{'stored':>10}")
+    for mode in ("per-message", "buffered"):
+        batch = senders[:args.per_message_cap] if mode == "per-message" else senders
+        r = asyncio.run(_run(mode, mongo, batch, args.concurrency))
+        assert r["stored"] == len(batch), "lost or duplicated counts"
+        print(
+            f"{mode:<13}{len(batch):>10}{r['elapsed']:>11.2f}{r['rate']:>12.0f}"
+            f"{r['round_trips']:>13}{r['stored']:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
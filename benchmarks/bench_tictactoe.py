@@ -0,0 +1,81 @@
+# File: benchmarks/bench_tictactoe.py
+
+"""
+Tic-tac-toe engine (utils/tictactoe.py): table build time at import,
+win detection (old 8-line loop over a list board vs WINNING lookup)
+and bot move selection, over every reachable position.
+
+    python benchmarks/bench_tictactoe.py
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.tictactoe import MOVES_OF, SCORE, choose_move, winner  # noqa: E402
+
+_LINES = [(0, 1, 2), (3, 4, 5), (6, 7, 8), (0, 3, 6), (1, 4, 7), (2, 5, 8), (0, 4, 8), (2, 4, 6)]
+
+
+def old_check_winner(board):
+    # xoxo.py's _check_winner before the bitboard engine
+    for a, b, c in _LINES:
+        if board[a] != " " and board[a] == board[b] == board[c]:
+            return board[a]
+    if " " not in board:
+        return "draw"
+    return None
+
+
+def _positions() -> list:
+    out = []
+    for code in range(3 ** 9):
+        if SCORE[code] == -128:
+            continue  # never reached in play
+        x = o = 0
+        n = code
+        for i in range(9):
+            n, d = divmod(n, 3)
+            if d == 1:
+                x |= 1 << i
+            elif d == 2:
+                o |= 1 << i
+        out.append((x, o))
+    return out
+
+
+def _rate(fn, items, rounds: int = 20) -> float:
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        for item in items:
+            fn(item)
+    return rounds * len(items) / (time.perf_counter() - t0)
+
+
+def main():
+    build = float(subprocess.run(
+        [sys.executable, "-c",
+         f"import sys, time; sys.path.insert(0, {ROOT!r}); t0 = time.perf_counter(); "
+         "import utils.tictactoe; print(time.perf_counter() - t0)"],
+        capture_output=True, text=True, check=True,
+    ).stdout)
+
+    positions = _positions()
+    boards = [["X" if x >> i & 1 else "O" if o >> i & 1 else " " for i in range(9)] for x, o in positions]
+    live = [(x, o) for x, o in positions if winner(x, o) is None]
+    assert all(old_check_winner(b) == winner(x, o) for b, (x, o) in zip(boards, positions))
+    assert all(choose_move(x, o) in MOVES_OF[0x1FF & ~(x | o)] for x, o in live)
+
+    print(f"import + perfect-play table: {build * 1000:.1f} ms ({len(positions)} reachable positions)")
+    print(f"{'operation':<28}{'ops/s':>14}")
+    print(f"{'winner: list loop (old)':<28}{_rate(old_check_winner, boards):>14,.0f}")
+    print(f"{'winner: bitboard lookup':<28}{_rate(lambda p: winner(*p), positions):>14,.0f}")
+    print(f"{'bot move (table)':<28}{_rate(lambda p: choose_move(*p), live):>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
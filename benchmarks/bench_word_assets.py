@@ -0,0 +1,107 @@
+# File: benchmarks/bench_word_assets.py
+
+"""
+Word-pool load time and resident memory: JSON parse vs mmapped .wab
+(utils/wordassets.py), on a synthetic list shaped like Easy.json.
+
+Each load runs in a fresh interpreter so RSS numbers don't mix:
+
+    python benchmarks/bench_word_assets.py [--words 300000]
+"""
+
+import argparse
+import json
+import os
+import random
+import string
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.wordassets import compile_json, compiled_path  # noqa: E402
+
+
+_CHILD = r"""
+import asyncio, resource, sys, time
+sys.path.insert(0, {root!r})
+from utils.wordindex import WordIndex
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+async def main():
+    idx = WordIndex({{"easy": ({path!r}, None)}})
+    base = rss_mb()
+    t0 = time.perf_counter()
+    await idx.reload()
+    load = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for _ in range(1000):
+        await idx.pick("easy")
+    pick = (time.perf_counter() - t0) / 1000
+    print(f"{{load:.3f}} {{rss_mb() - base:.1f}} {{pick * 1e6:.1f}} {{len(idx.words['easy'])}}")
+
+asyncio.run(main())
+"""
+
+
+def _synthetic(n: int, path: str):
+    rng = random.Random(3)
+    pool = {}
+    while len(pool) < n:
+        w = "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 9)))
+        pool[w] = {
+            "meaning": " ".join(rng.choice(["a", "word", "meaning", "that", "describes", "something"]) for _ in range(10)),
+            "pronunciation": f"/{w}/",
+            "example": f"This sentence uses {w} in a typical example for the quiz.",
+        }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(pool, f, ensure_ascii=False, indent=2)
+
+
+def _measure(path: str):
+    out = subprocess.run(
+        [sys.executable, "-c", _CHILD.format(root=ROOT, path=path)],
+        capture_output=True, text=True, check=True,
+    ).stdout.split()
+    load, rss, pick, n = out[-4:]
+    return float(load), float(rss), float(pick), int(n)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--words", type=int, default=300_000)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, "Easy.json")
+        _synthetic(args.words, src)
+        # Measure JSON first: once compiled, WordIndex prefers the .wab
+        results = [("json", _measure(src))]
+
+        t0 = time.perf_counter()
+        compile_json(src)
+        build = time.perf_counter() - t0
+        wab = compiled_path(src)
+        results.append(("wab", _measure(src)))
+
+        print(
+            f"words={args.words}  json={os.path.getsize(src) / 1e6:.1f} MB  "
+            f"wab={os.path.getsize(wab) / 1e6:.1f} MB  build={build:.2f}s"
+        )
+        print(f"{'source':<8}{'load s':>9}{'RSS +MB':>10}{'pick us':>10}")
+        for label, (load, rss, pick, n) in results:
+            assert n == args.words
+            print(f"{label:<8}{load:>9.3f}{rss:>10.1f}{pick:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# File: benchmarks/bench_wordchain.py
+
+"""
+Word-chain dataset cost at startup and on first use (games/wordchain.py).
+
+Each case runs in a fresh interpreter with its own cache directory:
+- eager     every dataset built the way the module used to at import
+- import    importing games.wordchain now (nothing is built)
+- cold      first use of every category with an empty cache (build + pickle)
+- warm      first use of every category after a previous run (unpickle)
+
+    python benchmarks/bench_wordchain.py
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_CHILD = r"""
+import asyncio, os, sys, time
+sys.path.insert(0, {root!r})
+os.environ["WORDCHAIN_CACHE_DIR"] = {cache!r}
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+t0 = time.perf_counter()
+import games.wordchain as wc
+took = time.perf_counter() - t0
+
+if {case!r} == "eager":
+    t0 = time.perf_counter()
+    for lib, build in wc.DATASETS.values():
+        build()
+    took += time.perf_counter() - t0
+elif {case!r} in ("cold", "warm"):
+    async def main():
+        for mode in wc.DATASETS:
+            await wc.get_wordset(mode)
+    t0 = time.perf_counter()
+    asyncio.run(main())
+    took = time.perf_counter() - t0
+
+print(f"{{took:.3f}} {{rss_mb():.1f}}")
+"""
+
+
+def _run(case: str, cache: str):
+    out = subprocess.run(
+        [sys.executable, "-c", _CHILD.format(root=ROOT, cache=cache, case=case)],
+        capture_output=True, text=True, check=True,
+    ).stdout.split()
+    return float(out[-2]), float(out[-1])
+
+
+def main():
+    with tempfile.TemporaryDirectory() as cache:
+        # "cold" must come before "warm": it fills the cache warm reads
+        cases = ["eager", "import", "cold", "warm"]
+        print(f"{'case':<8}{'seconds':>10}{'RSS MB':>10}")
+        for case in cases:
+            secs, rss = _run(case, cache)
+            print(f"{case:<8}{secs:>10.3f}{rss:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# File: benchmarks/bench_wordchain_lookup.py
+
+"""
+Word-chain validation and bot replies at 50k words: the old list scan
+vs WordSet (frozenset membership + first-letter index) from
+games/wordchain.py, on a synthetic list shaped like the nouns category.
+
+    python benchmarks/bench_wordchain_lookup.py [--words 50000] [--lookups 20000]
+"""
+
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from games.wordchain import WordSet  # noqa: E402
+
+
+def _synthetic(n: int) -> list:
+    rng = random.Random(5)
+    words = {}
+    while len(words) < n:
+        w = "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 10)))
+        words[w] = None
+    return list(words)
+
+
+def list_reply(words: list, letter: str, used: set):
+    # What a reply looks like without an index: scan for a candidate
+    options = [w for w in words if w.startswith(letter) and w not in used]
+    return random.choice(options) if options else None
+
+
+def _rate(fn, items) -> float:
+    t0 = time.perf_counter()
+    for x in items:
+        fn(x)
+    return len(items) / (time.perf_counter() - t0)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--words", type=int, default=50_000)
+    ap.add_argument("--lookups", type=int, default=20_000)
+    args = ap.parse_args()
+
+    words = _synthetic(args.words)
+    t0 = time.perf_counter()
+    ws = WordSet(words)
+    build = time.perf_counter() - t0
+
+    rng = random.Random(9)
+    # Half real words, half misses: validation sees both all the time
+    probes = [rng.choice(words) if i % 2 else rng.choice(words) + "q" for i in range(args.lookups)]
+    used = set(rng.sample(words, 200))  # a long-running game
+    letters = [rng.choice(string.ascii_lowercase) for _ in range(args.lookups // 10)]
+
+    assert all((p in ws) == (p in words) for p in probes[:500])
+
+    rows = [
+        ("validate: list", _rate(lambda p: p in words, probes[:args.lookups // 20])),
+        ("validate: WordSet", _rate(lambda p: p in ws, probes)),
+        ("reply: list scan", _rate(lambda c: list_reply(words, c, used), letters[:200])),
+        ("reply: WordSet", _rate(lambda c: ws.pick_reply(c, used), letters)),
+    ]
+
+    print(f"words={len(words)}  WordSet build={build * 1000:.1f} ms")
+    print(f"{'operation':<20}{'ops/s':>14}")
+    for label, rate in rows:
+        print(f"{label:<20}{rate:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
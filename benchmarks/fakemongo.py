@@ -0,0 +1,555 @@
+# File: benchmarks/fakemongo.py
+
+"""
+Local stand-in for the subset of pymongo used by database/mongo.py.
+
+Benchmarks call install() before importing database.mongo so the real
+data layer runs against an in-process store. Every round-trip sleeps
+for `latency` seconds (time.sleep releases the GIL, so pool threads
+overlap the same way real network I/O does).
+"""
+
+import copy
+import sys
+import threading
+import time
+import types
+
+
+# -------------------------------------------------
+# FIELD PATH HELPERS
+# -------------------------------------------------
+_MISSING = object()
+
+
+def _get_path(doc, path):
+    cur = doc
+    for part in path.split("."):
+        if not isinstance(cur, dict) or part not in cur:
+            return _MISSING
+        cur = cur[part]
+    return cur
+
+
+def _set_path(doc, path, value):
+    parts = path.split(".")
+    cur = doc
+    for part in parts[:-1]:
+        nxt = cur.get(part)
+        if not isinstance(nxt, dict):
+            nxt = {}
+            cur[part] = nxt
+        cur = nxt
+    cur[parts[-1]] = value
+
+
+def _unset_path(doc, path):
+    parts = path.split(".")
+    cur = doc
+    for part in parts[:-1]:
+        cur = cur.get(part)
+        if not isinstance(cur, dict):
+            return
+    cur.pop(parts[-1], None)
+
+
+# -------------------------------------------------
+# FILTERS
+# -------------------------------------------------
+def _match_value(value, cond):
+    if isinstance(cond, dict) and cond and all(k.startswith("$") for k in cond):
+        for op, arg in cond.items():
+            present = value is not _MISSING
+            v = value if present else None
+            if op == "$exists":
+                if bool(arg) != present:
+                    return False
+            elif op == "$ne":
+                if v == arg or (isinstance(v, list) and arg in v):
+                    return False
+            elif op == "$in":
+                if v not in arg:
+                    return False
+            elif op == "$nin":
+                if v in arg:
+                    return False
+            elif op in ("$gt", "$gte", "$lt", "$lte"):
+                if not present or v is None:
+                    return False
+                try:
+                    if op == "$gt" and not v > arg:
+                        return False
+                    if op == "$gte" and not v >= arg:
+                        return False
+                    if op == "$lt" and not v < arg:
+                        return False
+                    if op == "$lte" and not v <= arg:
+                        return False
+                except TypeError:
+                    return False
+            else:
+                raise NotImplementedError(op)
+        return True
+    if value is _MISSING:
+        return cond is None
+    if isinstance(value, list) and not isinstance(cond, list):
+        return cond in value  # array field matches any element
+    return value == cond
+
+
+def _matches(doc, flt):
+    for key, cond in (flt or {}).items():
+        if key == "$or":
+            if not any(_matches(doc, sub) for sub in cond):
+                return False
+            continue
+        if key == "$and":
+            if not all(_matches(doc, sub) for sub in cond):
+                return False
+            continue
+        if not _match_value(_get_path(doc, key), cond):
+            return False
+    return True
+
+
+# -------------------------------------------------
+# AGGREGATION EXPRESSIONS (update pipelines)
+# -------------------------------------------------
+def _eval(doc, expr):
+    if isinstance(expr, str) and expr.startswith("$"):
+        v = _get_path(doc, expr[1:])
+        return None if v is _MISSING else v
+    if isinstance(expr, dict) and len(expr) == 1:
+        op, arg = next(iter(expr.items()))
+        if op == "$literal":
+            return arg
+        if op.startswith("$"):
+            args = [_eval(doc, a) for a in (arg if isinstance(arg, list) else [arg])]
+            if op == "$add":
+                return sum(a or 0 for a in args)
+            if op == "$subtract":
+                return (args[0] or 0) - (args[1] or 0)
+            if op == "$multiply":
+                out = 1
+                for a in args:
+                    out *= a or 0
+                return out
+            if op == "$max":
+                return max(a for a in args if a is not None)
+            if op == "$min":
+                return min(a for a in args if a is not None)
+            if op == "$ifNull":
+                return args[0] if args[0] is not None else args[1]
+            raise NotImplementedError(op)
+    if isinstance(expr, dict):
+        return {k: _eval(doc, v) for k, v in expr.items()}
+    return expr
+
+
+# -------------------------------------------------
+# UPDATES
+# -------------------------------------------------
+def _apply_update(doc, update, inserting=False):
+    if isinstance(update, list):
+        for stage in update:
+            for op, spec in stage.items():
+                if op == "$set":
+                    values = {k: _eval(doc, v) for k, v in spec.items()}
+                    for k, v in values.items():
+                        _set_path(doc, k, v)
+                elif op == "$unset":
+                    for k in ([spec] if isinstance(spec, str) else spec):
+                        _unset_path(doc, k)
+                else:
+                    raise NotImplementedError(op)
+        return
+    for op, spec in update.items():
+        if op == "$set":
+            for k, v in spec.items():
+                _set_path(doc, k, copy.deepcopy(v))
+        elif op == "$setOnInsert":
+            if inserting:
+                for k, v in spec.items():
+                    _set_path(doc, k, copy.deepcopy(v))
+        elif op == "$inc":
+            for k, v in spec.items():
+                cur = _get_path(doc, k)
+                _set_path(doc, k, (0 if cur is _MISSING else cur) + v)
+        elif op == "$max":
+            for k, v in spec.items():
+                cur = _get_path(doc, k)
+                if cur is _MISSING or v > cur:
+                    _set_path(doc, k, v)
+        elif op == "$unset":
+            for k in spec:
+                _unset_path(doc, k)
+        elif op == "$addToSet":
+            for k, v in spec.items():
+                cur = _get_path(doc, k)
+                if cur is _MISSING:
+                    cur = []
+                    _set_path(doc, k, cur)
+                if v not in cur:
+                    cur.append(copy.deepcopy(v))
+        elif op == "$pull":
+            for k, v in spec.items():
+                cur = _get_path(doc, k)
+                if isinstance(cur, list):
+                    cur[:] = [x for x in cur if x != v]
+        elif op == "$push":
+            for k, v in spec.items():
+                cur = _get_path(doc, k)
+                if cur is _MISSING:
+                    cur = []
+                    _set_path(doc, k, cur)
+                cur.append(copy.deepcopy(v))
+        else:
+            raise NotImplementedError(op)
+
+
+def _seed_from_filter(flt):
+    doc = {}
+    for k, v in (flt or {}).items():
+        if not k.startswith("$") and not (isinstance(v, dict) and any(x.startswith("$") for x in v)):
+            _set_path(doc, k, v)
+    return doc
+
+
+def _project(doc, projection):
+    if not projection:
+        return copy.deepcopy(doc)
+    include = {k for k, v in projection.items() if v}
+    if include:
+        out = {"_id": doc.get("_id")} if projection.get("_id", 1) else {}
+        for k in include:
+            v = _get_path(doc, k)
+            if v is not _MISSING:
+                _set_path(out, k, copy.deepcopy(v))
+        return out
+    out = copy.deepcopy(doc)
+    for k, v in projection.items():
+        if not v:
+            _unset_path(out, k)
+    return out
+
+
+# -------------------------------------------------
+# PUBLIC SURFACE
+# -------------------------------------------------
+class ReturnDocument:
+    BEFORE = False
+    AFTER = True
+
+
+class _Result:
+    def __init__(self, **kw):
+        self.__dict__.update(kw)
+
+
+class UpdateOne:
+    def __init__(self, filter, update, upsert=False):
+        self._filter, self._doc, self._upsert = filter, update, upsert
+
+
+class UpdateMany(UpdateOne):
+    pass
+
+
+class InsertOne:
+    def __init__(self, document):
+        self._doc = document
+
+
+class DeleteOne:
+    def __init__(self, filter):
+        self._filter = filter
+
+
+class ReplaceOne:
+    def __init__(self, filter, replacement, upsert=False):
+        self._filter, self._doc, self._upsert = filter, replacement, upsert
+
+
+class Cursor:
+    def __init__(self, docs):
+        self._docs = docs
+
+    def sort(self, key, direction=None):
+        keys = key if isinstance(key, list) else [(key, direction or 1)]
+        for field, d in reversed(keys):
+            def k(doc, field=field):
+                v = _get_path(doc, field)
+                return (v is not _MISSING and v is not None, v if v is not _MISSING else None)
+            self._docs.sort(key=k, reverse=(d == -1))
+        return self
+
+    def skip(self, n):
+        self._docs = self._docs[n:]
+        return self
+
+    def limit(self, n):
+        if n:
+            self._docs = self._docs[:n]
+        return self
+
+    def batch_size(self, n):
+        return self
+
+    def __iter__(self):
+        return iter(self._docs)
+
+
+class Collection:
+    def __init__(self, store, latency):
+        self._docs = store
+        self._lock = threading.Lock()
+        self._latency = latency
+        self.round_trips = 0
+
+    def _trip(self):
+        self.round_trips += 1
+        if self._latency:
+            time.sleep(self._latency)
+
+    def _find_first(self, flt):
+        if flt and "_id" in flt and not isinstance(flt["_id"], dict):
+            doc = self._docs.get(flt["_id"])
+            return doc if doc is not None and _matches(doc, flt) else None
+        for doc in self._docs.values():
+            if _matches(doc, flt):
+                return doc
+        return None
+
+    def _upsert_one(self, flt, update, upsert):
+        doc = self._find_first(flt)
+        if doc is None:
+            if not upsert:
+                return None, None, 0
+            doc = _seed_from_filter(flt)
+            _apply_update(doc, update, inserting=True)
+            self._docs[doc["_id"]] = doc
+            return None, doc, 1
+        before = copy.deepcopy(doc)
+        _apply_update(doc, update)
+        return before, doc, 0
+
+    # ---- reads ----
+    def find_one(self, flt=None, projection=None):
+        self._trip()
+        with self._lock:
+            doc = self._find_first(flt or {})
+            return _project(doc, projection) if doc is not None else None
+
+    def find(self, flt=None, projection=None, **kw):
+        self._trip()
+        with self._lock:
+            docs = [_project(d, projection) for d in self._docs.values() if _matches(d, flt or {})]
+        cur = Cursor(docs)
+        if kw.get("sort"):
+            cur.sort(kw["sort"])
+        if kw.get("limit"):
+            cur.limit(kw["limit"])
+        return cur
+
+    def count_documents(self, flt, **kw):
+        self._trip()
+        with self._lock:
+            return sum(1 for d in self._docs.values() if _matches(d, flt))
+
+    def distinct(self, key, flt=None):
+        self._trip()
+        with self._lock:
+            out = []
+            for d in self._docs.values():
+                if _matches(d, flt or {}):
+                    v = _get_path(d, key)
+                    if v is not _MISSING and v not in out:
+                        out.append(v)
+            return out
+
+    def aggregate(self, pipeline):
+        self._trip()
+        with self._lock:
+            docs = [copy.deepcopy(d) for d in self._docs.values()]
+        cur = Cursor(docs)
+        for stage in pipeline:
+            (op, spec), = stage.items()
+            if op == "$match":
+                cur._docs = [d for d in cur._docs if _matches(d, spec)]
+            elif op == "$project":
+                cur._docs = [_project(d, spec) for d in cur._docs]
+            elif op == "$sort":
+                cur.sort(list(spec.items()))
+            elif op == "$limit":
+                cur.limit(spec)
+            else:
+                raise NotImplementedError(op)
+        return iter(cur._docs)
+
+    # ---- writes ----
+    def insert_one(self, doc):
+        self._trip()
+        with self._lock:
+            if doc.get("_id") in self._docs:
+                raise errors.DuplicateKeyError("duplicate _id")
+            self._docs[doc["_id"]] = copy.deepcopy(doc)
+        return _Result(inserted_id=doc["_id"])
+
+    def update_one(self, flt, update, upsert=False):
+        self._trip()
+        with self._lock:
+            before, after, inserted = self._upsert_one(flt, update, upsert)
+        return _Result(
+            matched_count=int(before is not None),
+            modified_count=int(before is not None),
+            upserted_id=after["_id"] if inserted else None,
+        )
+
+    def update_many(self, flt, update, upsert=False):
+        self._trip()
+        n = 0
+        with self._lock:
+            for doc in list(self._docs.values()):
+                if _matches(doc, flt):
+                    _apply_update(doc, update)
+                    n += 1
+        return _Result(matched_count=n, modified_count=n)
+
+    def find_one_and_update(self, flt, update, upsert=False, return_document=False, projection=None):
+        self._trip()
+        with self._lock:
+            before, after, inserted = self._upsert_one(flt, update, upsert)
+            if after is None:
+                return None
+            out = after if return_document else before
+            return _project(out, projection) if out is not None else None
+
+    def find_one_and_delete(self, flt, projection=None):
+        self._trip()
+        with self._lock:
+            doc = self._find_first(flt)
+            if doc is None:
+                return None
+            del self._docs[doc["_id"]]
+            return _project(doc, projection)
+
+    def delete_one(self, flt):
+        self._trip()
+        with self._lock:
+            doc = self._find_first(flt)
+            if doc is not None:
+                del self._docs[doc["_id"]]
+        return _Result(deleted_count=int(doc is not None))
+
+    def delete_many(self, flt):
+        self._trip()
+        with self._lock:
+            ids = [k for k, d in self._docs.items() if _matches(d, flt)]
+            for k in ids:
+                del self._docs[k]
+        return _Result(deleted_count=len(ids))
+
+    def bulk_write(self, ops, ordered=True):
+        self._trip()
+        modified = upserted = 0
+        with self._lock:
+            for op in ops:
+                if isinstance(op, InsertOne):
+                    self._docs[op._doc["_id"]] = copy.deepcopy(op._doc)
+                elif isinstance(op, DeleteOne):
+                    doc = self._find_first(op._filter)
+                    if doc is not None:
+                        del self._docs[doc["_id"]]
+                elif isinstance(op, ReplaceOne):
+                    doc = self._find_first(op._filter)
+                    if doc is None and not op._upsert:
+                        continue
+                    _id = doc["_id"] if doc is not None else op._filter["_id"]
+                    self._docs[_id] = dict(copy.deepcopy(op._doc), _id=_id)
+                    modified += int(doc is not None)
+                    upserted += int(doc is None)
+                elif isinstance(op, UpdateMany):
+                    for doc in list(self._docs.values()):
+                        if _matches(doc, op._filter):
+                            _apply_update(doc, op._doc)
+                            modified += 1
+                else:
+                    before, _, inserted = self._upsert_one(op._filter, op._doc, op._upsert)
+                    modified += int(before is not None)
+                    upserted += inserted
+        return _Result(modified_count=modified, upserted_count=upserted)
+
+    def create_index(self, keys, **kw):
+        return "index"
+
+
+class Database:
+    def __init__(self, latency):
+        self._latency = latency
+        self._cols = {}
+
+    def __getitem__(self, name):
+        if name not in self._cols:
+            self._cols[name] = Collection({}, self._latency)
+        return self._cols[name]
+
+
+class _Admin:
+    def command(self, *a, **kw):
+        return {"ok": 1}
+
+
+class MongoClient:
+    latency = 0.0
+
+    def __init__(self, *a, **kw):
+        self.admin = _Admin()
+        self._dbs = {}
+
+    def __getitem__(self, name):
+        if name not in self._dbs:
+            self._dbs[name] = Database(MongoClient.latency)
+        return self._dbs[name]
+
+
+errors = types.ModuleType("pymongo.errors")
+
+
+class PyMongoError(Exception):
+    pass
+
+
+class ServerSelectionTimeoutError(PyMongoError):
+    pass
+
+
+class DuplicateKeyError(PyMongoError):
+    pass
+
+
+errors.PyMongoError = PyMongoError
+errors.ServerSelectionTimeoutError = ServerSelectionTimeoutError
+errors.DuplicateKeyError = DuplicateKeyError
+
+ASCENDING = 1
+DESCENDING = -1
+
+
+def install(latency: float = 0.0):
+    """
+    Register this module as `pymongo` and point MONGO_URI at it.
+    Must run before `database.mongo` is imported.
+    """
+    import os
+
+    MongoClient.latency = latency
+    mod = types.ModuleType("pymongo")
+    for name in (
+        "MongoClient", "ReturnDocument", "UpdateOne", "UpdateMany", "InsertOne",
+        "DeleteOne", "ReplaceOne", "ASCENDING", "DESCENDING",
+    ):
+        setattr(mod, name, globals()[name])
+    mod.errors = errors
+    sys.modules["pymongo"] = mod
+    sys.modules["pymongo.errors"] = errors
+    os.environ.setdefault("MONGO_URI", "mongodb://stand-in")
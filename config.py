@@ -14,6 +14,9 @@ STRING_SESSION = os.getenv("STRING_SESSION")
 MONGO_URI = os.getenv("MONGO_URI")
 DB_NAME = os.getenv("DB_NAME", "GameUserBot")
 
+# Updates handled at once (same chat / same user still one at a time, utils/locks.py)
+WORKERS = int(os.getenv("WORKERS", 16))
+
 # Safety checks
 if not API_ID or not API_HASH or not STRING_SESSION:
     raise Exception("❌ Missing API_ID / API_HASH / STRING_SESSION in environment variables.")
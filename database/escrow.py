@@ -0,0 +1,172 @@
+# File: database/escrow.py
+from datetime import datetime, timedelta, timezone
+import asyncio
+import os
+import uuid
+
+from pymongo import ReturnDocument
+
+from database.mongo import db, run_db, _wallet_update_sync
+
+
+# -------------------------------------------------
+# SETTINGS
+# -------------------------------------------------
+ESCROW_TTL = int(os.getenv("ESCROW_TTL", 6 * 3600))             # refund stakes held longer
+ESCROW_SWEEP_INTERVAL = int(os.getenv("ESCROW_SWEEP_INTERVAL", 300))
+ESCROW_KEEP = int(os.getenv("ESCROW_KEEP", 7 * 86400))          # closed docs kept for audit
+
+escrows = db["escrows"]
+
+
+# -------------------------------------------------
+# ESCROW
+# -------------------------------------------------
+# Stakes for a wager live in one escrow doc while the game runs:
+#
+#   {"_id": "xoxo:<hex>", "status": "holding" | "releasing" | "closed",
+#    "currency": "bronze", "stakes": {uid: amount}, "payouts": {uid: amount},
+#    "expires_at": date, "closed_at": date}
+#
+# Each leg is one conditional write on the user doc, tagged with the
+# escrow id so it can only ever apply once:
+#   take     $inc -stake, $addToSet escrows   where balance >= stake, not tagged
+#   release  $inc payout, $pull escrows       where tagged
+#
+# Releasing starts with ONE conditional flip of the escrow doc from
+# "holding" to "releasing" (with the payouts written in), so settle,
+# refund and expiry can race and exactly one wins. A crash at any
+# point leaves either a "holding" doc (refund it) or a "releasing" doc
+# (re-run its legs; tags make that idempotent). recover_escrows() does
+# both at startup, since the games themselves lived only in memory.
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def new_escrow_id(kind: str) -> str:
+    return f"{kind}:{uuid.uuid4().hex}"
+
+
+def _open_sync(escrow_id: str, stakes: dict, currency: str, ttl: int):
+    """Take every stake; returns None, or the user id that couldn't pay."""
+    now = _now()
+    escrows.insert_one({
+        "_id": escrow_id,
+        "status": "holding",
+        "currency": currency,
+        "stakes": {str(uid): int(amount) for uid, amount in stakes.items()},
+        "created_at": now,
+        "expires_at": now + timedelta(seconds=ttl),
+    })
+    for uid, amount in stakes.items():
+        taken = _wallet_update_sync(
+            uid, {currency: -int(amount)}, guard={currency: int(amount)},
+            update={"$addToSet": {"escrows": escrow_id}},
+            where={"escrows": {"$ne": escrow_id}},
+        )
+        if taken is None:
+            _release_sync(escrow_id, None)  # hand back whatever was taken
+            return uid
+    return None
+
+
+def _apply_legs(doc: dict):
+    escrow_id, currency = doc["_id"], doc["currency"]
+    payouts = doc.get("payouts") or {}
+    for uid in doc["stakes"]:
+        _wallet_update_sync(
+            uid, {currency: int(payouts.get(uid, 0))},
+            update={"$pull": {"escrows": escrow_id}},
+            where={"escrows": escrow_id},
+        )
+    escrows.update_one({"_id": escrow_id}, {"$set": {"status": "closed", "closed_at": _now()}})
+
+
+def _release_sync(escrow_id: str, payouts) -> bool:
+    """
+    Pay out and close a holding escrow. `payouts` is {uid: amount} over
+    the stakers (None = refund every stake). False if it was already
+    released by someone else.
+    """
+    doc = escrows.find_one({"_id": escrow_id}, {"stakes": 1})
+    if doc is None:
+        return False
+    if payouts is None:
+        payouts = doc["stakes"]
+    payouts = {str(uid): int(amount) for uid, amount in payouts.items() if amount}
+    strangers = set(payouts) - set(doc["stakes"])
+    if strangers:
+        raise ValueError(f"escrow {escrow_id}: payout to non-staker(s) {sorted(strangers)}")
+
+    doc = escrows.find_one_and_update(
+        {"_id": escrow_id, "status": "holding"},
+        {"$set": {"status": "releasing", "payouts": payouts}},
+        return_document=ReturnDocument.AFTER,
+    )
+    if doc is None:
+        return False
+    _apply_legs(doc)
+    return True
+
+
+def _sweep_sync(expired_only: bool) -> int:
+    """Refund holding escrows (all, or just expired ones) and finish interrupted releases."""
+    flt = {"status": "holding"}
+    if expired_only:
+        flt["expires_at"] = {"$lt": _now()}
+    done = 0
+    for doc in list(escrows.find(flt, {"_id": 1})):
+        done += _release_sync(doc["_id"], None)
+    for doc in list(escrows.find({"status": "releasing"})):
+        _apply_legs(doc)
+        done += 1
+    return done
+
+
+def recover_escrows() -> int:
+    """Startup: refund orphaned stakes, finish half-done payouts. Returns how many."""
+    escrows.create_index("closed_at", expireAfterSeconds=ESCROW_KEEP)
+    escrows.create_index("status")
+    return _sweep_sync(expired_only=False)
+
+
+# -------------------------------------------------
+# ASYNC API
+# -------------------------------------------------
+_sweeper = None
+
+
+async def _sweep_forever():
+    while True:
+        await asyncio.sleep(ESCROW_SWEEP_INTERVAL)
+        try:
+            n = await run_db(_sweep_sync, True)
+            if n:
+                print(f"[escrow] released {n} expired escrow(s)")
+        except Exception as e:
+            print(f"[escrow] sweep failed, will retry: {e}")
+
+
+async def open_escrow(kind: str, stakes: dict, currency: str = "bronze", ttl: int = ESCROW_TTL):
+    """
+    Move every stake into a new escrow, all or nothing:
+        escrow_id, short = await open_escrow("xoxo", {a: 50, b: 50})
+    `short` is the user id that couldn't cover their stake (nothing is
+    held then), else None.
+    """
+    global _sweeper
+    if _sweeper is None:
+        _sweeper = asyncio.get_running_loop().create_task(_sweep_forever())
+    escrow_id = new_escrow_id(kind)
+    short = await run_db(_open_sync, escrow_id, stakes, currency, ttl)
+    return escrow_id, short
+
+
+async def settle_escrow(escrow_id: str, payouts: dict) -> bool:
+    """Pay `payouts` ({uid: amount}, stakers only) and close the escrow."""
+    return await run_db(_release_sync, escrow_id, payouts)
+
+
+async def refund_escrow(escrow_id: str) -> bool:
+    """Give every stake back and close the escrow."""
+    return await run_db(_release_sync, escrow_id, None)
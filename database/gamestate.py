@@ -0,0 +1,229 @@
+# File: database/gamestate.py
+from pymongo import ReplaceOne, DeleteOne
+from datetime import datetime, timezone
+import asyncio
+import copy
+import os
+
+from database.mongo import db, run_db
+from utils.state import ExpiringDict
+
+
+# -------------------------------------------------
+# SETTINGS
+# -------------------------------------------------
+GAME_STATE_SAVE_MS = int(os.getenv("GAME_STATE_SAVE_MS", 5000))   # debounce window
+GAME_STATE_TTL = int(os.getenv("GAME_STATE_TTL", 172800))         # drop abandoned games after N s
+GAME_STATE_MAX_LIVE = int(os.getenv("GAME_STATE_MAX_LIVE", 5000))  # games kept in memory per store
+
+
+# -------------------------------------------------
+# PERSISTED GAME STATE
+# -------------------------------------------------
+# In-memory {key: state} for running games, snapshotted to a Mongo
+# collection so a worker restart doesn't wipe them.
+#
+# - put()/touch() only mark a key dirty; dirty keys are written in one
+#   bulk_write per GAME_STATE_SAVE_MS, so a burst of guesses costs one
+#   write, not one per guess.
+# - get() is lazy: the ids of saved games are read once, and a game's
+#   document is only fetched when that chat next interacts. Chats with
+#   nothing saved never touch the DB.
+# - Saved docs carry `saved_at` with a TTL index, so games nobody comes
+#   back to expire on their own. In memory, a game idle for `ttl` is
+#   dropped (and deleted); past `max_live` the least recently used one
+#   is only unloaded, to be restored from Mongo if its chat returns.
+class StateStore:
+    def __init__(self, name: str, interval_ms: int = GAME_STATE_SAVE_MS, ttl: int = GAME_STATE_TTL,
+                 max_live: int = GAME_STATE_MAX_LIVE):
+        self.name = name
+        self.coll = db[name]
+        self.interval = interval_ms / 1000
+        self.ttl = ttl
+        # key -> state dict (the game's working copy)
+        self.live = ExpiringDict(name, ttl, max_live, on_remove=self._forget)
+        self._parked = {}       # evicted while dirty: held until written
+        self._dirty = set()
+        self._deleted = set()
+        self._saved = None      # keys with a doc in Mongo, loaded on first get()
+        self._loading = None
+        self._task = None
+        self._lock = None
+        self.flushes = 0
+        self.restored = 0
+        _stores.append(self)
+
+    # ---- reads ----
+    def _load_ids_sync(self) -> set:
+        self.coll.create_index("saved_at", expireAfterSeconds=self.ttl)
+        return {str(d["_id"]) for d in self.coll.find({}, {"_id": 1})}
+
+    async def _saved_ids(self) -> set:
+        if self._saved is None:
+            # Single-flight: concurrent first calls share one query
+            if self._loading is None:
+                self._loading = asyncio.ensure_future(run_db(self._load_ids_sync))
+            try:
+                ids = await self._loading
+            except Exception as e:
+                self._loading = None
+                print(f"[state:{self.name}] could not list saved games: {e}")
+                return set()
+            if self._saved is None:
+                self._saved = ids - set(self.live) - self._deleted
+        return self._saved
+
+    async def get(self, key):
+        """The live state for `key`, rehydrated from Mongo on first touch."""
+        key = str(key)
+        state = self.live.get(key)
+        if state is not None:
+            return state
+        if key in self._parked:
+            self.live[key] = self._parked.pop(key)
+            return self.live[key]
+        saved = await self._saved_ids()
+        if key not in saved:
+            return None
+
+        try:
+            doc = await run_db(self.coll.find_one, {"_id": key})
+        except Exception as e:
+            print(f"[state:{self.name}] restore {key} failed: {e}")
+            return None
+        saved.discard(key)
+        if key in self.live or key in self._deleted:
+            return self.live.get(key)  # changed while we were fetching
+        if not doc:
+            return None
+        doc.pop("_id", None)
+        doc.pop("saved_at", None)
+        self.live[key] = doc
+        self.restored += 1
+        return doc
+
+    async def keys(self) -> set:
+        """Every key with a running game, in memory or only saved."""
+        return set(self.live) | set(self._parked) | await self._saved_ids()
+
+    # ---- writes (event loop only, never await the DB) ----
+    def put(self, key, state: dict) -> dict:
+        key = str(key)
+        self.live[key] = state
+        self.touch(key)
+        return state
+
+    def touch(self, key):
+        """Mark a live state as changed in place; saved on the next flush."""
+        key = str(key)
+        if key not in self.live:
+            return
+        self._deleted.discard(key)
+        self._dirty.add(key)
+        self._start()
+
+    def drop(self, key):
+        key = str(key)
+        self.live.pop(key, None)
+        self._parked.pop(key, None)
+        if self._saved is not None:
+            self._saved.discard(key)
+        self._dirty.discard(key)
+        self._deleted.add(key)
+        self._start()
+
+    def _forget(self, key, state, reason: str):
+        # Called by self.live when an entry leaves on its own
+        if reason == "expired":
+            self.drop(key)  # abandoned: delete the saved copy too
+        elif key in self._dirty:
+            self._parked[key] = state
+        elif self._saved is not None:
+            self._saved.add(key)  # already in Mongo; get() restores it
+
+    # ---- flushing ----
+    def _start(self):
+        if self._task is None:
+            self._lock = asyncio.Lock()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"[state:{self.name}] flush failed, will retry: {e}")
+
+    async def flush(self):
+        """Write every dirty state and delete every dropped one, in one bulk_write."""
+        if self._lock is None:
+            return
+        async with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            deleted, self._deleted = self._deleted, set()
+            if not dirty and not deleted:
+                return
+
+            # Snapshot on the loop so no handler mutates a state mid-write
+            now = datetime.now(timezone.utc)
+            requests = []
+            for key in dirty:
+                state = self.live.peek(key)
+                if state is None:
+                    state = self._parked.get(key)
+                if state is None:
+                    # Left live without being parked: nothing to save
+                    deleted.add(key)
+                    continue
+                doc = copy.deepcopy(state)
+                doc["saved_at"] = now
+                requests.append(ReplaceOne({"_id": key}, doc, upsert=True))
+            requests.extend(DeleteOne({"_id": key}) for key in deleted)
+
+            try:
+                await run_db(self.coll.bulk_write, requests, ordered=False)
+            except Exception:
+                # Requeue whatever hasn't been superseded since
+                self._dirty.update(k for k in dirty if k in self.live or k in self._parked)
+                self._deleted.update(k for k in deleted if k not in self.live)
+                raise
+            for key in dirty:
+                if key in self._parked and key not in self._dirty:
+                    del self._parked[key]
+                    if self._saved is not None:
+                        self._saved.add(key)
+            self.flushes += 1
+
+    async def close(self):
+        """Flush-on-shutdown: stop the timer and persist everything left."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "live": len(self.live),
+            "parked": len(self._parked),
+            "dirty": len(self._dirty),
+            "deleted": len(self._deleted),
+            "restorable": len(self._saved or ()),
+            "restored": self.restored,
+            "flushes": self.flushes,
+        }
+
+
+_stores = []
+
+
+async def close_stores():
+    """Persist every StateStore (called from main.py on shutdown)."""
+    for store in _stores:
+        try:
+            await store.close()
+        except Exception as e:
+            print(f"[state:{store.name}] final flush failed: {e}")
@@ -0,0 +1,143 @@
+# File: database/leaderboard.py
+from database.mongo import users, run_db, field_generation
+import asyncio
+import bisect
+import os
+import time
+
+
+# -------------------------------------------------
+# SETTINGS
+# -------------------------------------------------
+LEADERBOARD_SIZE = int(os.getenv("LEADERBOARD_SIZE", 100))           # ranks kept per board
+LEADERBOARD_PAGE = int(os.getenv("LEADERBOARD_PAGE", 10))            # rows per page
+LEADERBOARD_MIN_AGE = float(os.getenv("LEADERBOARD_MIN_AGE", 15))    # rebuild when dirty...
+LEADERBOARD_MAX_AGE = float(os.getenv("LEADERBOARD_MAX_AGE", 300))   # ...or at least this often
+
+
+# -------------------------------------------------
+# SNAPSHOT BOARD
+# -------------------------------------------------
+# Each board holds the top LEADERBOARD_SIZE docs as a plain list, so a
+# page is a slice. Reads never wait on Mongo once a snapshot exists:
+# an old or dirty snapshot is served as-is while one background rebuild
+# replaces it (stale-while-revalidate). Only the very first read awaits
+# the build, and concurrent first reads share that one build.
+class Leaderboard:
+    def __init__(self, field: str, projection: dict, size: int = LEADERBOARD_SIZE):
+        self.field = field
+        # name / name_at let the render skip Telegram (database/names.py)
+        self.projection = dict(projection, name=1, name_at=1, **{field: 1})
+        self.size = size
+        self._rows = None
+        self._keys = []        # -value per row, ascending, for bisect
+        self._built_at = 0.0
+        self._generation = None
+        self._rebuild = None
+        self.rebuilds = 0
+
+    # ---- state ----
+    def _age(self) -> float:
+        return time.monotonic() - self._built_at
+
+    def is_stale(self) -> bool:
+        if self._rows is None:
+            return True
+        age = self._age()
+        if age >= LEADERBOARD_MAX_AGE:
+            return True
+        dirty = field_generation(self.field) != self._generation
+        return dirty and age >= LEADERBOARD_MIN_AGE
+
+    def mark_dirty(self):
+        """Force the next read to trigger a rebuild (ignores MIN_AGE)."""
+        self._built_at = 0.0
+
+    # ---- building ----
+    def _query(self) -> list:
+        cursor = users.find({}, self.projection).sort(self.field, -1).limit(self.size)
+        return list(cursor)
+
+    async def _build(self):
+        generation = field_generation(self.field)  # read before the query
+        try:
+            rows = await run_db(self._query)
+        except Exception as e:
+            if self._rows is None:
+                raise  # nothing to fall back on; the first reader sees it
+            print(f"[leaderboard] {self.field} rebuild failed, serving old snapshot: {e}")
+            return
+        finally:
+            self._rebuild = None
+        self._rows = rows
+        self._keys = [-(row.get(self.field) or 0) for row in rows]
+        self._generation = generation
+        self._built_at = time.monotonic()
+        self.rebuilds += 1
+
+    def refresh(self) -> asyncio.Task:
+        """Start a rebuild unless one is already running; returns it."""
+        if self._rebuild is None:
+            self._rebuild = asyncio.get_running_loop().create_task(self._build())
+        return self._rebuild
+
+    # ---- reads ----
+    async def rows(self) -> list:
+        if self._rows is None:
+            await asyncio.shield(self.refresh())
+        elif self.is_stale():
+            self.refresh()  # serve the old snapshot meanwhile
+        return self._rows
+
+    async def page(self, page: int, per_page: int = LEADERBOARD_PAGE):
+        """
+        Return (rows, page, pages, offset) for a 0-based page, clamped to
+        the available range. `offset` is the global rank of rows[0] minus 1.
+        """
+        rows = await self.rows()
+        pages = max(1, -(-len(rows) // per_page))
+        page = min(max(page, 0), pages - 1)
+        offset = page * per_page
+        return rows[offset:offset + per_page], page, pages, offset
+
+    async def rank(self, value) -> int:
+        """
+        1-based rank for a score (ties share the best rank). Scores that
+        would make the snapshot are answered by bisect on it, so they agree
+        with the board players see; anything lower is one count on the
+        descending index — neither path scans or sorts the collection.
+        """
+        value = value or 0
+        rows = await self.rows()
+        if rows and (len(rows) < self.size or value >= -self._keys[-1]):
+            return bisect.bisect_left(self._keys, -value) + 1
+        above = await run_db(users.count_documents, {self.field: {"$gt": value}})
+        return above + 1
+
+    def stats(self) -> dict:
+        return {
+            "rows": len(self._rows or ()),
+            "age_s": round(self._age(), 1) if self._rows is not None else None,
+            "rebuilds": self.rebuilds,
+            "rebuilding": self._rebuild is not None,
+        }
+
+
+# -------------------------------------------------
+# BOARDS
+# -------------------------------------------------
+wealth_board = Leaderboard(
+    "wealth_bronze",
+    {"black_gold": 1, "platinum": 1, "gold": 1, "silver": 1, "bronze": 1},
+)
+
+messages_board = Leaderboard("messages", {})
+
+
+async def user_ranks(user: dict) -> dict:
+    """Wealth and message rank for a user doc from get_user()."""
+    wealth, messages = await asyncio.gather(
+        wealth_board.rank(user.get("wealth_bronze", 0)),
+        messages_board.rank(user.get("messages", 0)),
+    )
+    return {"wealth": wealth, "messages": messages}
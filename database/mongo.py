@@ -1,7 +1,16 @@
 # File: database/mongo.py
-from pymongo import MongoClient, errors
+from pymongo import MongoClient, ReturnDocument, UpdateOne, DESCENDING, errors
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+import asyncio
+import copy
+import functools
 import os
 import sys
+import threading
+import time
+
+from utils.coins import BRONZE_RATES, bronze_delta, total_bronze_value
 
 
 # -------------------------------------------------
@@ -10,6 +19,18 @@ import sys
 MONGO_URI = os.getenv("MONGO_URI")
 DB_NAME = os.getenv("DB_NAME", "GameUserBot")
 
+# Max concurrent Mongo round-trips (thread pool + driver pool size)
+MONGO_WORKERS = int(os.getenv("MONGO_WORKERS", 8))
+
+# In-process user document cache
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", 5000))
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", 120))
+
+# Write-behind buffer for high-frequency fields
+WRITE_BEHIND_MS = int(os.getenv("WRITE_BEHIND_MS", 2000))        # flush every N ms
+WRITE_BEHIND_OPS = int(os.getenv("WRITE_BEHIND_OPS", 500))       # ...or every M ops
+WRITE_BEHIND_MAX_USERS = int(os.getenv("WRITE_BEHIND_MAX_USERS", 10000))  # backpressure
+
 if not MONGO_URI:
     print("❌ MONGO_URI is missing in environment variables.")
     sys.exit(1)
@@ -23,7 +44,8 @@ try:
         MONGO_URI,
         tls=True,
         tlsAllowInvalidCertificates=True,
-        serverSelectionTimeoutMS=5000  # prevents long hang on bad URI
+        serverSelectionTimeoutMS=5000,  # prevents long hang on bad URI
+        maxPoolSize=MONGO_WORKERS,
     )
     client.admin.command("ping")  # force connection check immediately
     print("✅ MongoDB connected successfully.")
@@ -39,9 +61,176 @@ db = client[DB_NAME]
 users = db["users"]
 
 
+# -------------------------------------------------
+# ASYNC BRIDGE (pymongo is blocking → run it off the event loop)
+# -------------------------------------------------
+_executor = ThreadPoolExecutor(max_workers=MONGO_WORKERS, thread_name_prefix="mongo")
+
+
+async def run_db(fn, *args, **kwargs):
+    """
+    Run a blocking pymongo call on the bounded Mongo thread pool so a
+    slow query never freezes the Pyrogram event loop.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(fn, *args, **kwargs))
+
+
+# -------------------------------------------------
+# USER CACHE (LRU + TTL, write-through)
+# -------------------------------------------------
+def _set_path(doc: dict, path: str, value):
+    parts = path.split(".")
+    for part in parts[:-1]:
+        nxt = doc.get(part)
+        if not isinstance(nxt, dict):
+            nxt = {}
+            doc[part] = nxt
+        doc = nxt
+    doc[parts[-1]] = value
+
+
+def _get_path(doc: dict, path: str, default=None):
+    for part in path.split("."):
+        if not isinstance(doc, dict) or part not in doc:
+            return default
+        doc = doc[part]
+    return doc
+
+
+class UserCache:
+    """
+    Bounded LRU of user docs with a per-entry TTL.
+
+    Every write in this module pushes its result through here, so a
+    /spin → spin_ callback (or /shop → buy_item:) pair reads Mongo once.
+    Each key carries a write version: a read that raced a write is not
+    allowed to put its older copy back.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._docs = OrderedDict()   # user_id -> (expires_at, doc)
+        self._versions = {}          # user_id -> write counter
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, user_id: str):
+        with self._lock:
+            entry = self._docs.get(user_id)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._docs[user_id]
+                self.misses += 1
+                return None
+            self._docs.move_to_end(user_id)
+            self.hits += 1
+            return copy.deepcopy(entry[1])
+
+    def version(self, user_id: str) -> int:
+        with self._lock:
+            return self._versions.get(user_id, 0)
+
+    def fill(self, user_id: str, doc: dict, version: int):
+        """Store a doc fetched by a read, unless a write happened meanwhile."""
+        with self._lock:
+            if self._versions.get(user_id, 0) == version:
+                self._store(user_id, doc)
+
+    def put(self, user_id: str, doc: dict):
+        """Store the authoritative result of a write."""
+        with self._lock:
+            self._bump(user_id)
+            self._store(user_id, doc)
+
+    def apply(self, user_id: str, set_fields: dict = None, inc_fields: dict = None):
+        """Mirror a $set/$inc onto the cached copy (no-op if not cached)."""
+        with self._lock:
+            self._bump(user_id)
+            entry = self._docs.get(user_id)
+            if entry is None:
+                return
+            doc = entry[1]
+            for path, value in (set_fields or {}).items():
+                _set_path(doc, path, copy.deepcopy(value))
+            for path, value in (inc_fields or {}).items():
+                _set_path(doc, path, (_get_path(doc, path, 0) or 0) + value)
+
+    def invalidate(self, user_id: str = None):
+        with self._lock:
+            if user_id is None:
+                self._docs.clear()
+                self._versions.clear()
+            else:
+                self._bump(user_id)
+                self._docs.pop(user_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._docs),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits / total) if total else 0.0,
+            }
+
+    # ---- internal (lock held) ----
+    def _bump(self, user_id: str):
+        self._versions[user_id] = self._versions.get(user_id, 0) + 1
+        if len(self._versions) > self.max_size * 4:
+            # Versions only matter for keys with a read in flight
+            live = {k: self._versions[k] for k in self._docs if k in self._versions}
+            live[user_id] = self._versions[user_id]
+            self._versions = live
+
+    def _store(self, user_id: str, doc: dict):
+        self._docs[user_id] = (time.monotonic() + self.ttl, copy.deepcopy(doc))
+        self._docs.move_to_end(user_id)
+        while len(self._docs) > self.max_size:
+            self._docs.popitem(last=False)
+            self.evictions += 1
+
+
+user_cache = UserCache(USER_CACHE_SIZE, USER_CACHE_TTL)
+
+
+def cache_stats() -> dict:
+    """Hit/miss/eviction counters of the user cache."""
+    return user_cache.stats()
+
+
+# -------------------------------------------------
+# FIELD GENERATIONS (cheap "this field changed" signal)
+# -------------------------------------------------
+# Bumped after any write that changes a ranked field, so snapshot
+# builders (database/leaderboard.py) can skip rebuilds when nothing
+# moved. Bumped from executor threads; a racing bump can only be lost
+# when another one lands too, so the value still moves.
+_generations = {}
+
+
+def _touch_fields(*fields):
+    for field in fields:
+        _generations[field] = _generations.get(field, 0) + 1
+
+
+def field_generation(field: str) -> int:
+    return _generations.get(field, 0)
+
+
 # -------------------------------------------------
 # DEFAULT USER TEMPLATE (Single Source of Truth)
 # -------------------------------------------------
+# Bump SCHEMA_VERSION and add an entry to MIGRATIONS whenever the
+# stored document shape changes.
+SCHEMA_VERSION = 2
+
 DEFAULT_USER = {
     "black_gold": 0,
     "platinum": 0,
@@ -49,6 +238,10 @@ DEFAULT_USER = {
     "silver": 0,
     "bronze": 0,
 
+    # Denormalised total_bronze_value(); kept in step by the wallet ops
+    # below and indexed for the Top Wealth leaderboard
+    "wealth_bronze": 0,
+
     "messages": 0,
     "fight_wins": 0,
     "rob_success": 0,
@@ -70,76 +263,602 @@ DEFAULT_USER = {
 
     "daily_streak": 0,
     "last_daily": 0,
+
+    "schema_version": SCHEMA_VERSION,
 }
 
 
-# -------------------------------------------------
-# GET USER (Auto-Fix Old Structure)
-# -------------------------------------------------
-def get_user(user_id):
-    user_id = str(user_id)
-    user = users.find_one({"_id": user_id})
+def _defaults_on_insert(*touched) -> dict:
+    """
+    Defaults for $setOnInsert on upserts, minus any field (or parent of a
+    dotted path) already written by the same update — Mongo rejects
+    conflicting paths. The result is shared between calls: pass it to the
+    driver, never mutate it.
+    """
+    roots = frozenset(p.split(".", 1)[0] for fields in touched for p in fields)
+    return _insert_defaults(roots)
+
+
+@functools.lru_cache(maxsize=256)
+def _insert_defaults(skip: frozenset) -> dict:
+    # Only a handful of distinct field sets ever get written, so the
+    # template is filtered and copied once per set, not once per upsert
+    return {k: copy.deepcopy(v) for k, v in DEFAULT_USER.items() if k not in skip}
+
+
+def _new_user_doc(user_id: str, **extra) -> dict:
+    doc = {"_id": user_id}
+    doc.update(copy.deepcopy(DEFAULT_USER))
+    doc.update(extra)
+    return doc
 
-    # Create if not exists
-    if not user:
-        new_user = {"_id": user_id}
-        new_user.update(DEFAULT_USER)
-        users.insert_one(new_user)
-        return new_user
 
-    # Fix existing structure
-    updated_fields = {}
+# -------------------------------------------------
+# SCHEMA MIGRATIONS
+# -------------------------------------------------
+def _migrate_v1(user: dict) -> dict:
+    """Fill missing defaults and repair legacy shapes (pre-versioning docs)."""
+    changes = {}
     for key, default in DEFAULT_USER.items():
-        if key not in user:
-            updated_fields[key] = default
+        if key == "schema_version":
             continue
+        if key not in user:
+            changes[key] = copy.deepcopy(default)
 
-        # Patch old installs where last_daily was None
-        if key == "last_daily" and (user[key] is None):
-            updated_fields[key] = 0
-            continue
+    # Patch old installs where last_daily was None
+    if user.get("last_daily", 0) is None:
+        changes["last_daily"] = 0
 
-        # Deep fix: inventory
-        if key == "inventory":
-            inv = user.get("inventory", {})
-            if not isinstance(inv, dict):
-                inv = {"ores": {}, "items": []}
-            inv.setdefault("ores", {})
-            inv.setdefault("items", [])
-            updated_fields[key] = inv
+    # Deep fix: inventory
+    inv = user.get("inventory")
+    if "inventory" in user and (
+        not isinstance(inv, dict) or "ores" not in inv or "items" not in inv
+    ):
+        inv = dict(inv) if isinstance(inv, dict) else {}
+        inv.setdefault("ores", {})
+        inv.setdefault("items", [])
+        changes["inventory"] = inv
+
+    return changes
+
+
+def _migrate_v2(user: dict) -> dict:
+    """Backfill the materialised wealth_bronze field."""
+    return {"wealth_bronze": total_bronze_value(user)}
+
+
+# version -> migration that upgrades a doc from (version - 1)
+MIGRATIONS = {
+    1: _migrate_v1,
+    2: _migrate_v2,
+}
+
+
+def _pending_changes(user: dict) -> dict:
+    """
+    Return the $set needed to bring `user` up to SCHEMA_VERSION.
+    Empty dict when the doc is already current.
+    """
+    version = int(user.get("schema_version") or 0)
+    if version >= SCHEMA_VERSION:
+        return {}
+
+    working = dict(user)
+    changes = {}
+    for v in range(version + 1, SCHEMA_VERSION + 1):
+        step = MIGRATIONS[v](working)
+        working.update(step)
+        changes.update(step)
+    changes["schema_version"] = SCHEMA_VERSION
+    return changes
+
+
+def migrate_users(batch_size: int = 500) -> int:
+    """
+    One-time bulk upgrade of stored users to SCHEMA_VERSION.
+    Runs at startup before handlers are registered; returns docs upgraded.
+    """
+    outdated = {"$or": [
+        {"schema_version": {"$exists": False}},
+        {"schema_version": {"$lt": SCHEMA_VERSION}},
+    ]}
+
+    upgraded = 0
+    batch = []
+    for user in users.find(outdated).batch_size(batch_size):
+        changes = _pending_changes(user)
+        if not changes:
             continue
+        batch.append(UpdateOne({"_id": user["_id"]}, {"$set": changes}))
+        if len(batch) >= batch_size:
+            upgraded += users.bulk_write(batch, ordered=False).modified_count
+            batch = []
+
+    if batch:
+        upgraded += users.bulk_write(batch, ordered=False).modified_count
 
-        updated_fields[key] = user[key]
+    user_cache.invalidate()
+    return upgraded
 
-    # Save changes if any
-    if updated_fields != user:
-        users.update_one({"_id": user_id}, {"$set": updated_fields})
 
-    return updated_fields
+def ensure_indexes():
+    """Create the indexes the leaderboards sort on (no-op if present)."""
+    users.create_index([("wealth_bronze", DESCENDING)])
+    users.create_index([("messages", DESCENDING)])
 
 
 # -------------------------------------------------
-# CREATE USER IF NOT EXISTS
+# GET USER (single read, never writes an existing doc)
 # -------------------------------------------------
-def create_user_if_not_exists(user_id, name):
+def _get_user_sync(user_id, **new_fields):
     user_id = str(user_id)
+    version = user_cache.version(user_id)
     user = users.find_one({"_id": user_id})
 
-    if user:
-        return user
+    # Create if not exists (new_fields only go into a freshly created doc)
+    if not user:
+        new_user = _new_user_doc(user_id, **new_fields)
+        try:
+            users.insert_one(new_user)
+        except errors.DuplicateKeyError:
+            # Lost a create race with a concurrent handler
+            return _get_user_sync(user_id)
+        user_cache.put(user_id, new_user)
+        return new_user
+
+    # Docs written before migrate_users() ran are upgraded in memory only;
+    # the startup migration persists them.
+    changes = _pending_changes(user)
+    if changes:
+        user.update(changes)
+
+    user_cache.fill(user_id, user, version)
+    return user
+
 
-    new_user = {"_id": user_id, "name": name}
-    new_user.update(DEFAULT_USER)
-    users.insert_one(new_user)
-    return new_user
+async def _load_user(user_id, **new_fields):
+    # Cache hits are served on the loop without a thread hop
+    user_id = str(user_id)
+    user = user_cache.get(user_id)
+    if user is None:
+        user = await write_behind.fetch_settled(
+            user_id, lambda: run_db(_get_user_sync, user_id, **new_fields)
+        )
+    return write_behind.overlay(user_id, user)
+
+
+async def get_user(user_id):
+    return await _load_user(user_id)
+
+
+# -------------------------------------------------
+# CREATE USER IF NOT EXISTS
+# -------------------------------------------------
+# Same read path as get_user (cache, overlay of unflushed writes); the
+# name only goes into a doc this call creates.
+async def create_user_if_not_exists(user_id, name):
+    return await _load_user(user_id, name=name, name_at=int(time.time()))
 
 
 # -------------------------------------------------
 # UPDATE USER
 # -------------------------------------------------
-def update_user(user_id, data: dict):
+def _update_user_sync(user_id, data: dict):
+    # Callers often pass back the whole doc from get_user()
+    data = {k: v for k, v in data.items() if k not in ("_id", "wealth_bronze")}
     users.update_one(
         {"_id": str(user_id)},
-        {"$set": data},
+        {"$set": data, "$setOnInsert": _defaults_on_insert(data)},
         upsert=True
     )
+    user_cache.apply(str(user_id), set_fields=data)
+
+    # Absolute balance writes can't be expressed as a wealth delta, so
+    # recompute it from whatever the doc holds now. Wallet $incs landing
+    # in between are already relative, so the result is exact either way.
+    if any(k in BRONZE_RATES for k in data):
+        after = users.find_one_and_update(
+            {"_id": str(user_id)},
+            [{"$set": {"wealth_bronze": _WEALTH_EXPR}}],
+            return_document=ReturnDocument.AFTER,
+        )
+        if after is not None:
+            user_cache.put(str(user_id), after)
+        _touch_fields("wealth_bronze")
+
+
+async def update_user(user_id, data: dict):
+    await run_db(_update_user_sync, user_id, data)
+
+
+# -------------------------------------------------
+# WALLET (atomic balance changes, one round-trip each)
+# -------------------------------------------------
+# Every balance change is a single conditional $inc: the guard lives in
+# the filter, so concurrent commands can neither lose an update nor
+# overdraw. `update` carries extra operators ($set cooldowns, $inc
+# stats, $push items, ...) applied in the same write; `where` adds
+# extra filter conditions.
+CURRENCIES = ("black_gold", "platinum", "gold", "silver", "bronze")
+
+# Server-side total_bronze_value() for update pipelines
+_WEALTH_EXPR = {"$add": [
+    {"$multiply": [{"$ifNull": ["$" + c, 0]}, rate]}
+    for c, rate in BRONZE_RATES.items()
+]}
+
+
+def _merge_update(inc: dict, update: dict = None) -> dict:
+    merged = {k: dict(v) for k, v in (update or {}).items()}
+    for op, fields in merged.items():
+        if op != "$inc" and any(k in BRONZE_RATES for k in fields):
+            raise ValueError(f"balances can only change via $inc, got {op}")
+    merged.setdefault("$inc", {}).update(inc)
+
+    # Keep the leaderboard field in step with the same write
+    wealth = bronze_delta(merged["$inc"])
+    if wealth:
+        merged["$inc"]["wealth_bronze"] = wealth
+    return merged
+
+
+def _wallet_update_sync(user_id, inc: dict, guard: dict = None,
+                        update: dict = None, where: dict = None):
+    user_id = str(user_id)
+    flt = {"_id": user_id}
+    flt.update(where or {})
+    for field, minimum in (guard or {}).items():
+        flt[field] = {"$gte": minimum}
+
+    doc = _merge_update(inc, update)
+
+    # Upsert only when unguarded: a failed guard must not insert a duplicate
+    upsert = not guard and not where
+    if upsert:
+        touched = [k for op, fields in doc.items() for k in fields]
+        doc["$setOnInsert"] = _defaults_on_insert(touched)
+
+    updated = users.find_one_and_update(
+        flt, doc, upsert=upsert, return_document=ReturnDocument.AFTER
+    )
+    if updated is not None:
+        user_cache.put(user_id, updated)
+        if "wealth_bronze" in doc["$inc"]:
+            _touch_fields("wealth_bronze")
+    return updated
+
+
+def _debit_up_to_sync(user_id, amount: int, currency: str, update: dict = None) -> int:
+    """
+    Subtract up to `amount`, clamping at zero, via an update pipeline.
+    Returns how much was actually taken.
+    """
+    def cur(field):
+        return {"$ifNull": ["$" + field, 0]}
+
+    remaining = {"$max": [0, {"$subtract": [cur(currency), amount]}]}
+    stage = {currency: remaining}
+    rate = BRONZE_RATES.get(currency, 0)
+    if rate:
+        # wealth += rate * (remaining - balance), i.e. minus what was taken
+        stage["wealth_bronze"] = {"$add": [
+            cur("wealth_bronze"),
+            {"$multiply": [rate, {"$subtract": [remaining, cur(currency)]}]},
+        ]}
+    for op, fields in (update or {}).items():
+        for field, value in fields.items():
+            if field in stage or field in BRONZE_RATES:
+                raise ValueError(f"debit_up_to can't also update {field}")
+            if op == "$inc":
+                stage[field] = {"$add": [cur(field), value]}
+            elif op == "$set":
+                stage[field] = {"$literal": value}
+            else:
+                raise ValueError(f"debit_up_to supports $inc/$set only, got {op}")
+
+    user_id = str(user_id)
+    before = users.find_one_and_update(
+        {"_id": user_id},
+        [{"$set": stage}],
+        return_document=ReturnDocument.BEFORE,
+    )
+    if not before:
+        # Nothing to take from, but the caller's update still lands (and
+        # creates the user, like credit() does)
+        update = {op: fields for op, fields in (update or {}).items() if fields}
+        if update:
+            touched = [k for fields in update.values() for k in fields]
+            after = users.find_one_and_update(
+                {"_id": user_id},
+                {**update, "$setOnInsert": _defaults_on_insert(touched)},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+            user_cache.put(user_id, after)
+        return 0
+    taken = min(max(int(before.get(currency, 0) or 0), 0), amount)
+
+    # Rebuild the post-image locally for the cache
+    after = before
+    balance = int(before.get(currency, 0) or 0)
+    after[currency] = max(0, balance - amount)
+    if rate:
+        after["wealth_bronze"] = int(before.get("wealth_bronze", 0) or 0) + rate * (after[currency] - balance)
+    for field, value in (update or {}).get("$inc", {}).items():
+        _set_path(after, field, (_get_path(after, field, 0) or 0) + value)
+    for field, value in (update or {}).get("$set", {}).items():
+        _set_path(after, field, value)
+    user_cache.put(user_id, after)
+    if rate and taken:
+        _touch_fields("wealth_bronze")
+
+    return taken
+
+
+async def credit(user_id, amount: int, currency: str = "bronze", *,
+                 update: dict = None, where: dict = None):
+    """Add coins. Returns the updated doc (None only if `where` didn't match)."""
+    return await run_db(
+        _wallet_update_sync, user_id, {currency: amount}, update=update, where=where
+    )
+
+
+async def debit_if_sufficient(user_id, amount: int, currency: str = "bronze", *,
+                              update: dict = None, where: dict = None):
+    """Subtract coins only if the balance covers it. Returns updated doc or None."""
+    return await run_db(
+        _wallet_update_sync, user_id, {currency: -amount},
+        guard={currency: amount}, update=update, where=where,
+    )
+
+
+async def debit_up_to(user_id, amount: int, currency: str = "bronze", *,
+                      update: dict = None) -> int:
+    """Subtract coins without going below zero. Returns amount taken."""
+    return await run_db(_debit_up_to_sync, user_id, amount, currency, update)
+
+
+async def settle_wager(user_id, stake: int, payout: int, currency: str = "bronze", *,
+                       update: dict = None):
+    """
+    Settle a stake-and-payout bet in one write: requires `stake` on hand,
+    then applies (payout - stake). Returns updated doc or None.
+    """
+    return await run_db(
+        _wallet_update_sync, user_id, {currency: payout - stake},
+        guard={currency: stake}, update=update,
+    )
+
+
+async def exchange(user_id, src: str, src_amount: int, dst: str, dst_amount: int):
+    """Swap one currency for another atomically (convert). Returns doc or None."""
+    return await run_db(
+        _wallet_update_sync, user_id, {src: -src_amount, dst: dst_amount},
+        guard={src: src_amount},
+    )
+
+
+async def transfer(from_id, to_id, amount: int, currency: str = "bronze"):
+    """
+    Move coins between users. The debit is guarded; the credit follows.
+    Returns the sender's updated doc, or None if they couldn't cover it.
+    """
+    sender = await debit_if_sufficient(from_id, amount, currency)
+    if sender is None:
+        return None
+    try:
+        await credit(to_id, amount, currency)
+    except Exception:
+        await credit(from_id, amount, currency)  # give it back
+        raise
+    return sender
+
+
+async def transfer_up_to(from_id, to_id, amount: int, currency: str = "bronze", *,
+                         from_update: dict = None, to_update: dict = None) -> int:
+    """
+    Take up to `amount` from one user (clamped at zero) and give exactly
+    what was taken to another. Extra updates are applied on both sides
+    even when nothing could be taken. Returns amount moved.
+    """
+    taken = await debit_up_to(from_id, amount, currency, update=from_update)
+    await credit(to_id, taken, currency, update=to_update)
+    return taken
+
+
+# -------------------------------------------------
+# WRITE-BEHIND BUFFER (coalesced counters / timestamps)
+# -------------------------------------------------
+# For fields that change often and can land a moment late (messages,
+# last_mine, ore counts, standalone cooldown stamps). Ops are merged
+# per user and written with one bulk_write every WRITE_BEHIND_MS or
+# WRITE_BEHIND_OPS ops. get_user overlays anything not yet flushed, so
+# reads always see their own writes. Never use it for balances — those
+# need the guarded wallet ops above.
+def _merge_ops(into: dict, inc: dict = None, set_fields: dict = None):
+    inc, set_fields = inc or {}, set_fields or {}
+    both = inc.keys() & set_fields.keys()
+    if both:
+        # Ambiguous within one op: which comes first? Refuse instead of guessing
+        raise ValueError(f"write-behind op both sets and increments {sorted(both)}")
+    for path, value in set_fields.items():
+        into["$inc"].pop(path, None)
+        into["$set"][path] = value
+    for path, n in inc.items():
+        if path in into["$set"]:
+            into["$set"][path] = (into["$set"][path] or 0) + n
+        else:
+            into["$inc"][path] = into["$inc"].get(path, 0) + n
+
+
+class WriteBehindBuffer:
+    def __init__(self, interval_ms: int, max_ops: int, max_users: int):
+        self.interval = interval_ms / 1000
+        self.max_ops = max_ops
+        self.max_users = max_users
+        self._pending = {}     # user_id -> {"$inc": {...}, "$set": {...}}
+        self._inflight = {}    # batch currently being written
+        self._counts = {}      # user_id -> ops merged into _pending[user_id]
+        self._ops = 0          # sum of _counts
+        self._generation = 0   # bumped whenever a batch goes in flight
+        self._kick = None
+        self._task = None
+        self._flush_lock = None
+        self.flushes = 0
+        self.ops_written = 0
+
+    # ---- enqueue (event loop only) ----
+    def add(self, user_id, inc: dict = None, set_fields: dict = None) -> bool:
+        """
+        Merge ops for a user without awaiting. Returns False when the
+        buffer is over capacity and the caller should `await flush()`.
+        """
+        user_id = str(user_id)
+        entry = self._pending.get(user_id)
+        if entry is None:
+            entry = self._pending[user_id] = {"$inc": {}, "$set": {}}
+        _merge_ops(entry, inc, set_fields)
+
+        self._counts[user_id] = self._counts.get(user_id, 0) + 1
+        self._ops += 1
+        if self._task is None:
+            self._start()
+        if self._ops >= self.max_ops:
+            self._kick.set()
+        return len(self._pending) < self.max_users
+
+    async def write(self, user_id, inc: dict = None, set_fields: dict = None):
+        if not self.add(user_id, inc, set_fields):
+            await self.flush()  # backpressure: caller waits for the drain
+
+    def _unwritten(self, user_id: str):
+        """In-flight ops with newer pending ones merged on top (as a failed flush puts them back)."""
+        older, newer = self._inflight.get(user_id), self._pending.get(user_id)
+        if not older:
+            return newer
+        merged = {"$inc": dict(older["$inc"]), "$set": dict(older["$set"])}
+        if newer:
+            _merge_ops(merged, newer["$inc"], newer["$set"])
+        return merged
+
+    def overlay(self, user_id: str, doc: dict) -> dict:
+        """Apply not-yet-persisted ops for this user onto a fetched doc."""
+        entry = self._unwritten(user_id)
+        if entry:
+            for path, value in entry["$set"].items():
+                _set_path(doc, path, copy.deepcopy(value))
+            for path, n in entry["$inc"].items():
+                _set_path(doc, path, (_get_path(doc, path, 0) or 0) + n)
+        return doc
+
+    async def fetch_settled(self, user_id: str, fetch):
+        """
+        Await fetch() for a doc that overlay() can be applied to: if a
+        flush went in flight while it ran, the doc may or may not hold
+        that batch, so wait for the flush to finish and read again.
+        """
+        while True:
+            generation, busy = self._generation, user_id in self._inflight
+            doc = await fetch()
+            if not busy and generation == self._generation:
+                return doc
+            async with self._flush_lock:
+                pass
+
+    # ---- flushing ----
+    def _start(self):
+        self._kick = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._kick.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._kick.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"[write-behind] flush failed, will retry: {e}")
+
+    async def flush(self, user_id=None):
+        """Write buffered ops (all users, or just one) in a single bulk_write."""
+        if self._flush_lock is None:
+            return
+        async with self._flush_lock:
+            if user_id is None:
+                batch, self._pending = self._pending, {}
+                counts, self._counts, self._ops = self._counts, {}, 0
+            else:
+                user_id = str(user_id)
+                entry = self._pending.pop(user_id, None)
+                batch = {user_id: entry} if entry else {}
+                counts = {user_id: self._counts.pop(user_id, 0)}
+                self._ops -= counts[user_id]
+            if not batch:
+                return
+
+            self._inflight = batch
+            self._generation += 1
+            requests = []
+            for uid, entry in batch.items():
+                update = {k: v for k, v in entry.items() if v}
+                update["$setOnInsert"] = _defaults_on_insert(entry["$inc"], entry["$set"])
+                requests.append(UpdateOne({"_id": uid}, update, upsert=True))
+
+            try:
+                await run_db(users.bulk_write, requests, ordered=False)
+            except Exception:
+                # Put the batch back underneath anything queued since
+                for uid in batch:
+                    self._pending[uid] = self._unwritten(uid)
+                    self._counts[uid] = self._counts.get(uid, 0) + counts.get(uid, 0)
+                    self._ops += counts.get(uid, 0)
+                raise
+            finally:
+                self._inflight = {}
+
+            touched = set()
+            for uid, entry in batch.items():
+                user_cache.apply(uid, set_fields=entry["$set"], inc_fields=entry["$inc"])
+                touched.update(entry["$inc"])
+                touched.update(entry["$set"])
+            _touch_fields(*touched)
+            self.flushes += 1
+            self.ops_written += len(requests)
+
+    async def close(self):
+        """Flush-on-shutdown: stop the timer and persist everything left."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "pending_users": len(self._pending),
+            "pending_ops": self._ops,
+            "flushes": self.flushes,
+            "updates_written": self.ops_written,
+        }
+
+
+write_behind = WriteBehindBuffer(WRITE_BEHIND_MS, WRITE_BEHIND_OPS, WRITE_BEHIND_MAX_USERS)
+
+
+async def buffer_write(user_id, inc: dict = None, set_fields: dict = None):
+    """
+    Queue $inc / $set ops for the next bulk flush:
+        await buffer_write(uid, inc={"messages": 1}, set_fields={"last_mine": now})
+    """
+    await write_behind.write(user_id, inc, set_fields)
+
+
+async def flush_pending(user_id=None):
+    """Persist buffered writes now (one user, or everyone)."""
+    await write_behind.flush(user_id)
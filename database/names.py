@@ -0,0 +1,121 @@
+# File: database/names.py
+from database.mongo import buffer_write
+import os
+import time
+
+
+# -------------------------------------------------
+# SETTINGS
+# -------------------------------------------------
+NAME_TTL = float(os.getenv("NAME_TTL", 86400))          # refetch names older than this
+NAME_CACHE_SIZE = int(os.getenv("NAME_CACHE_SIZE", 50000))
+NAME_RETRY_AFTER = 60  # seconds to back off after a failed get_users (FloodWait)
+
+
+# -------------------------------------------------
+# DISPLAY-NAME CACHE
+# -------------------------------------------------
+# user_id -> (first_name, seen_at). Filled for free from incoming
+# messages and from stored docs (`name` / `name_at`, written by
+# create_user_if_not_exists and by remember()), so leaderboards almost
+# never ask Telegram. Whatever is missing or older than NAME_TTL is
+# fetched with ONE get_users([...]) call per render.
+class NameCache:
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._names = {}
+        self._retry_at = 0.0
+        self.hits = 0
+        self.fetched = 0
+        self.api_calls = 0
+
+    def _fresh(self, entry) -> bool:
+        return entry is not None and time.time() - entry[1] < self.ttl
+
+    def _store(self, uid: str, name: str, seen_at: float):
+        if len(self._names) >= self.max_size and uid not in self._names:
+            self._names.pop(next(iter(self._names)))  # oldest insert goes
+        self._names[uid] = (name, seen_at)
+
+    async def remember(self, user_id, name: str) -> bool:
+        """
+        Note a name seen on an update. Persists it (write-behind) only when
+        it changed or the stored copy is due for refresh; returns whether
+        it did.
+        """
+        if not name:
+            return False
+        uid = str(user_id)
+        entry = self._names.get(uid)
+        now = time.time()
+        if entry is not None and entry[0] == name and now - entry[1] < self.ttl / 2:
+            return False
+        self._store(uid, name, now)
+        await self.write(uid, name, now)
+        return True
+
+    async def write(self, uid: str, name: str, seen_at: float):
+        # Into the write-behind buffer; only waits for a drain when it's full
+        await buffer_write(uid, set_fields={"name": name, "name_at": int(seen_at)})
+
+    def prime(self, docs):
+        """Seed from stored docs that carry `name` / `name_at` (e.g. leaderboard rows)."""
+        for doc in docs:
+            name = doc.get("name")
+            if not name:
+                continue
+            uid = str(doc["_id"])
+            seen_at = float(doc.get("name_at") or 0)
+            entry = self._names.get(uid)
+            if entry is None or entry[1] < seen_at:
+                self._store(uid, name, seen_at)
+
+    async def resolve(self, client, user_ids) -> dict:
+        """
+        Map user ids to display names with at most one Telegram call.
+        Stale names are still used if the batch fetch fails (FloodWait etc.).
+        """
+        uids = [str(u) for u in user_ids]
+        out, missing = {}, []
+        for uid in uids:
+            entry = self._names.get(uid)
+            if self._fresh(entry):
+                out[uid] = entry[0]
+                self.hits += 1
+            else:
+                missing.append(uid)
+
+        if missing and time.time() >= self._retry_at:
+            self.api_calls += 1
+            try:
+                fetched = await client.get_users([int(u) for u in missing])
+                if not isinstance(fetched, list):
+                    fetched = [fetched]
+            except Exception as e:
+                print(f"[names] get_users failed for {len(missing)} id(s): {e}")
+                self._retry_at = time.time() + NAME_RETRY_AFTER
+                fetched = []
+            now = time.time()
+            for user in fetched:
+                if user and user.first_name:
+                    uid = str(user.id)
+                    self._store(uid, user.first_name, now)
+                    await self.write(uid, user.first_name, now)
+                    self.fetched += 1
+
+        for uid in missing:
+            entry = self._names.get(uid)
+            out[uid] = entry[0] if entry else f"User {uid}"
+        return out
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._names),
+            "hits": self.hits,
+            "fetched": self.fetched,
+            "api_calls": self.api_calls,
+        }
+
+
+name_cache = NameCache(NAME_TTL, NAME_CACHE_SIZE)
@@ -1,17 +1,18 @@
-from pyrogram import Client, filters
-from database.mongo import get_user, update_user
+from pyrogram import Client
+from database.mongo import get_user, settle_wager
 import random
 import time
+from utils.commands import commands
 
 BET_COOLDOWN = 7   # seconds
 MIN_BET = 1        # minimum amount to bet
 
 def init_bet(bot: Client):
 
-    @bot.on_message(filters.command("bet"))
+    @commands.command("bet")
     async def bet_cmd(_, msg):
         user_id = msg.from_user.id
-        user = get_user(user_id)
+        user = await get_user(user_id)
 
         args = msg.text.split()
         if len(args) < 2:
@@ -52,13 +53,17 @@ def init_bet(bot: Client):
         win = random.choice([True, False])
 
         if win:
-            new_coins = coins + amount
+            payout = amount * 2
             result = f"🎉 You won! You gained +{amount} bronze coins!"
         else:
-            new_coins = coins - amount
+            payout = 0
             result = f"😢 You lost -{amount} bronze coins."
 
-        update_user(user_id, {"bronze": new_coins, "last_bet": now})
+        # stake check + payout in one atomic write
+        updated = await settle_wager(user_id, amount, payout, update={"$set": {"last_bet": now}})
+        if not updated:
+            return await msg.reply("❌ Your balance changed, bet cancelled. Try again.", quote=True)
+        new_coins = updated.get("bronze", 0)
 
         await msg.reply(
             f"🎲 Bet Result\n\n{result}\n\n💼 New Balance: {new_coins} bronze coins",
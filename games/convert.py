@@ -1,6 +1,9 @@
-from pyrogram import Client, filters
+from pyrogram import Client
 from pyrogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
-from database.mongo import get_user, update_user
+from database.mongo import get_user, exchange
+from utils.commands import active, commands
+from utils.router import router
+from utils.state import ExpiringDict
 import re
 
 # Conversion rates (upgrade side)
@@ -11,8 +14,27 @@ GOLD_TO_PLATINUM = 100
 # Downgrade rate: 1 higher tier -> 100 lower tier
 DOWNGRADE_RATE = 100
 
-# In-memory state for "enter amount" flow
-pending_amount = {}
+# Pair code (as used in button data) -> (src, dst, rate, icon)
+PAIRS = {
+    "up": {
+        "bs": ("bronze", "silver", BRONZE_TO_SILVER, "🥉 → 🥈"),
+        "sg": ("silver", "gold", SILVER_TO_GOLD, "🥈 → 🥇"),
+        "gp": ("gold", "platinum", GOLD_TO_PLATINUM, "🥇 → 🏅"),
+    },
+    "down": {
+        "pg": ("platinum", "gold", DOWNGRADE_RATE, "🏅 → 🥇"),
+        "gs": ("gold", "silver", DOWNGRADE_RATE, "🥇 → 🥈"),
+        "sb": ("silver", "bronze", DOWNGRADE_RATE, "🥈 → 🥉"),
+    },
+}
+
+# In-memory state for "enter amount" flow (forgotten after 10 idle minutes)
+pending_amount = ExpiringDict("convert_pending", ttl=600, max_size=5000)
+
+
+def clear_pending(user_id: int):
+    pending_amount.pop(user_id, None)
+    active.discard("convert", user=user_id)
 
 
 def init_convert(bot: Client):
@@ -20,29 +42,29 @@ def init_convert(bot: Client):
     # ---------------------- Root keyboard builders ----------------------
     def root_keyboard():
         return InlineKeyboardMarkup([
-            [InlineKeyboardButton("⭡ Upgrade", callback_data="conv_mode_up")],
-            [InlineKeyboardButton("⭣ Downgrade", callback_data="conv_mode_down")],
-            [InlineKeyboardButton("🔙 Back", callback_data="start_menu")]
+            [InlineKeyboardButton("⭡ Upgrade", callback_data="conv:mode:up")],
+            [InlineKeyboardButton("⭣ Downgrade", callback_data="conv:mode:down")],
+            [InlineKeyboardButton("🔙 Back", callback_data="home:show")]
         ])
 
     def upgrade_list_keyboard():
         return InlineKeyboardMarkup([
-            [InlineKeyboardButton("🥉 Bronze → 🥈 Silver", callback_data="conv_up_bs")],
-            [InlineKeyboardButton("🥈 Silver → 🥇 Gold", callback_data="conv_up_sg")],
-            [InlineKeyboardButton("🥇 Gold → 🏅 Platinum", callback_data="conv_up_gp")],
-            [InlineKeyboardButton("🔙 Back", callback_data="go_convert_menu")]
+            [InlineKeyboardButton("🥉 Bronze → 🥈 Silver", callback_data="conv:up:bs")],
+            [InlineKeyboardButton("🥈 Silver → 🥇 Gold", callback_data="conv:up:sg")],
+            [InlineKeyboardButton("🥇 Gold → 🏅 Platinum", callback_data="conv:up:gp")],
+            [InlineKeyboardButton("🔙 Back", callback_data="conv:menu")]
         ])
 
     def downgrade_list_keyboard():
         return InlineKeyboardMarkup([
-            [InlineKeyboardButton("🏅 Platinum → 🥇 Gold", callback_data="conv_down_pg")],
-            [InlineKeyboardButton("🥇 Gold → 🥈 Silver", callback_data="conv_down_gs")],
-            [InlineKeyboardButton("🥈 Silver → 🥉 Bronze", callback_data="conv_down_sb")],
-            [InlineKeyboardButton("🔙 Back", callback_data="go_convert_menu")]
+            [InlineKeyboardButton("🏅 Platinum → 🥇 Gold", callback_data="conv:down:pg")],
+            [InlineKeyboardButton("🥇 Gold → 🥈 Silver", callback_data="conv:down:gs")],
+            [InlineKeyboardButton("🥈 Silver → 🥉 Bronze", callback_data="conv:down:sb")],
+            [InlineKeyboardButton("🔙 Back", callback_data="conv:menu")]
         ])
 
     # ---------------------- /convert ----------------------
-    @bot.on_message(filters.command("convert"))
+    @commands.command("convert")
     async def convert_cmd(_, msg: Message):
         await msg.reply(
             "💰 **Convert Your Coins**\n\nChoose a mode:",
@@ -50,9 +72,9 @@ def init_convert(bot: Client):
         )
 
     # ---------------------- Main convert menu (callback) ----------------------
-    @bot.on_callback_query(filters.regex("^go_convert_menu$"))
+    @router.route("conv", "menu")
     async def go_convert_menu_cb(client, cq: CallbackQuery):
-        pending_amount.pop(cq.from_user.id, None)
+        clear_pending(cq.from_user.id)
         await cq.message.edit_text(
             "💰 **Convert Your Coins**\n\nChoose a mode:",
             reply_markup=root_keyboard()
@@ -60,10 +82,10 @@ def init_convert(bot: Client):
         await cq.answer()
 
     # ---------------------- Mode selection: Upgrade / Downgrade ----------------------
-    @bot.on_callback_query(filters.regex("^conv_mode_"))
+    @router.route("conv", "mode")
     async def conv_mode_cb(client, cq: CallbackQuery):
-        pending_amount.pop(cq.from_user.id, None)
-        if cq.data == "conv_mode_up":
+        clear_pending(cq.from_user.id)
+        if cq.args == "up":
             await cq.message.edit_text(
                 "💹 **Upgrade Coins**\n\nChoose which coins to upgrade:",
                 reply_markup=upgrade_list_keyboard()
@@ -76,25 +98,21 @@ def init_convert(bot: Client):
         await cq.answer()
 
     # ---------------------- Upgrade pair selection ----------------------
-    @bot.on_callback_query(filters.regex("^conv_up_"))
+    @router.route("conv", "up")
     async def conv_up_pair_cb(client, cq: CallbackQuery):
+        if cq.args not in PAIRS["up"]:
+            return await cq.answer()
         user_id = cq.from_user.id
-        pending_amount.pop(user_id, None)
-        data = get_user(user_id)
-
-        if cq.data == "conv_up_bs":
-            src, dst, rate, icon = "bronze", "silver", BRONZE_TO_SILVER, "🥉 → 🥈"
-        elif cq.data == "conv_up_sg":
-            src, dst, rate, icon = "silver", "gold", SILVER_TO_GOLD, "🥈 → 🥇"
-        else:
-            src, dst, rate, icon = "gold", "platinum", GOLD_TO_PLATINUM, "🥇 → 🏅"
+        clear_pending(user_id)
+        data = await get_user(user_id)
 
+        src, dst, rate, icon = PAIRS["up"][cq.args]
         cur = data[src]
 
         keyboard = InlineKeyboardMarkup([
-            [InlineKeyboardButton("⌨️ Convert by Amount", callback_data=f"camt|up|{src}|{dst}|{rate}|{cq.data}")],
-            [InlineKeyboardButton("⚡ Convert Max", callback_data=f"cmax|up|{src}|{dst}|{rate}|{cq.data}")],
-            [InlineKeyboardButton("🔙 Back", callback_data="conv_mode_up")]
+            [InlineKeyboardButton("⌨️ Convert by Amount", callback_data=f"conv:amt:up:{cq.args}")],
+            [InlineKeyboardButton("⚡ Convert Max", callback_data=f"conv:max:up:{cq.args}")],
+            [InlineKeyboardButton("🔙 Back", callback_data="conv:mode:up")]
         ])
 
         await cq.message.edit_text(
@@ -105,26 +123,21 @@ def init_convert(bot: Client):
         await cq.answer()
 
     # ---------------------- Downgrade pair selection ----------------------
-    @bot.on_callback_query(filters.regex("^conv_down_"))
+    @router.route("conv", "down")
     async def conv_down_pair_cb(client, cq: CallbackQuery):
+        if cq.args not in PAIRS["down"]:
+            return await cq.answer()
         user_id = cq.from_user.id
-        pending_amount.pop(user_id, None)
-        data = get_user(user_id)
-
-        if cq.data == "conv_down_pg":
-            src, dst, icon = "platinum", "gold", "🏅 → 🥇"
-        elif cq.data == "conv_down_gs":
-            src, dst, icon = "gold", "silver", "🥇 → 🥈"
-        else:
-            src, dst, icon = "silver", "bronze", "🥈 → 🥉"
+        clear_pending(user_id)
+        data = await get_user(user_id)
 
-        rate = DOWNGRADE_RATE
+        src, dst, rate, icon = PAIRS["down"][cq.args]
         cur = data[src]
 
         keyboard = InlineKeyboardMarkup([
-            [InlineKeyboardButton("⌨️ Convert by Amount", callback_data=f"camt|down|{src}|{dst}|{rate}|{cq.data}")],
-            [InlineKeyboardButton("⚡ Convert Max", callback_data=f"cmax|down|{src}|{dst}|{rate}|{cq.data}")],
-            [InlineKeyboardButton("🔙 Back", callback_data="conv_mode_down")]
+            [InlineKeyboardButton("⌨️ Convert by Amount", callback_data=f"conv:amt:down:{cq.args}")],
+            [InlineKeyboardButton("⚡ Convert Max", callback_data=f"conv:max:down:{cq.args}")],
+            [InlineKeyboardButton("🔙 Back", callback_data="conv:mode:down")]
         ])
 
         await cq.message.edit_text(
@@ -135,49 +148,54 @@ def init_convert(bot: Client):
         await cq.answer()
 
     # ---------------------- Convert Max ----------------------
-    @bot.on_callback_query(filters.regex("^cmax"))
+    @router.route("conv", "max")
     async def convert_max_cb(client, cq: CallbackQuery):
-        _, mode, src, dst, rate, ctype = cq.data.split("|")
-        rate = int(rate)
+        mode, _, pair = cq.args.partition(":")
+        if pair not in PAIRS.get(mode, ()):
+            return await cq.answer()
+        src, dst, rate, _ = PAIRS[mode][pair]
+        ctype = f"conv:{mode}:{pair}"
         user_id = cq.from_user.id
 
-        data = get_user(user_id)
+        data = await get_user(user_id)
 
         if mode == "up":
             src_balance = data[src]
             if src_balance < rate:
                 return await cq.answer("Nothing to convert.", show_alert=True)
             gained = src_balance // rate
-            data[src] -= gained * rate
-            data[dst] += gained
+            spent = gained * rate
         else:
             src_balance = data[src]
             if src_balance <= 0:
                 return await cq.answer("Nothing to convert.", show_alert=True)
             gained = src_balance * rate
-            data[src] = 0
-            data[dst] += gained
+            spent = src_balance
 
-        update_user(user_id, data)
+        if not await exchange(user_id, src, spent, dst, gained):
+            return await cq.answer("Your balance changed, try again.", show_alert=True)
 
         await cq.message.edit_text(
             "💰 **Converted successfully!**\n\nFull conversion completed.",
             reply_markup=InlineKeyboardMarkup([
                 [InlineKeyboardButton("🔁 Convert Again", callback_data=ctype)],
-                [InlineKeyboardButton("🔙 Main Conversion Menu", callback_data="go_convert_menu")]
+                [InlineKeyboardButton("🔙 Main Conversion Menu", callback_data="conv:menu")]
             ])
         )
         await cq.answer()
 
     # ---------------------- Convert by Amount Start ----------------------
-    @bot.on_callback_query(filters.regex("^camt"))
+    @router.route("conv", "amt")
     async def convert_amount_start(client, cq: CallbackQuery):
-        _, mode, src, dst, rate, ctype = cq.data.split("|")
+        mode, _, pair = cq.args.partition(":")
+        if pair not in PAIRS.get(mode, ()):
+            return await cq.answer()
+        src, dst, rate, _ = PAIRS[mode][pair]
+        ctype = f"conv:{mode}:{pair}"
         user_id = cq.from_user.id
-        rate = int(rate)
 
         keyboard = InlineKeyboardMarkup(
-            [[InlineKeyboardButton("🔙 Main Conversion Menu", callback_data="go_convert_menu")]]
+            [[InlineKeyboardButton("🔙 Main Conversion Menu", callback_data="conv:menu")]]
         )
         sent = await cq.message.edit_text(
             "⌨️ **Enter Amount**\n\nSend the number of coins you want to convert.\n"
@@ -195,20 +213,15 @@ def init_convert(bot: Client):
             "message_id": sent.id,
             "keyboard": keyboard,
         }
+        active.add("convert", user=user_id)  # their next plain text is the amount
         await cq.answer()
 
-    # ---------------------- custom filter: user expecting amount input ----------------------
-    def expecting_amount_filter(_, __, msg: Message) -> bool:
-        return bool(msg.from_user and msg.from_user.id in pending_amount)
-
-    expecting_amount = filters.create(expecting_amount_filter)
-
     # ---------------------- Convert by Amount Handler ----------------------
-    # group=2 so it runs AFTER quiz answer handler (group=1)
-    @bot.on_message(filters.text & ~filters.command("convert") & expecting_amount, group=2)
+    # order=2 so it runs AFTER the quiz answer handler (order=1)
+    @commands.text("convert", order=2)
     async def handle_amount_input(client, msg: Message):
         user = msg.from_user
-        state = pending_amount.get(user.id)
+        state = pending_amount.get(user.id) if user else None
         if not state:
             return
 
@@ -230,7 +243,7 @@ def init_convert(bot: Client):
                 reply_markup=state["keyboard"],
             )
 
-        data = get_user(user.id)
+        data = await get_user(user.id)
         src, dst, mode, rate = state["src"], state["dst"], state["mode"], state["rate"]
 
         if mode == "up":
@@ -242,8 +255,7 @@ def init_convert(bot: Client):
                     f"❌ Not enough {src}. Requires {needed}, but you have {data[src]}.",
                     reply_markup=state["keyboard"],
                 )
-            data[src] -= needed
-            data[dst] += amount
+            spent, gained = needed, amount
         else:
             if data[src] < amount:
                 return await client.edit_message_text(
@@ -252,12 +264,16 @@ def init_convert(bot: Client):
                     f"❌ Not enough {src}. You tried {amount}, but you have {data[src]}.",
                     reply_markup=state["keyboard"],
                 )
-            gained = amount * rate
-            data[src] -= amount
-            data[dst] += gained
+            spent, gained = amount, amount * rate
 
-        update_user(user.id, data)
-        pending_amount.pop(user.id, None)
+        if not await exchange(user.id, src, spent, dst, gained):
+            return await client.edit_message_text(
+                state["chat_id"],
+                state["message_id"],
+                f"❌ Not enough {src}. Your balance changed, try again.",
+                reply_markup=state["keyboard"],
+            )
+        clear_pending(user.id)
 
         await client.edit_message_text(
             state["chat_id"],
@@ -265,6 +281,6 @@ def init_convert(bot: Client):
             "💰 **Converted successfully!**\n\nTransaction complete.",
             reply_markup=InlineKeyboardMarkup([
                 [InlineKeyboardButton("🔁 Convert Again", callback_data=state["ctype"])],
-                [InlineKeyboardButton("🔙 Main Conversion Menu", callback_data="go_convert_menu")]
+                [InlineKeyboardButton("🔙 Main Conversion Menu", callback_data="conv:menu")]
             ]),
         )
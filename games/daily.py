@@ -1,11 +1,12 @@
 # File: GameBot/games/daily.py
 
-from pyrogram import Client, filters
+from pyrogram import Client
 from pyrogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton
 import random
 import time
 
-from database.mongo import get_user, update_user
+from database.mongo import get_user, credit
+from utils.commands import commands
 
 DAILY_COOLDOWN = 24 * 60 * 60
 DAILY_MIN = 120
@@ -13,7 +14,7 @@ DAILY_MAX = 350
 
 
 async def daily_reward(uid: int, msg: Message):
-    user = get_user(uid)
+    user = await get_user(uid)
     if not user:
         return await msg.reply("⚠️ No profile found. Use /start first.")
 
@@ -29,10 +30,17 @@ async def daily_reward(uid: int, msg: Message):
 
     reward = random.randint(DAILY_MIN, DAILY_MAX)
 
-    update_user(uid, {
-        "bronze": user.get("bronze", 0) + reward,
-        "last_daily": now,
-    })
+    # Guard on last_daily so two quick taps can't both claim
+    claimed = await credit(
+        uid, reward,
+        update={"$set": {"last_daily": now}},
+        where={"$or": [
+            {"last_daily": {"$lte": now - DAILY_COOLDOWN}},
+            {"last_daily": None},
+        ]},
+    )
+    if not claimed:
+        return await msg.reply("⏳ Already claimed! Come back later.")
 
     await msg.reply(
         f"🎁 **Daily Reward Claimed!**\n"
@@ -42,7 +50,7 @@ async def daily_reward(uid: int, msg: Message):
 
 def init_daily(bot: Client):
 
-    @bot.on_message(filters.command("daily"))
+    @commands.command("daily")
     async def daily_cmd(_, msg: Message):
 
         # Detect private/group
@@ -1,17 +1,19 @@
 # File: GameBot/games/equip.py
-from pyrogram import Client, filters
+from pyrogram import Client
 from pyrogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery
 import traceback
 from database.mongo import get_user, update_user
+from utils.commands import commands
+from utils.router import router
 
 TOOLS = ["Wooden", "Stone", "Iron", "Platinum", "Diamond", "Emerald"]
 
 def init_equip(bot: Client):
 
-    @bot.on_message(filters.command("equip"))
+    @commands.command("equip")
     async def equip_cmd(_, msg: Message):
         try:
-            user = get_user(msg.from_user.id)
+            user = await get_user(msg.from_user.id)
             if not user:
                 return await msg.reply("❌ Use /start first.")
 
@@ -23,7 +25,7 @@ def init_equip(bot: Client):
 
             # buttons for each tool
             buttons = [
-                [InlineKeyboardButton(tool, callback_data=f"equip_tool:{tool}")]
+                [InlineKeyboardButton(tool, callback_data=f"equip:tool:{tool}")]
                 for tool in owned
                 if tool in TOOLS
             ]
@@ -37,12 +39,12 @@ def init_equip(bot: Client):
             traceback.print_exc()
             await msg.reply("⚠️ Error.")
 
-    @bot.on_callback_query(filters.regex(r"^equip_tool:"))
+    @router.route("equip", "tool")
     async def cb_equip_tool(_, cq: CallbackQuery):
         try:
-            tool = cq.data.split(":")[1]
+            tool = cq.args
 
-            user = get_user(cq.from_user.id)
+            user = await get_user(cq.from_user.id)
             if not user:
                 return await cq.answer("❌ Profile not found.")
 
@@ -52,9 +54,8 @@ def init_equip(bot: Client):
             if tool not in owned:
                 return await cq.answer("❌ You don't own this tool.")
 
-            # Equip tool
-            user["equipped"] = tool
-            update_user(cq.from_user.id, user)
+            # Equip tool (write only this field, never the stale doc)
+            await update_user(cq.from_user.id, {"equipped": tool})
 
             await cq.message.edit_text(f"✅ Equipped **{tool}** successfully!")
             await cq.answer()
@@ -1,15 +1,16 @@
-from pyrogram import Client, filters
+from pyrogram import Client
 from pyrogram.types import Message
 import random
 import asyncio
 
-from database.mongo import get_user, update_user
-from utils.cooldown import check_cooldown, update_cooldown
+from database.mongo import get_user, transfer_up_to
+from utils.commands import commands
+from utils.cooldown import check_cooldown, cooldown_set
 
 
 def init_fight(bot: Client):
 
-    @bot.on_message(filters.command("fight"))
+    @commands.command("fight")
     async def fight_cmd(_, msg: Message):
 
         # Must be a reply to someone
@@ -22,8 +23,8 @@ def init_fight(bot: Client):
         if attacker.id == defender.id:
             return await msg.reply("You cannot fight yourself!")
 
-        atk = get_user(attacker.id)
-        dfd = get_user(defender.id)
+        atk = await get_user(attacker.id)
+        dfd = await get_user(defender.id)
 
         # cooldown = 1 minute
         ok, wait, pretty = check_cooldown(atk, "fight", 60)
@@ -51,20 +52,14 @@ def init_fight(bot: Client):
         if atk_power >= dfd_power:
 
             steal = random.randint(10, 80)
-            steal = min(steal, dfd_b)
 
-            new_atk_bronze = atk_b + steal
-            new_dfd_bronze = max(0, dfd_b - steal)
-
-            update_user(attacker.id, {
-                "bronze": new_atk_bronze,
-                "fight_wins": atk.get("fight_wins", 0) + 1,
-                "cooldowns": update_cooldown(atk, "fight"),
-            })
-
-            update_user(defender.id, {
-                "bronze": new_dfd_bronze
-            })
+            steal = await transfer_up_to(
+                defender.id, attacker.id, steal,
+                to_update={
+                    "$inc": {"fight_wins": 1},
+                    "$set": cooldown_set("fight"),
+                },
+            )
 
             return await fmsg.edit(
                 f"🏆 **{attacker.first_name} Won the Fight!**\n\n"
@@ -77,20 +72,12 @@ def init_fight(bot: Client):
         else:
 
             penalty = random.randint(5, 60)
-            penalty = min(penalty, atk_b)
 
-            new_atk_bronze = max(0, atk_b - penalty)
-            new_dfd_bronze = dfd_b + penalty
-
-            update_user(attacker.id, {
-                "bronze": new_atk_bronze,
-                "cooldowns": update_cooldown(atk, "fight"),
-            })
-
-            update_user(defender.id, {
-                "bronze": new_dfd_bronze,
-                "fight_wins": dfd.get("fight_wins", 0) + 1
-            })
+            penalty = await transfer_up_to(
+                attacker.id, defender.id, penalty,
+                from_update={"$set": cooldown_set("fight")},
+                to_update={"$inc": {"fight_wins": 1}},
+            )
 
             return await fmsg.edit(
                 f"😢 **You Lost the Fight!**\n\n"
@@ -1,43 +1,45 @@
 # File: GameBot/GameBot/games/flip.py
 
-from pyrogram import Client, filters
+from pyrogram import Client
 from pyrogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 import random
 import asyncio
-from database.mongo import get_user, update_user
-from utils.cooldown import check_cooldown, update_cooldown
+from database.mongo import get_user, credit, debit_up_to
+from utils.cooldown import check_cooldown, cooldown_set
+from utils.commands import commands
+from utils.router import router
 
 
 def init_flip(bot: Client):
 
-    @bot.on_message(filters.command("flip"))
+    @commands.command("flip")
     async def flip_cmd(_, msg: Message):
         user = msg.from_user
         if not user:
             return
 
-        data = get_user(user.id)
+        data = await get_user(user.id)
         ok, wait, pretty = check_cooldown(data, "flip", 30)
         if not ok:
             return await msg.reply(f"⏳ Wait **{pretty}** before flipping again.")
 
         buttons = InlineKeyboardMarkup(
             [[
-                InlineKeyboardButton("🙂 Heads", callback_data="flip_heads"),
-                InlineKeyboardButton("⚡ Tails", callback_data="flip_tails")
+                InlineKeyboardButton("🙂 Heads", callback_data="flip:heads"),
+                InlineKeyboardButton("⚡ Tails", callback_data="flip:tails")
             ]]
         )
 
         await msg.reply("🪙 **Choose Heads or Tails:**", reply_markup=buttons)
 
-    @bot.on_callback_query(filters.regex(r"^flip_"))
+    @router.route("flip")
     async def flip_result(_, cq: CallbackQuery):
         user = cq.from_user
         if not user:
             return
 
-        choice = cq.data.replace("flip_", "")
-        data = get_user(user.id)
+        choice = cq.action
+        data = await get_user(user.id)
 
         ok, wait, pretty = check_cooldown(data, "flip", 30)
         if not ok:
@@ -65,11 +67,11 @@ def init_flip(bot: Client):
 
         # Calculate result
         actual = random.choice(["heads", "tails"])
-        bronze = data.get("bronze", 0)
+        stamp = {"$set": cooldown_set("flip")}
 
         if choice == actual:
             reward = random.randint(10, 80)
-            bronze += reward
+            await credit(user.id, reward, update=stamp)
             result_text = (
                 f"🎉 **You Won!**\n"
                 f"🪙 Coin: **{actual.upper()}**\n"
@@ -77,16 +79,13 @@ def init_flip(bot: Client):
             )
         else:
             loss = random.randint(5, 35)
-            bronze = max(0, bronze - loss)
+            loss = await debit_up_to(user.id, loss, update=stamp)
             result_text = (
                 f"😢 **You Lost!**\n"
                 f"🪙 Coin: **{actual.upper()}**\n"
                 f"🥉 Lost: **-{loss} Bronze**"
             )
 
-        new_cd = update_cooldown(data, "flip")
-        update_user(user.id, {"bronze": bronze, "cooldowns": new_cd})
-
         # Delete animation message (optional)
         try:
             await coin_anim.delete()
@@ -8,12 +8,16 @@ from pyrogram.types import (
     InlineKeyboardButton,
     CallbackQuery,
 )
-import json
 import random
 import os
 import time
 from typing import Optional
-from database.mongo import get_user, update_user
+from database.mongo import credit, debit_if_sufficient
+from database.gamestate import StateStore
+from utils.commands import active, commands
+from utils.router import router
+from utils.state import ExpiringDict
+from utils.wordindex import WordIndex, score
 
 # ==========================================================
 # Paths for word JSONs
@@ -30,35 +34,12 @@ LOCAL_MEDIUM = os.path.join(LOCAL_OVERRIDE_DIR, "Medium.json")
 LOCAL_HARD = os.path.join(LOCAL_OVERRIDE_DIR, "Hard.json")
 
 
-def load_json(path: str):
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
-        return {}
-
-
-def resolve_path(repo_path: str, local_path: str) -> str:
-    """
-    Prefer local override file if present (for local testing).
-    Otherwise use repo path (games/assets/*.json).
-    """
-    if os.path.exists(local_path):
-        return local_path
-    return repo_path
-
-
-def get_words():
-    """
-    Dynamically load current JSON files so updated Easy/Medium/Hard
-    are always used without full restart.
-    """
-    words = {
-        "easy": load_json(resolve_path(EASY_PATH, LOCAL_EASY)),
-        "medium": load_json(resolve_path(MEDIUM_PATH, LOCAL_MEDIUM)),
-        "hard": load_json(resolve_path(HARD_PATH, LOCAL_HARD)),
-    }
-    return words
+# Parsed once; re-read only when a file's mtime changes or on /reload_words
+WORDS = WordIndex({
+    "easy": (EASY_PATH, LOCAL_EASY),
+    "medium": (MEDIUM_PATH, LOCAL_MEDIUM),
+    "hard": (HARD_PATH, LOCAL_HARD),
+})
 
 
 # Attempts per difficulty
@@ -77,6 +58,9 @@ HINT_LIMITS = {
 
 HINT_COST = 20  # Bronze per hint
 
+# Show "words still possible" after each wrong guess
+SHOW_REMAINING = True
+
 # Attempt-based penalty per difficulty (for reward)
 ATTEMPT_PENALTY = {
     "easy": 2,
@@ -84,6 +68,12 @@ ATTEMPT_PENALTY = {
     "hard": 5,
 }
 
+# Per-word scaling from the calibration job (utils/calibrate.py):
+# attempts move by (solver guesses - pool mean), within these bounds,
+# and the base reward by guesses / mean
+EFFORT_ATTEMPTS_RANGE = (-1, 2)
+EFFORT_REWARD_RANGE = (0.75, 1.5)
+
 # ==========================================================
 # Game state
 # ==========================================================
@@ -99,30 +89,45 @@ ATTEMPT_PENALTY = {
 #   "max_attempts": int,
 #   "history": [ { "guess": str, "feedback": str }, ... ],
 #   "hints_used": int,
-#   "hints": [ "🟥L🟥🟥🟥", ... ]
+#   "hints": [ "🟥L🟥🟥🟥", ... ],
+#   "hint_positions": [ int, ... ]
 # }
-chats = {}
+# Snapshotted to Mongo (debounced) so running quizzes survive restarts;
+# a saved quiz is loaded back when its chat next interacts.
+quizzes = StateStore("quiz_state")
 
-# Anti-spam per user (last answer timestamp)
-_last_answer = {}
 
+def start_quiz(chat_id: str, state: dict):
+    quizzes.put(chat_id, state)
+    active.add("guess", chat=chat_id)  # route the chat's plain text here
 
-def pick_random_word(category: str):
-    WORDS = get_words()
-    pool = WORDS.get(category, {}) or {}
-    if not pool:
-        return None, None
-    word = random.choice(list(pool.keys()))
-    return word, pool[word]  # hint is a dict: meaning (+ maybe example)
+
+def end_quiz(chat_id: str):
+    quizzes.drop(chat_id)
+    active.discard("guess", chat=chat_id)
+
+
+async def _mark_saved_quizzes():
+    # Quizzes restored from Mongo after a restart still own their chats
+    for chat_id in await quizzes.keys():
+        active.add("guess", chat=chat_id)
+
+# Anti-spam per user (last answer timestamp); only recent answers matter
+_last_answer = ExpiringDict("guess_last_answer", ttl=60, max_size=20000)
+
+
+async def pick_random_word(category: str):
+    # hint is a dict: meaning (+ maybe example)
+    return await WORDS.pick(category)
 
 
 def buttons_markup():
     return InlineKeyboardMarkup(
         [
             [
-                InlineKeyboardButton("Easy", callback_data="guess_easy"),
-                InlineKeyboardButton("Medium", callback_data="guess_medium"),
-                InlineKeyboardButton("Hard", callback_data="guess_hard"),
+                InlineKeyboardButton("Easy", callback_data="guess:start:easy"),
+                InlineKeyboardButton("Medium", callback_data="guess:start:medium"),
+                InlineKeyboardButton("Hard", callback_data="guess:start:hard"),
             ]
         ]
     )
@@ -132,9 +137,9 @@ def quiz_control_markup():
     return InlineKeyboardMarkup(
         [
             [
-                InlineKeyboardButton("Answer", callback_data="guess_answer"),
-                InlineKeyboardButton("New", callback_data="guess_new"),
-                InlineKeyboardButton("🛑 Stop", callback_data="guess_stop"),
+                InlineKeyboardButton("Answer", callback_data="guess:answer"),
+                InlineKeyboardButton("New", callback_data="guess:new"),
+                InlineKeyboardButton("🛑 Stop", callback_data="guess:stop"),
             ]
         ]
     )
@@ -146,7 +151,7 @@ def hint_buy_markup():
             [
                 InlineKeyboardButton(
                     f"💡 Buy Hint ({HINT_COST} Bronze 🥉)",
-                    callback_data="guess_buy_hint",
+                    callback_data="guess:hint",
                 )
             ]
         ]
@@ -206,12 +211,32 @@ def reward_for_difficulty(diff: str) -> int:
     return random.randint(80, 150)
 
 
-def compute_final_reward(diff: str, attempts_used: int) -> int:
+def attempts_for(diff: str, word: str) -> int:
+    """
+    Attempt limit for one word: the difficulty's base, nudged by how
+    many guesses the calibration solver needed for it.
+    """
+    base = ATTEMPTS_BY_DIFF.get(diff, 6)
+    effort = WORDS.effort(diff, word)
+    if effort is None:
+        return base
+    guesses, mean = effort
+    lo, hi = EFFORT_ATTEMPTS_RANGE
+    return base + max(lo, min(hi, round(guesses - mean)))
+
+
+def compute_final_reward(diff: str, attempts_used: int, word: Optional[str] = None) -> int:
     """
     Reward decreases slightly as attempts increase.
+    Words the solver found harder than their pool's average pay more.
     Minimum reward = 5 Bronze.
     """
     base = reward_for_difficulty(diff)
+    effort = WORDS.effort(diff, word) if word else None
+    if effort is not None:
+        guesses, mean = effort
+        lo, hi = EFFORT_REWARD_RANGE
+        base = round(base * max(lo, min(hi, guesses / mean)))
     penalty = ATTEMPT_PENALTY.get(diff, 2)
     extra = max(0, attempts_used - 1)  # first attempt = no penalty
     reward = base - extra * penalty
@@ -231,6 +256,9 @@ def can_answer(user_id: int, cooldown_seconds: int = 2) -> bool:
     return True
 
 
+FEEDBACK_TILES = {"g": "🟩", "y": " 🟨", "r": " 🟥"}
+
+
 def compute_feedback(guess: str, target: str) -> str:
     """
     Wordle-style feedback:
@@ -238,30 +266,7 @@ def compute_feedback(guess: str, target: str) -> str:
     🟨 exists but wrong position
     🟥 not in word
     """
-    guess = guess.lower()
-    target = target.lower()
-
-    target_chars = list(target)
-
-    # First pass: correct positions
-    marks = [""] * len(guess)
-    for i, ch in enumerate(guess):
-        if i < len(target) and ch == target[i]:
-            marks[i] = "🟩"
-            target_chars[i] = None  # consume
-
-    # Second pass: present / absent
-    for i, ch in enumerate(guess):
-        if marks[i] == " 🟩":
-            continue
-        if ch in target_chars:
-            marks[i] = " 🟨"
-            idx = target_chars.index(ch)
-            target_chars[idx] = None
-        else:
-            marks[i] = " 🟥"
-
-    return "".join(marks)
+    return "".join(FEEDBACK_TILES[m] for m in score(guess.lower(), target.lower()))
 
 
 def build_history_block(history: list, hints: Optional[list] = None) -> str:
@@ -300,16 +305,17 @@ def max_hints_for_diff(diff: str) -> int:
     return HINT_LIMITS.get(diff, 2)
 
 
-def build_single_letter_hint(target: str) -> str:
+def build_single_letter_hint(target: str, idx: Optional[int] = None) -> str:
     """
     Return a string like:
-    🟥L🟥🟥🟥  (one correct letter revealed at a random position)
+    🟥L🟥🟥🟥  (one correct letter revealed at `idx`, random if None)
     """
     if not target:
         return ""
 
     length = len(target)
-    idx = random.randint(0, length - 1)
+    if idx is None:
+        idx = random.randint(0, length - 1)
     chars = []
     for i in range(length):
         if i == idx:
@@ -327,30 +333,34 @@ def build_single_letter_hint(target: str) -> str:
 def init_guess(bot: Client):
 
     # ---------------------- /guess ----------------------
-    @bot.on_message(filters.command("guess"))
+    @commands.command("guess")
     async def cmd_guess(_, msg: Message):
         chat_id = str(msg.chat.id)
-        if chat_id in chats and chats[chat_id].get("word"):
+        state = await quizzes.get(chat_id)
+        if state and state.get("word"):
             return await msg.reply("A quiz is already running here. Use the buttons or /stop.")
         await msg.reply("**Choose difficulty:**", reply_markup=buttons_markup())
 
     # ---------------------- difficulty selected ----------------------
-    @bot.on_callback_query(filters.regex(r"^guess_(easy|medium|hard)$"))
+    @router.route("guess", "start")
     async def difficulty_selected(_, cq: CallbackQuery):
         chat_id = str(cq.message.chat.id)
-        difficulty = cq.data.split("_")[1]
+        difficulty = cq.args
+        if difficulty not in ("easy", "medium", "hard"):
+            return await cq.answer()
 
-        if chat_id in chats and chats[chat_id].get("word"):
+        state = await quizzes.get(chat_id)
+        if state and state.get("word"):
             return await cq.answer("A quiz is already running.", show_alert=True)
 
-        word, hint = pick_random_word(difficulty)
+        word, hint = await pick_random_word(difficulty)
         if not word:
             return await cq.answer("❌ No words found.", show_alert=True)
 
-        max_attempts = ATTEMPTS_BY_DIFF.get(difficulty, 6)
+        max_attempts = attempts_for(difficulty, word)
         example = extract_example(hint)
 
-        chats[chat_id] = {
+        start_quiz(chat_id, {
             "difficulty": difficulty,
             "word": word,
             "hint": hint,
@@ -362,7 +372,7 @@ def init_guess(bot: Client):
             "history": [],
             "hints_used": 0,
             "hints": [],
-        }
+        })
 
         text = (
             f"**New Quiz — {difficulty.title()} Mode**\n\n"
@@ -383,10 +393,10 @@ def init_guess(bot: Client):
         await cq.answer()
 
     # ---------------------- enable answer ----------------------
-    @bot.on_callback_query(filters.regex(r"^guess_answer$"))
+    @router.route("guess", "answer")
     async def cb_enable_answer(_, cq: CallbackQuery):
         chat_id = str(cq.message.chat.id)
-        state = chats.get(chat_id)
+        state = await quizzes.get(chat_id)
 
         if not state:
             return await cq.answer("❌ No active quiz.", show_alert=True)
@@ -395,23 +405,24 @@ def init_guess(bot: Client):
             return await cq.answer("📝 Already enabled.", show_alert=True)
 
         state["answer_mode"] = True
+        quizzes.touch(chat_id)
         await cq.answer("📝 Answer mode ON!")
 
     # ---------------------- new word ----------------------
-    @bot.on_callback_query(filters.regex(r"^guess_new$"))
+    @router.route("guess", "new")
     async def cb_new_word(_, cq: CallbackQuery):
         chat_id = str(cq.message.chat.id)
-        state = chats.get(chat_id)
+        state = await quizzes.get(chat_id)
 
         if not state:
             return await cq.answer("❌ No active quiz.", show_alert=True)
 
         difficulty = state["difficulty"]
-        word, hint = pick_random_word(difficulty)
+        word, hint = await pick_random_word(difficulty)
         if not word:
             return await cq.answer("❌ No more words.", show_alert=True)
 
-        max_attempts = ATTEMPTS_BY_DIFF.get(difficulty, 6)
+        max_attempts = attempts_for(difficulty, word)
         example = extract_example(hint)
 
         state.update({
@@ -424,6 +435,7 @@ def init_guess(bot: Client):
             "hints_used": 0,
             "hints": [],
         })
+        quizzes.touch(chat_id)
 
         text = (
             f"🔎 **New Hint — {difficulty.title()} Mode**\n\n"
@@ -439,10 +451,10 @@ def init_guess(bot: Client):
         await cq.answer()
 
     # ---------------------- stop quiz ----------------------
-    @bot.on_callback_query(filters.regex(r"^guess_stop$"))
+    @router.route("guess", "stop")
     async def cb_stop_quiz(_, cq: CallbackQuery):
         chat_id = str(cq.message.chat.id)
-        state = chats.get(chat_id)
+        state = await quizzes.get(chat_id)
 
         if not state:
             return await cq.answer("❌ No active quiz.", show_alert=True)
@@ -451,7 +463,7 @@ def init_guess(bot: Client):
         if cq.from_user and starter and cq.from_user.id != starter:
             return await cq.answer("Only the user who started the quiz can stop it.", show_alert=True)
 
-        chats.pop(chat_id, None)
+        end_quiz(chat_id)
         try:
             await cq.message.edit("**Quiz stopped.**")
         except Exception:
@@ -459,33 +471,34 @@ def init_guess(bot: Client):
         await cq.answer()
 
     # ---------------------- /answer command ----------------------
-    @bot.on_message(filters.command("answer"))
+    @commands.command("answer")
     async def enable_answer_cmd(_, msg: Message):
         chat_id = str(msg.chat.id)
-        state = chats.get(chat_id)
+        state = await quizzes.get(chat_id)
 
         if not state or not state.get("word"):
             return await msg.reply("❌ No active quiz.")
         if state["answer_mode"]:
             return await msg.reply("📝 Answer mode already ON.")
         state["answer_mode"] = True
+        quizzes.touch(chat_id)
         await msg.reply("📝 **Answer mode ON!** Send your guesses now.")
 
     # ---------------------- /new command ----------------------
-    @bot.on_message(filters.command("new"))
+    @commands.command("new", when="guess")  # /new outside a quiz is word chain's
     async def new_word_cmd(_, msg: Message):
         chat_id = str(msg.chat.id)
-        state = chats.get(chat_id)
+        state = await quizzes.get(chat_id)
 
         if not state:
             return await msg.reply("❌ No active quiz running.")
 
         difficulty = state["difficulty"]
-        word, hint = pick_random_word(difficulty)
+        word, hint = await pick_random_word(difficulty)
         if not word:
             return await msg.reply("❌ No more words available.")
 
-        max_attempts = ATTEMPTS_BY_DIFF.get(difficulty, 6)
+        max_attempts = attempts_for(difficulty, word)
         example = extract_example(hint)
 
         state.update({
@@ -498,6 +511,7 @@ def init_guess(bot: Client):
             "hints_used": 0,
             "hints": [],
         })
+        quizzes.touch(chat_id)
 
         text = (
             f"🔎 **New Hint — {difficulty.title()} Mode**\n\n"
@@ -510,10 +524,10 @@ def init_guess(bot: Client):
         await msg.reply(text, reply_markup=quiz_control_markup())
 
     # ---------------------- /hint command ----------------------
-    @bot.on_message(filters.command("hint"))
+    @commands.command("hint")
     async def hint_cmd(_, msg: Message):
         chat_id = str(msg.chat.id)
-        state = chats.get(chat_id)
+        state = await quizzes.get(chat_id)
 
         if not state or not state.get("word"):
             return await msg.reply("❌ No active quiz to hint for.")
@@ -539,14 +553,14 @@ def init_guess(bot: Client):
 # ============================
 
     # ---------------------- hint purchase button ----------------------
-    @bot.on_callback_query(filters.regex(r"^guess_buy_hint$"))
+    @router.route("guess", "hint")
     async def cb_buy_hint(_, cq: CallbackQuery):
         chat_id = str(cq.message.chat.id)
         user_id = cq.from_user.id if cq.from_user else None
         if not user_id:
             return await cq.answer("Unknown user.", show_alert=True)
 
-        state = chats.get(chat_id)
+        state = await quizzes.get(chat_id)
         if not state or not state.get("word"):
             return await cq.answer("❌ No active quiz.", show_alert=True)
 
@@ -560,25 +574,18 @@ def init_guess(bot: Client):
                 show_alert=True,
             )
 
-        # Check user bronze
+        # Deduct cost (guarded: fails if balance is too low)
         try:
-            user = get_user(user_id)
-            current_bronze = int(user.get("bronze", 0))
+            paid = await debit_if_sufficient(user_id, HINT_COST)
         except Exception:
-            current_bronze = 0
+            return await cq.answer("Database error, try again later.", show_alert=True)
 
-        if current_bronze < HINT_COST:
+        if not paid:
             return await cq.answer(
                 f"Not enough Bronze. You need {HINT_COST} Bronze 🥉.",
                 show_alert=True,
             )
 
-        # Deduct cost
-        try:
-            update_user(user_id, {"bronze": current_bronze - HINT_COST})
-        except Exception:
-            return await cq.answer("Database error, try again later.", show_alert=True)
-
         # Mark hint used
         hints_used += 1
         state["hints_used"] = hints_used
@@ -587,8 +594,19 @@ def init_guess(bot: Client):
         history = state.get("history", [])
         hints = state.setdefault("hints", [])
 
+        # Reveal the spot that narrows things most, skipping known ones
+        guesses = [h["guess"] for h in history]
+        known = set(state.setdefault("hint_positions", []))
+        known.update(
+            i for g in guesses
+            for i, m in enumerate(score(g.lower(), correct.lower())) if m == "g"
+        )
+        idx = WORDS.hint_position(state["difficulty"], correct, guesses, known)
+        state["hint_positions"].append(idx)
+        quizzes.touch(chat_id)
+
         # Build visual hint row
-        hint_row = build_single_letter_hint(correct)
+        hint_row = build_single_letter_hint(correct, idx)
         hints.append(hint_row)
 
         # Build combined block (guesses + hint rows)
@@ -602,28 +620,17 @@ def init_guess(bot: Client):
         await cq.message.reply(text)
         await cq.answer("Hint purchased!")
 
-    # ---------------------- Only handle guesses when quiz active ----------------------
-    def quiz_active_filter(_, __, msg: Message) -> bool:
-        chat_id = str(msg.chat.id)
-        state = chats.get(chat_id)
-        return bool(state and state.get("word") and state.get("answer_mode"))
-
-    quiz_active = filters.create(quiz_active_filter)
-
-    # ---------------------- process guesses ----------------------
-    @bot.on_message(
-        filters.text
-        & ~filters.command(["guess", "answer", "new", "stop", "convert", "hint"])
-        & quiz_active,
-        group=1,
-    )
+    # ---------------------- process guesses (chats with a quiz) ----------------------
+    @commands.text("guess", order=1, warm=_mark_saved_quizzes)
     async def process_answer(_, msg: Message):
         if not msg.from_user or msg.from_user.is_bot:
             return
 
         chat_id = str(msg.chat.id)
-        state = chats.get(chat_id)
+        state = await quizzes.get(chat_id)
         if not state:
+            return active.discard("guess", chat=chat_id)
+        if not state.get("word") or not state.get("answer_mode"):
             return
 
         if not can_answer(msg.from_user.id):
@@ -643,8 +650,7 @@ def init_guess(bot: Client):
             )
 
         # Dictionary validation
-        pool = get_words().get(difficulty, {})
-        if pool and guess not in pool:
+        if not await WORDS.is_valid(difficulty, guess):
             return await msg.reply("This Word Is Not Corrct Please Try another word.")
 
         # Update attempt counter
@@ -656,6 +662,7 @@ def init_guess(bot: Client):
         history = state.setdefault("history", [])
         hints = state.get("hints", [])
         history.append({"guess": guess.upper(), "feedback": feedback})
+        quizzes.touch(chat_id)
 
         # Block showing guesses + hints
         full_history = build_history_block(history, hints)
@@ -667,21 +674,17 @@ def init_guess(bot: Client):
 
         # ---------------- CORRECT GUESS ----------------
         if guess == correct:
-            reward = compute_final_reward(difficulty, attempts_used)
+            reward = compute_final_reward(difficulty, attempts_used, correct)
 
             try:
-                usr = get_user(msg.from_user.id)
-                update_user(
-                    msg.from_user.id,
-                    {"bronze": usr.get("bronze", 0) + reward},
-                )
+                await credit(msg.from_user.id, reward)
             except Exception:
                 pass
 
             winner = msg.from_user.mention
             guesses_only = build_history_block(history, hints=[])
 
-            chats.pop(chat_id, None)
+            end_quiz(chat_id)
 
             text = (
                 "🎉 **Correct!**\n"
@@ -701,7 +704,7 @@ def init_guess(bot: Client):
 
         # ---------------- OUT OF ATTEMPTS ----------------
         if attempts_used >= max_attempts:
-            chats.pop(chat_id, None)
+            end_quiz(chat_id)
 
             text = (
                 "**Out of attempts!**\n"
@@ -724,26 +727,31 @@ def init_guess(bot: Client):
             "🟩 correct • 🟨 present • 🟥 absent"
         )
 
+        if SHOW_REMAINING:
+            left = WORDS.remaining(difficulty, correct, [h["guess"] for h in history])
+            if left:
+                text += f"\n🔎 Words still possible: **{left}**"
+
         if meaning_block:
             text += meaning_block
 
         return await msg.reply(text)
 
     # ---------------------- /stop ----------------------
-    @bot.on_message(filters.command("stop"))
+    @commands.command("stop")
     async def stop_quiz_cmd(_, msg: Message):
         chat_id = str(msg.chat.id)
-        state = chats.get(chat_id)
+        state = await quizzes.get(chat_id)
         if not state:
             return await msg.reply("❌ No quiz is currently running.")
         starter = state.get("starter_id")
         if msg.from_user.id != starter:
             return await msg.reply("Only the user who started the quiz can stop it.")
-        chats.pop(chat_id, None)
+        end_quiz(chat_id)
         await msg.reply("**Quiz stopped.**")
 
     # ---------------------- owner-only reload words ----------------------
-    @bot.on_message(filters.command("reload_words") & filters.me)
+    @commands.command("reload_words", filter=filters.me)
     async def reload_words(_, msg: Message):
-        _ = get_words()
-        await msg.reply("**Word lists reloaded!**")
+        loaded = await WORDS.reload(force=True)
+        await msg.reply(f"**Word lists reloaded!** ({', '.join(loaded) or 'none'})")
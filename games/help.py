@@ -1,8 +1,9 @@
 # File: GameBot/games/help.py
-from pyrogram import Client, filters
+from pyrogram import Client
 from pyrogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton
 from pyrogram.enums import ParseMode
 import traceback
+from utils.commands import commands
 
 # ==========================================================
 # 📌 FULL HELP TEXT (also used by /start deep-link)
@@ -13,7 +14,8 @@ FULL_HELP_TEXT = (
     "⟡ <b><i>Profile</i></b>\n"
     "• /start — Begin Your Journey\n"
     "• /profile — View Your Profile\n"
-    "• /leaderboard — Top Players\n\n"
+    "• /leaderboard — Top Players\n"
+    "• /rank — Your Wealth & Message Rank\n\n"
 
     "⟡ <b><i>Games</i></b>\n"
     "• /flip — Coin Flip Duel\n"
@@ -22,6 +24,8 @@ FULL_HELP_TEXT = (
     "• /rob — Rob a Player (Risk + Reward)\n"
     "• /spin — Try Your Luck on Spin Wheel\n"
     "• /guess — Guess the Hidden Word\n"
+    "• /tjoin — Join Multi-Chat Word Tournaments\n"
+    "• /xoxobot — Tic-Tac-Toe vs Bot (Easy/Hard)\n"
     "• /work — Earn Bronze Coins\n"
     "• /daily — Claim Daily Rewards (If /daily doesn't work, use /start and click on daily bonus)\n"
     "• /bet — Bet Coins and Multiply\n"
@@ -46,7 +50,7 @@ FULL_HELP_TEXT = (
 # ==========================================================
 def init_help(bot: Client):
 
-    @bot.on_message(filters.command(["help", "commands"]))
+    @commands.command("help", "commands")
     async def help_cmd(_, msg: Message):
         try:
             group_help = (
@@ -0,0 +1,26 @@
+# File: GameBot/games/messages.py
+from pyrogram import Client, filters
+from pyrogram.types import Message
+from database.mongo import buffer_write
+from database.names import name_cache
+
+
+# Runs after every game handler (higher group = later). Counts are only
+# tallied in the write-behind buffer here; they reach Mongo as one $inc
+# per user in the next bulk flush, never as a per-message round trip.
+# The sender's first name is noted for the leaderboards on the way past.
+MESSAGES_GROUP = 99
+
+
+# -----------------------------
+# INIT
+# -----------------------------
+def init_messages(bot: Client):
+
+    # Incoming only: the account's own sends (replies, animations) aren't chat activity
+    @bot.on_message(filters.incoming & ~filters.service & ~filters.bot, group=MESSAGES_GROUP)
+    async def count_message(_, msg: Message):
+        if not msg.from_user:
+            return
+        await name_cache.remember(msg.from_user.id, msg.from_user.first_name)
+        await buffer_write(msg.from_user.id, inc={"messages": 1})
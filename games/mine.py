@@ -1,10 +1,11 @@
 # File: GameBot/games/mine.py
-from pyrogram import Client, filters
+from pyrogram import Client
 from pyrogram.types import Message
 import random
 import time
 import traceback
-from database.mongo import get_user, update_user
+from database.mongo import get_user, buffer_write
+from utils.commands import commands
 
 
 # ==========================================================
@@ -44,10 +45,10 @@ def choose_ore():
 def init_mine(bot: Client):
 
     # ⛏️ /mine command
-    @bot.on_message(filters.command("mine"))
+    @commands.command("mine")
     async def mine_cmd(_, msg: Message):
         try:
-            user = get_user(msg.from_user.id)
+            user = await get_user(msg.from_user.id)
             if not user:
                 await msg.reply("❌ Please use /start first to create your profile.")
                 return
@@ -66,17 +67,16 @@ def init_mine(bot: Client):
                 await msg.reply(f"⏳ You're mining too fast! Wait **{wait}s**.")
                 return
 
-            # Update last mine time
-            user["last_mine"] = now
-
             # Pick ore
             ore = choose_ore()
             amount = random.randint(1, 3)
 
-            user["inventory"]["ores"].setdefault(ore, 0)
-            user["inventory"]["ores"][ore] += amount
-
-            update_user(msg.from_user.id, user)
+            # Chatty, low-stakes fields → coalesced write-behind
+            await buffer_write(
+                msg.from_user.id,
+                inc={f"inventory.ores.{ore}": amount},
+                set_fields={"last_mine": now},
+            )
 
             await msg.reply(f"⛏️ You mined **{amount}× {ore}**!")
 
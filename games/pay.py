@@ -1,12 +1,12 @@
-from pyrogram import Client, filters
-from database.mongo import get_user, update_user
+from pyrogram import Client
+from database.mongo import get_user, transfer
+from utils.commands import commands
 
 def init_pay(bot: Client):
 
-    @bot.on_message(filters.command("pay"))
+    @commands.command("pay")
     async def pay_cmd(_, msg):
         user_id = msg.from_user.id
-        user = get_user(user_id)
 
         # Must be a reply
         if not msg.reply_to_message:
@@ -31,25 +31,19 @@ def init_pay(bot: Client):
         if amount <= 0:
             return await msg.reply("❌ Minimum payment is 1 coin.")
 
-        sender_coins = user.get("bronze", 0)
-        if sender_coins < amount:
+        # Guarded debit + credit (receiver profile is created if missing)
+        sender = await transfer(user_id, receiver_id, amount)
+        if not sender:
+            user = await get_user(user_id)
+            sender_coins = user.get("bronze", 0)
             return await msg.reply(f"💰 You only have {sender_coins} bronze coins.\nYou can't send {amount}.")
 
-        # Receiver DB fetch
-        receiver_user = get_user(receiver_id)
-        if not receiver_user:
-            return await msg.reply("⚠ Receiver has no profile yet. Ask them to /start first.")
-
-        # Update DB
-        update_user(user_id, {"bronze": sender_coins - amount})
-        update_user(receiver_id, {"bronze": receiver_user.get("bronze", 0) + amount})
-
         await msg.reply(
             f"💸 **Transaction Successful!**\n\n"
             f"👤 Sender: {msg.from_user.first_name}\n"
             f"👤 Receiver: {receiver.first_name}\n"
             f"💰 Amount: {amount} bronze coins\n"
-            f"📦 New Balance (You): {sender_coins - amount}"
+            f"📦 New Balance (You): {sender.get('bronze', 0)}"
         )
 
     print("[loaded] games.pay")
@@ -1,11 +1,13 @@
 # File: GameBot/games/profile.py
 
-from pyrogram import Client, filters
+from pyrogram import Client
 from pyrogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton
 
 from database.mongo import get_user
+from database.leaderboard import user_ranks
 from games.start import get_start_menu
 import traceback
+from utils.commands import commands
 
 
 # --------------------------------------
@@ -23,7 +25,7 @@ def total_bronze_value(user: dict) -> int:
 # --------------------------------------
 # BUILD PROFILE TEXT
 # --------------------------------------
-def build_profile_text_for_user(user: dict, mention: str):
+def build_profile_text_for_user(user: dict, mention: str, ranks: dict = None):
 
     black_gold = int(user.get("black_gold", 0))
     platinum   = int(user.get("platinum", 0))
@@ -37,6 +39,10 @@ def build_profile_text_for_user(user: dict, mention: str):
     rob_s      = user.get("rob_success", 0)
     rob_f      = user.get("rob_fail", 0)
 
+    ranks = ranks or {}
+    wealth_rank = f"#{ranks['wealth']}" if ranks.get("wealth") else "—"
+    msg_rank = f"#{ranks['messages']}" if ranks.get("messages") else "—"
+
     badges = " ".join(user.get("badges", [])) or "None"
 
     inv = user.get("inventory", {})
@@ -60,10 +66,11 @@ def build_profile_text_for_user(user: dict, mention: str):
         f"🥇 Gold: `{gold}`\n"
         f"🥈 Silver: `{silver}`\n"
         f"🥉 Bronze: `{bronze}`\n"
-        f"🔢 Total Value: `{total_val}`\n\n"
+        f"🔢 Total Value: `{total_val}`\n"
+        f"🏆 Wealth Rank: `{wealth_rank}`\n\n"
 
         f"📊 **Stats**\n"
-        f"💬 Messages: `{messages}`\n"
+        f"💬 Messages: `{messages}` (rank `{msg_rank}`)\n"
         f"🥊 Fight Wins: `{wins}`\n"
         f"🕵️ Rob Success: `{rob_s}`\n"
         f"🚨 Rob Failures: `{rob_f}`\n\n"
@@ -86,7 +93,7 @@ def build_profile_text_for_user(user: dict, mention: str):
 # --------------------------------------
 def get_profile_markup():
     return InlineKeyboardMarkup([
-        [InlineKeyboardButton("🔙 Back", callback_data="back_to_home")]
+        [InlineKeyboardButton("🔙 Back", callback_data="home:show")]
     ])
 
 
@@ -95,15 +102,15 @@ def get_profile_markup():
 # --------------------------------------
 def init_profile(bot: Client):
 
-    @bot.on_message(filters.command("profile"))
+    @commands.command("profile")
     async def profile_cmd(_, msg: Message):
         try:
-            user = get_user(msg.from_user.id)
+            user = await get_user(msg.from_user.id)
             if not user:
                 return await msg.reply("❌ Use /start to create your profile first.")
 
             mention = msg.from_user.mention or msg.from_user.first_name
-            text = build_profile_text_for_user(user, mention)
+            text = build_profile_text_for_user(user, mention, await user_ranks(user))
 
             await msg.reply(text, reply_markup=get_profile_markup())
 
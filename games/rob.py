@@ -1,13 +1,14 @@
-from pyrogram import Client, filters
+from pyrogram import Client
 from pyrogram.types import Message
-from database.mongo import get_user, update_user
-from utils.cooldown import check_cooldown, update_cooldown
+from database.mongo import get_user, buffer_write, debit_up_to, transfer_up_to
+from utils.commands import commands
+from utils.cooldown import check_cooldown, cooldown_set
 import random, asyncio
 
 
 def init_rob(bot: Client):
 
-    @bot.on_message(filters.command("rob"))
+    @commands.command("rob")
     async def rob_cmd(_, msg: Message):
 
         # Must reply to a user in ANY chat (group or DM)
@@ -22,8 +23,8 @@ def init_rob(bot: Client):
         if robber.id == victim.id:
             return await msg.reply("You cannot rob yourself.")
 
-        robber_data = get_user(robber.id)
-        victim_data = get_user(victim.id)
+        robber_data = await get_user(robber.id)
+        victim_data = await get_user(victim.id)
 
         # Cooldown: 5 minutes
         ok, wait, pretty = check_cooldown(robber_data, "rob", 300)
@@ -46,8 +47,7 @@ def init_rob(bot: Client):
 
         # Victim has nothing
         if not chances:
-            new_cd = update_cooldown(robber_data, "rob")
-            update_user(robber.id, {"cooldowns": new_cd})
+            await buffer_write(robber.id, set_fields=cooldown_set("rob"))
             return await rob_msg.edit("😶 Target has **no coins** to steal.")
 
         # Weighted selection of coin type
@@ -61,14 +61,12 @@ def init_rob(bot: Client):
 
             # FAILED robbery
             penalty = random.randint(1, 40)
-            penalty = min(penalty, robber_data.get("bronze", 0))
-
-            update_user(
-                robber.id,
-                {
-                    "bronze": robber_data.get("bronze", 0) - penalty,
-                    "rob_fail": robber_data.get("rob_fail", 0) + 1,
-                    "cooldowns": update_cooldown(robber_data, "rob"),
+
+            penalty = await debit_up_to(
+                robber.id, penalty,
+                update={
+                    "$inc": {"rob_fail": 1},
+                    "$set": cooldown_set("rob"),
                 },
             )
 
@@ -89,20 +87,12 @@ def init_rob(bot: Client):
         else:  # platinum
             steal = 1
 
-        # Update values
-        update_user(
-            robber.id,
-            {
-                chosen_tier: robber_data.get(chosen_tier, 0) + steal,
-                "rob_success": robber_data.get("rob_success", 0) + 1,
-                "cooldowns": update_cooldown(robber_data, "rob"),
-            },
-        )
-
-        update_user(
-            victim.id,
-            {
-                chosen_tier: max(0, victim_amount - steal)
+        # Move coins (clamped to what the victim still has right now)
+        steal = await transfer_up_to(
+            victim.id, robber.id, steal, chosen_tier,
+            to_update={
+                "$inc": {"rob_success": 1},
+                "$set": cooldown_set("rob"),
             },
         )
 
@@ -1,7 +1,8 @@
 from pyrogram import Client, filters
 from pyrogram.types import Message
 import asyncio
-from database.mongo import get_user, update_user
+from database.mongo import credit
+from utils.commands import commands
 
 
 def init_roll(bot: Client):
@@ -9,7 +10,7 @@ def init_roll(bot: Client):
     # -------------------------------------------------
     # /roll — works in groups + DM
     # -------------------------------------------------
-    @bot.on_message(filters.command(["roll", "dice"]))
+    @commands.command("roll", "dice")
     async def roll_cmd(_, msg: Message):
 
         user = msg.from_user
@@ -25,10 +26,7 @@ def init_roll(bot: Client):
         value = dice.dice.value
         reward = value * 10
 
-        data = get_user(user.id)
-        new_bronze = data.get("bronze", 0) + reward
-
-        update_user(user.id, {"bronze": new_bronze})
+        await credit(user.id, reward)
 
         await anim.edit(
             f"🎲 **You rolled:** `{value}`\n"
@@ -48,10 +46,7 @@ def init_roll(bot: Client):
         value = msg.dice.value
         reward = value * 10
 
-        data = get_user(user.id)
-        new_bronze = data.get("bronze", 0) + reward
-
-        update_user(user.id, {"bronze": new_bronze})
+        await credit(user.id, reward)
 
         await msg.reply(
             f"🎲 You rolled: `{value}`\n"
@@ -1,8 +1,10 @@
 # File: GameBot/games/sell.py
-from pyrogram import Client, filters
+from pyrogram import Client
 from pyrogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery
 import traceback
-from database.mongo import get_user, update_user
+from database.mongo import get_user, credit, flush_pending
+from utils.commands import commands
+from utils.router import router
 
 if "module_loaded" in globals():
     raise SystemExit
@@ -21,9 +23,9 @@ ORE_VALUES = {
 def init_sell(bot: Client):
 
     # /sell (show available ores)
-    @bot.on_message(filters.command("sell"))
+    @commands.command("sell")
     async def sell_cmd(_, msg: Message):
-        user = get_user(msg.from_user.id)
+        user = await get_user(msg.from_user.id)
         if not user:
             return await msg.reply("❌ Use /start first.")
 
@@ -35,7 +37,7 @@ def init_sell(bot: Client):
 
         # Create buttons for each ore
         buttons = [
-            [InlineKeyboardButton(f"Sell {ore} ({amount})", callback_data=f"sell_ore:{ore}")]
+            [InlineKeyboardButton(f"Sell {ore} ({amount})", callback_data=f"sell:ore:{ore}")]
             for ore, amount in ores.items()
         ]
 
@@ -45,12 +47,12 @@ def init_sell(bot: Client):
         )
 
     # Callback — Sell selected ore
-    @bot.on_callback_query(filters.regex(r"^sell_ore:"))
+    @router.route("sell", "ore")
     async def sell_ore(_, cq: CallbackQuery):
         try:
-            ore = cq.data.split(":")[1]
+            ore = cq.args
 
-            user = get_user(cq.from_user.id)
+            user = await get_user(cq.from_user.id)
             if not user:
                 return await cq.answer("❌ Profile not found.")
 
@@ -64,11 +66,18 @@ def init_sell(bot: Client):
             price = ORE_VALUES.get(ore, 1)
             earned = amount * price
 
-            # Update wallet
-            user["bronze"] = user.get("bronze", 0) + earned
-            ores.pop(ore, None)
-
-            update_user(cq.from_user.id, user)
+            # Ore counts are write-behind; persist them before the guarded sale
+            await flush_pending(cq.from_user.id)
+
+            # Pay out and remove the ore in one write; the `where` guard
+            # makes a double tap sell the stack only once
+            sold = await credit(
+                cq.from_user.id, earned,
+                update={"$unset": {f"inventory.ores.{ore}": ""}},
+                where={f"inventory.ores.{ore}": amount},
+            )
+            if not sold:
+                return await cq.answer("❌ No such ore left.")
 
             try:
                 await cq.message.edit_text(
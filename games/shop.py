@@ -1,13 +1,15 @@
 # File: GameBot/games/shop.py
 
-from pyrogram import Client, filters
+from pyrogram import Client
 from pyrogram.types import (
     Message,
     InlineKeyboardMarkup,
     InlineKeyboardButton,
     CallbackQuery
 )
-from database.mongo import get_user, update_user
+from database.mongo import get_user, debit_if_sufficient
+from utils.commands import commands
+from utils.router import router
 
 
 # ---------------------------------------
@@ -35,8 +37,8 @@ TOOLS = [
 # ---------------------------------------
 def main_shop_keyboard():
     return InlineKeyboardMarkup([
-        [InlineKeyboardButton("⭐ Items", callback_data="shop_items")],
-        [InlineKeyboardButton("🛠 Tools", callback_data="shop_tools")],
+        [InlineKeyboardButton("⭐ Items", callback_data="shop:items")],
+        [InlineKeyboardButton("🛠 Tools", callback_data="shop:tools")],
     ])
 
 
@@ -45,7 +47,7 @@ def items_keyboard():
     row = []
 
     for name, _ in ITEMS:
-        row.append(InlineKeyboardButton(name, callback_data=f"buy_item:{name}"))
+        row.append(InlineKeyboardButton(name, callback_data=f"shop:item:{name}"))
         if len(row) == 2:
             rows.append(row)
             row = []
@@ -53,7 +55,7 @@ def items_keyboard():
     if row:
         rows.append(row)
 
-    rows.append([InlineKeyboardButton("⬅ Back", callback_data="shop_back")])
+    rows.append([InlineKeyboardButton("⬅ Back", callback_data="shop:back")])
     return InlineKeyboardMarkup(rows)
 
 
@@ -62,7 +64,7 @@ def tools_keyboard():
     row = []
 
     for name, _ in TOOLS:
-        row.append(InlineKeyboardButton(name, callback_data=f"buy_tool:{name}"))
+        row.append(InlineKeyboardButton(name, callback_data=f"shop:tool:{name}"))
         if len(row) == 2:
             rows.append(row)
             row = []
@@ -70,7 +72,7 @@ def tools_keyboard():
     if row:
         rows.append(row)
 
-    rows.append([InlineKeyboardButton("⬅ Back", callback_data="shop_back")])
+    rows.append([InlineKeyboardButton("⬅ Back", callback_data="shop:back")])
     return InlineKeyboardMarkup(rows)
 
 
@@ -78,43 +80,34 @@ def tools_keyboard():
 # PURCHASE HELPERS
 # ---------------------------------------
 async def purchase_item(msg, user, name, price):
-    if user["bronze"] < price:
+    updated = await debit_if_sufficient(
+        user["_id"], price, update={"$push": {"inventory.items": name}}
+    )
+    if not updated:
         return await msg.reply(
             f"❌ Not enough Bronze.\nNeeded: {price}\nYou have: {user['bronze']}"
         )
 
-    user["bronze"] -= price
-    user["inventory"]["items"].append(name)
-
-    update_user(user["_id"], user)
-
     await msg.reply(
-        f"✅ **Purchased:** {name}\n💰 Remaining Bronze: {user['bronze']}"
+        f"✅ **Purchased:** {name}\n💰 Remaining Bronze: {updated['bronze']}"
     )
 
 
 async def purchase_tool(msg, user, name, price):
 
-    if user["bronze"] < price:
+    # Deduct bronze + add tool to inventory list in one write
+    updated = await debit_if_sufficient(
+        user["_id"], price, update={"$addToSet": {"inventory.tools": name}}
+    )
+    if not updated:
         return await msg.reply(
             f"❌ Not enough Bronze.\nNeeded: {price}\nYou have: {user['bronze']}"
         )
 
-    # Deduct bronze
-    user["bronze"] -= price
-
-    # Add tool to inventory list
-    tools = user["inventory"].setdefault("tools", [])
-
-    if name not in tools:
-        tools.append(name)
-
-    update_user(user["_id"], user)
-
     await msg.reply(
         f"🛠 **Purchased Tool:** {name}\n"
         f"Use `/equip` to equip your tools.\n"
-        f"Remaining Bronze: {user['bronze']}"
+        f"Remaining Bronze: {updated['bronze']}"
     )
 
 
@@ -124,34 +117,27 @@ async def purchase_tool(msg, user, name, price):
 def init_shop(bot: Client):
 
     # /shop
-    @bot.on_message(filters.command("shop"))
+    @commands.command("shop")
     async def open_shop(_, msg: Message):
 
-        user = get_user(msg.from_user.id)
+        user = await get_user(msg.from_user.id)
         if not user:
             return await msg.reply("❌ Please use /start first.")
 
-        # Ensure inventory structure exists
-        user.setdefault("inventory", {})
-        user["inventory"].setdefault("items", [])
-        user["inventory"].setdefault("tools", [])
-        user["inventory"].setdefault("ores", {})
-        update_user(msg.from_user.id, user)
-
         await msg.reply(
             "🛒 **GAMEBOT SHOP**\nChoose a section:",
             reply_markup=main_shop_keyboard(),
         )
 
     # TEXT BUY
-    @bot.on_message(filters.command("buy"))
+    @commands.command("buy")
     async def text_buy(_, msg: Message):
 
         if len(msg.text.split()) < 2:
             return await msg.reply("Usage:\n`/buy Golden Key`")
 
         query = msg.text.split(maxsplit=1)[1].strip().lower()
-        user = get_user(msg.from_user.id)
+        user = await get_user(msg.from_user.id)
 
         if not user:
             return await msg.reply("❌ Use /start first.")
@@ -169,7 +155,7 @@ def init_shop(bot: Client):
         await msg.reply("❌ Item not found. Use /shop")
 
     # SECTION SWITCH
-    @bot.on_callback_query(filters.regex("shop_items"))
+    @router.route("shop", "items")
     async def show_items(_, cq: CallbackQuery):
         await cq.message.edit_text(
             "⭐ **Items Store**\nChoose an item:",
@@ -177,7 +163,7 @@ def init_shop(bot: Client):
         )
         await cq.answer()
 
-    @bot.on_callback_query(filters.regex("shop_tools"))
+    @router.route("shop", "tools")
     async def show_tools(_, cq: CallbackQuery):
         await cq.message.edit_text(
             "🛠 **Tools Store**\nChoose a tool:",
@@ -185,7 +171,7 @@ def init_shop(bot: Client):
         )
         await cq.answer()
 
-    @bot.on_callback_query(filters.regex("shop_back"))
+    @router.route("shop", "back")
     async def shop_back(_, cq: CallbackQuery):
         await cq.message.edit_text(
             "🛒 **GAMEBOT SHOP**\nChoose a section:",
@@ -194,22 +180,26 @@ def init_shop(bot: Client):
         await cq.answer()
 
     # BUTTON PURCHASE — ITEMS
-    @bot.on_callback_query(filters.regex(r"^buy_item:"))
+    @router.route("shop", "item")
     async def button_buy_item(_, cq: CallbackQuery):
-        name = cq.data.split(":", 1)[1]
-        price = next(p for n, p in ITEMS if n == name)
+        name = cq.args
+        price = next((p for n, p in ITEMS if n == name), None)
+        if price is None:
+            return await cq.answer("❌ Item not found.")
 
-        user = get_user(cq.from_user.id)
+        user = await get_user(cq.from_user.id)
         await purchase_item(cq.message, user, name, price)
         await cq.answer()
 
     # BUTTON PURCHASE — TOOLS
-    @bot.on_callback_query(filters.regex(r"^buy_tool:"))
+    @router.route("shop", "tool")
     async def button_buy_tool(_, cq: CallbackQuery):
-        name = cq.data.split(":", 1)[1]
-        price = next(p for n, p in TOOLS if n == name)
+        name = cq.args
+        price = next((p for n, p in TOOLS if n == name), None)
+        if price is None:
+            return await cq.answer("❌ Tool not found.")
 
-        user = get_user(cq.from_user.id)
+        user = await get_user(cq.from_user.id)
         await purchase_tool(cq.message, user, name, price)
         await cq.answer()
 
@@ -1,11 +1,13 @@
 # File: GameBot/games/spin.py
 
-from pyrogram import Client, filters
+from pyrogram import Client
 from pyrogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 import random
 import asyncio
-from database.mongo import get_user, update_user
-from utils.cooldown import check_cooldown, update_cooldown
+from database.mongo import get_user, credit, debit_up_to
+from utils.cooldown import check_cooldown, cooldown_set
+from utils.commands import commands
+from utils.router import router
 
 # prevent double imports
 if "module_loaded" in globals():
@@ -16,13 +18,13 @@ module_loaded = True
 
 def init_spin(bot: Client):
 
-    @bot.on_message(filters.command("spin"))
+    @commands.command("spin")
     async def spin_cmd(_, msg: Message):
         user = msg.from_user
         if not user:
             return
 
-        data = get_user(user.id)
+        data = await get_user(user.id)
         ok, wait, pretty = check_cooldown(data, "spin", 60)
         if not ok:
             return await msg.reply(
@@ -33,12 +35,12 @@ def init_spin(bot: Client):
         buttons = InlineKeyboardMarkup(
             [
                 [
-                    InlineKeyboardButton("🔴 Red", callback_data="spin_red"),
-                    InlineKeyboardButton("⚫ Black", callback_data="spin_black"),
+                    InlineKeyboardButton("🔴 Red", callback_data="spin:red"),
+                    InlineKeyboardButton("⚫ Black", callback_data="spin:black"),
                 ],
                 [
-                    InlineKeyboardButton("🟢 Green", callback_data="spin_green"),
-                    InlineKeyboardButton("🔵 Blue", callback_data="spin_blue"),
+                    InlineKeyboardButton("🟢 Green", callback_data="spin:green"),
+                    InlineKeyboardButton("🔵 Blue", callback_data="spin:blue"),
                 ]
             ]
         )
@@ -55,14 +57,14 @@ def init_spin(bot: Client):
 
         sent.timeout_task = asyncio.create_task(timeout_check())
 
-    @bot.on_callback_query(filters.regex(r"^spin_"))
+    @router.route("spin")
     async def spin_result(_, cq: CallbackQuery):
         user = cq.from_user
         if not user:
             return
 
-        choice = cq.data.replace("spin_", "")
-        data = get_user(user.id)
+        choice = cq.action
+        data = await get_user(user.id)
 
         ok, wait, pretty = check_cooldown(data, "spin", 60)
         if not ok:
@@ -103,7 +105,6 @@ def init_spin(bot: Client):
         else:
             actual = "blue"
 
-        bronze = data.get("bronze", 0)
         streak = data.get("spin_streak", 0)
 
         # Reward ranges
@@ -131,7 +132,9 @@ def init_spin(bot: Client):
             elif streak >= 5:
                 reward = int(reward * 1.60)
 
-            bronze += reward
+            await credit(user.id, reward, update={
+                "$set": {"spin_streak": streak, **cooldown_set("spin")},
+            })
             result_text = (
                 f"🎉 **You Won!**\n"
                 f"🎯 Result: **{actual.upper()}**\n"
@@ -140,8 +143,10 @@ def init_spin(bot: Client):
             )
         else:
             loss = random.randint(lose_min, lose_max)
-            bronze = max(0, bronze - loss)
             streak = 0
+            loss = await debit_up_to(user.id, loss, update={
+                "$set": {"spin_streak": streak, **cooldown_set("spin")},
+            })
             result_text = (
                 f"😢 **You Lost!**\n"
                 f"🎯 Result: **{actual.upper()}**\n"
@@ -149,10 +154,4 @@ def init_spin(bot: Client):
                 f"💰 Lost: **-{loss} Bronze**"
             )
 
-        # ⛳ UPDATE COOLDOWN CORRECTLY
-        new_data = update_cooldown(data, "spin")
-        new_data["bronze"] = bronze
-        new_data["spin_streak"] = streak
-        update_user(user.id, new_data)
-
         await cq.message.reply(result_text)
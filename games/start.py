@@ -7,12 +7,14 @@ if "start_loaded" in globals():
     raise SystemExit
 start_loaded = True
 
-from pyrogram import Client, filters
+from pyrogram import Client
 from pyrogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton
 from pyrogram.enums import ParseMode
 import traceback
 
 from database.mongo import get_user, create_user_if_not_exists
+from utils.commands import commands
+from utils.router import router
 
 # ==========================================================
 # 📌 START TEXT (DM Home Page)
@@ -37,9 +39,9 @@ START_TEXT = (
 # ==========================================================
 def get_start_menu():
     return InlineKeyboardMarkup([
-        [InlineKeyboardButton("🎁 Daily Bonus", callback_data="open_daily")],
-        [InlineKeyboardButton("👤 Profile", callback_data="open_profile")],
-        [InlineKeyboardButton("🏆 Leaderboards", callback_data="open_leaderboard")],
+        [InlineKeyboardButton("🎁 Daily Bonus", callback_data="home:daily")],
+        [InlineKeyboardButton("👤 Profile", callback_data="home:profile")],
+        [InlineKeyboardButton("🏆 Leaderboards", callback_data="home:leaderboard")],
     ])
 
 # ==========================================================
@@ -58,10 +60,10 @@ async def safe_edit(message, text, markup=None):
 # ==========================================================
 def init_start(bot: Client):
 
-    @bot.on_message(filters.command("start"))
+    @commands.command("start")
     async def start_cmd(_, msg: Message):
         try:
-            create_user_if_not_exists(msg.from_user.id, msg.from_user.first_name)
+            await create_user_if_not_exists(msg.from_user.id, msg.from_user.first_name)
 
             args = msg.command[1:] if len(msg.command) > 1 else []
 
@@ -123,7 +125,7 @@ def init_start(bot: Client):
     # ======================================================
     # 📌 HELP CENTER BUTTON
     # ======================================================
-    @bot.on_callback_query(filters.regex("^help_show$"))
+    @router.route("home", "help")
     async def help_show(_, q):
         try:
             commands_text = (
@@ -154,7 +156,7 @@ def init_start(bot: Client):
             )
 
             kb = InlineKeyboardMarkup([
-                [InlineKeyboardButton("🔙 Back", callback_data="back_to_home")]
+                [InlineKeyboardButton("🔙 Back", callback_data="home:show")]
             ])
 
             await safe_edit(q.message, commands_text, kb)
@@ -165,7 +167,7 @@ def init_start(bot: Client):
     # ======================================================
     # 📌 BACK TO HOME BUTTON
     # ======================================================
-    @bot.on_callback_query(filters.regex("^back_to_home$"))
+    @router.route("home", "show")
     async def back_to_home(_, q):
         await safe_edit(
             q.message,
@@ -1,7 +1,10 @@
-from pyrogram import Client, filters
+from pyrogram import Client
 from pyrogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery
-from database.mongo import users
-from utils.coins import total_bronze_value
+from database.leaderboard import wealth_board, messages_board, user_ranks
+from database.mongo import get_user
+from database.names import name_cache
+from utils.commands import commands
+from utils.router import router
 
 
 # -----------------------------
@@ -11,15 +14,31 @@ def leaderboard_menu():
     return InlineKeyboardMarkup(
         [
             [
-                InlineKeyboardButton("🏆 Top Wealth", callback_data="top_coins"),
-                InlineKeyboardButton("💬 Top Messages", callback_data="top_msgs")
+                InlineKeyboardButton("🏆 Top Wealth", callback_data="top:coins"),
+                InlineKeyboardButton("💬 Top Messages", callback_data="top:msgs")
             ]
         ]
     )
 
 
 def back_button():
-    return InlineKeyboardMarkup([[InlineKeyboardButton("⬅️ Back", callback_data="lb_back")]])
+    return InlineKeyboardMarkup([[InlineKeyboardButton("⬅️ Back", callback_data="top:back")]])
+
+
+def page_buttons(board: str, page: int, pages: int):
+    nav = []
+    if page > 0:
+        nav.append(InlineKeyboardButton("◀️ Prev", callback_data=f"top:{board}:{page - 1}"))
+    if page < pages - 1:
+        nav.append(InlineKeyboardButton("Next ▶️", callback_data=f"top:{board}:{page + 1}"))
+    rows = [nav] if nav else []
+    rows.append([InlineKeyboardButton("⬅️ Back", callback_data="top:back")])
+    return InlineKeyboardMarkup(rows)
+
+
+def requested_page(cq: CallbackQuery) -> int:
+    # "top:coins" from the menu, "top:coins:<n>" from Prev/Next
+    return int(cq.args) if cq.args.isdigit() else 0
 
 
 # -----------------------------
@@ -27,30 +46,36 @@ def back_button():
 # -----------------------------
 def init_top(bot: Client):
 
-    @bot.on_message(filters.command("leaderboard"))
+    @commands.command("leaderboard")
     async def show_menu(_, msg: Message):
         await msg.reply("📊 **Choose a leaderboard:**", reply_markup=leaderboard_menu())
 
+    # -----------------------------
+    # MY RANK
+    # -----------------------------
+    @commands.command("rank")
+    async def my_rank(_, msg: Message):
+        if not msg.from_user:
+            return
+        user = await get_user(msg.from_user.id)
+        ranks = await user_ranks(user)
+        await msg.reply(
+            f"📈 **Your Rank, {msg.from_user.first_name}**\n\n"
+            f"🏆 Wealth: `#{ranks['wealth']}` — 💰 `{user.get('wealth_bronze', 0)}`\n"
+            f"💬 Messages: `#{ranks['messages']}` — `{user.get('messages', 0)}` sent",
+            reply_markup=leaderboard_menu()
+        )
+
     # -----------------------------
     # TOP BY WEALTH
     # -----------------------------
-    @bot.on_callback_query(filters.regex("^top_coins$"))
+    @router.route("top", "coins")
     async def top_coins(client, cq: CallbackQuery):
 
         await cq.answer()
 
-        # Fetch all users safely
-        all_users = list(users.find({}))
-
-        ranked = []
-        for u in all_users:
-            try:
-                total = total_bronze_value(u)
-                ranked.append((u["_id"], total, u))
-            except:
-                continue
-
-        ranked = sorted(ranked, key=lambda x: x[1], reverse=True)[:10]
+        # Served from the in-memory snapshot; only the first ever view waits
+        ranked, page, pages, offset = await wealth_board.page(requested_page(cq))
 
         if not ranked:
             return await cq.message.edit(
@@ -58,15 +83,17 @@ def init_top(bot: Client):
                 reply_markup=back_button()
             )
 
-        text = "🏆 **Top Wealth Leaderboard**\n\n"
-        rank = 1
+        text = f"🏆 **Top Wealth Leaderboard** — page {page + 1}/{pages}\n\n"
+        rank = offset + 1
+
+        # One batched get_users for whatever the cache can't answer
+        name_cache.prime(ranked)
+        names = await name_cache.resolve(client, [data["_id"] for data in ranked])
 
-        for uid, total, data in ranked:
-            try:
-                tg_user = await client.get_users(int(uid))
-                name = tg_user.first_name
-            except:
-                name = f"User {uid}"
+        for data in ranked:
+            uid = data["_id"]
+            total = data.get("wealth_bronze", 0)
+            name = names[str(uid)]
 
             text += (
                 f"**{rank}. {name}**\n"
@@ -79,23 +106,17 @@ def init_top(bot: Client):
             )
             rank += 1
 
-        await cq.message.edit(text, reply_markup=back_button())
+        await cq.message.edit(text, reply_markup=page_buttons("coins", page, pages))
 
     # -----------------------------
     # TOP BY MESSAGES
     # -----------------------------
-    @bot.on_callback_query(filters.regex("^top_msgs$"))
+    @router.route("top", "msgs")
     async def top_msgs(client, cq: CallbackQuery):
 
         await cq.answer()
 
-        pipeline = [
-            {"$project": {"messages": 1}},
-            {"$sort": {"messages": -1}},
-            {"$limit": 10},
-        ]
-
-        top_list = list(users.aggregate(pipeline))
+        top_list, page, pages, offset = await messages_board.page(requested_page(cq))
 
         if not top_list:
             return await cq.message.edit(
@@ -103,27 +124,26 @@ def init_top(bot: Client):
                 reply_markup=back_button()
             )
 
-        text = "💬 **Top Message Senders**\n\n"
-        rank = 1
+        text = f"💬 **Top Message Senders** — page {page + 1}/{pages}\n\n"
+        rank = offset + 1
+
+        name_cache.prime(top_list)
+        names = await name_cache.resolve(client, [entry["_id"] for entry in top_list])
 
         for entry in top_list:
             uid = entry["_id"]
             msgs = entry.get("messages", 0)
-            try:
-                tg_user = await client.get_users(int(uid))
-                name = tg_user.first_name
-            except:
-                name = f"User {uid}"
+            name = names[str(uid)]
 
             text += f"**{rank}. {name}** — `{msgs}` messages\n"
             rank += 1
 
-        await cq.message.edit(text, reply_markup=back_button())
+        await cq.message.edit(text, reply_markup=page_buttons("msgs", page, pages))
 
     # -----------------------------
     # BACK BUTTON
     # -----------------------------
-    @bot.on_callback_query(filters.regex("^lb_back$"))
+    @router.route("top", "back")
     async def leaderboard_back(_, cq: CallbackQuery):
         await cq.answer()
         await cq.message.edit(
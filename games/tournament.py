@@ -0,0 +1,353 @@
+# File: games/tournament.py
+from pyrogram import Client, filters
+from pyrogram.types import Message
+from pyrogram.errors import FloodWait
+import asyncio
+import bisect
+import os
+import time
+
+from database.mongo import db, run_db, credit
+from games.guess import (
+    WORDS,
+    attempts_for,
+    can_answer,
+    compute_feedback,
+    extract_example,
+    pick_random_word,
+    pretty_hint,
+    quizzes,
+)
+from utils.commands import active, commands
+
+
+# ==========================================================
+# Settings
+# ==========================================================
+TOURNAMENT_MINUTES = int(os.getenv("TOURNAMENT_MINUTES", 10))
+# Min seconds between two edits of the same chat's scoreboard
+TOURNAMENT_EDIT_INTERVAL = float(os.getenv("TOURNAMENT_EDIT_INTERVAL", 5))
+# Cap on scoreboard edits per second across all chats (Telegram flood limits)
+TOURNAMENT_EDITS_PER_SEC = int(os.getenv("TOURNAMENT_EDITS_PER_SEC", 20))
+
+PRIZES = (500, 300, 150)  # Bronze for places 1-3
+BOARD_ROWS = 10
+MEDALS = ("🥇", "🥈", "🥉")
+PICK_TRIES = 20  # re-picks until the word is something a guess can spell
+
+
+def _guessable(text: str) -> bool:
+    # What counts as a guess in chat; tournament words must pass it too
+    return text.isalpha()
+
+# Chats that opted in with /tjoin (written only on join/leave)
+tournament_chats = db["tournament_chats"]
+
+
+# ==========================================================
+# Tournament state (event loop only, never touches the DB)
+# ==========================================================
+# One word, many chats. Players live in a dict, solvers in a list kept
+# sorted by (seconds, attempts), so a guess is O(log n) and ranks come
+# from bisect. Guesses are public messages, so only the first solve in
+# each chat is ranked: anyone after it may have seen the answer. Every
+# chat has one scoreboard message; a single refresher task re-renders
+# the board once per change and edits each chat at most every
+# TOURNAMENT_EDIT_INTERVAL seconds, oldest edit first.
+class Tournament:
+    def __init__(self, difficulty: str, word: str, hint: dict, minutes: int):
+        self.difficulty = difficulty
+        self.word = word.lower()
+        self.hint = hint
+        self.max_attempts = attempts_for(difficulty, word)
+        self.started_at = time.monotonic()
+        self.ends_at = self.started_at + minutes * 60
+        self.players = {}      # user_id -> {"name", "attempts", "done"}
+        self.ranking = []      # (seconds, attempts, user_id), best first
+        self.solved_in = {}    # chat_id -> user_id of its ranked solve
+        self.boards = {}       # chat_id -> scoreboard message id
+        self.version = 0       # bumped on every ranking change
+        self._shown = {}       # chat_id -> version on screen
+        self._edited_at = {}   # chat_id -> monotonic time of last edit
+        self._paused_until = 0.0
+        self._task = None
+        self.finished = False
+
+    # ---- players ----
+    def player(self, user) -> dict:
+        p = self.players.get(user.id)
+        if p is None:
+            p = self.players[user.id] = {"name": user.first_name or "Player", "attempts": 0, "done": False}
+        return p
+
+    def solve(self, chat_id: int, user_id: int, attempts: int):
+        """Record a solve; returns the player's rank (1-based), or None if the chat already had one."""
+        if chat_id in self.solved_in:
+            return None
+        self.solved_in[chat_id] = user_id
+        entry = (round(time.monotonic() - self.started_at, 1), attempts, user_id)
+        bisect.insort(self.ranking, entry)
+        self.version += 1
+        return bisect.bisect_left(self.ranking, entry) + 1
+
+    # ---- rendering ----
+    def render(self, final: bool = False) -> str:
+        left = max(0, int(self.ends_at - time.monotonic()))
+        solved = len(self.ranking)
+        lines = [f"🏆 **Word Tournament — {self.difficulty.title()}**"]
+        if final:
+            lines.append(f"🔚 The word was: `{self.word.upper()}`")
+        else:
+            lines.append(
+                f"Letters: {len(self.word)} • Attempts: {self.max_attempts} • "
+                f"⏳ {left // 60}m {left % 60:02d}s left"
+            )
+            example = extract_example(self.hint)
+            if example:
+                lines.append(f"💬 **Example:** _{example}_")
+        lines.append(f"👥 Players: {len(self.players)} • ✅ Solved: {solved}\n")
+
+        for i, (secs, attempts, uid) in enumerate(self.ranking[:BOARD_ROWS]):
+            mark = MEDALS[i] if i < len(MEDALS) else f"{i + 1}."
+            lines.append(f"{mark} {self.players[uid]['name']} — {secs:.1f}s ({attempts} tries)")
+        if not solved:
+            lines.append("_No one has solved it yet._")
+        if not final:
+            lines.append("\nSend your guess as a plain word in this chat! The first solve here is ranked.")
+        return "\n".join(lines)
+
+    # ---- scoreboard edits ----
+    def start(self, client: Client):
+        self._task = asyncio.get_running_loop().create_task(self._run(client))
+
+    async def _run(self, client: Client):
+        while not self.finished:
+            await asyncio.sleep(1)
+            if time.monotonic() >= self.ends_at:
+                await end_tournament(client)
+                return
+            try:
+                await self.refresh(client)
+            except Exception as e:
+                print(f"[tournament] refresh failed: {e}")
+
+    async def refresh(self, client: Client, final: bool = False):
+        now = time.monotonic()
+        if not final and now < self._paused_until:
+            return
+        due = [
+            c for c in self.boards
+            if final or (self._shown.get(c) != self.version
+                         and now - self._edited_at.get(c, 0) >= TOURNAMENT_EDIT_INTERVAL)
+        ]
+        if not due:
+            return
+        due.sort(key=lambda c: self._edited_at.get(c, 0))
+        if not final:
+            due = due[:TOURNAMENT_EDITS_PER_SEC]
+
+        text, version = self.render(final), self.version
+        sem = asyncio.Semaphore(TOURNAMENT_EDITS_PER_SEC)
+
+        async def edit(chat_id):
+            try:
+                async with sem:
+                    await client.edit_message_text(chat_id, self.boards[chat_id], text)
+            except FloodWait as e:
+                # Flood limits are per account: hold every edit, not just this chat
+                self._paused_until = time.monotonic() + e.value
+                return
+            except Exception:
+                pass  # deleted message, lost rights, "not modified"...
+            self._shown[chat_id] = version
+            self._edited_at[chat_id] = time.monotonic()
+
+        await asyncio.gather(*(edit(c) for c in due))
+
+
+current = None  # the running Tournament, if any
+
+
+async def _joined_chats() -> list:
+    docs = await run_db(lambda: list(tournament_chats.find({}, {"_id": 1})))
+    return [int(d["_id"]) for d in docs]
+
+
+async def _post_board(client: Client, t: Tournament, chat_id: int) -> bool:
+    try:
+        sent = await client.send_message(chat_id, t.render())
+    except Exception as e:
+        print(f"[tournament] could not post in {chat_id}: {e}")
+        return False
+    t.boards[chat_id] = sent.id
+    active.add("tournament", chat=chat_id)
+    t._shown[chat_id] = t.version
+    t._edited_at[chat_id] = time.monotonic()
+    return True
+
+
+async def end_tournament(client: Client):
+    global current
+    t, current = current, None
+    if t is None or t.finished:
+        return
+    t.finished = True
+    for chat_id in t.boards:
+        active.discard("tournament", chat=chat_id)
+
+    winners = t.ranking[:len(PRIZES)]
+    results = await asyncio.gather(
+        *(credit(uid, prize) for (_, _, uid), prize in zip(winners, PRIZES)),
+        return_exceptions=True,
+    )
+    for (_, _, uid), res in zip(winners, results):
+        if isinstance(res, Exception):
+            print(f"[tournament] prize for {uid} failed: {res}")
+
+    await t.refresh(client, final=True)
+    if winners:
+        names = ", ".join(
+            f"{MEDALS[i]} {t.players[uid]['name']} (+{PRIZES[i]} 🥉)"
+            for i, (_, _, uid) in enumerate(winners)
+        )
+        text = f"🏁 **Tournament over!** The word was `{t.word.upper()}`.\n{names}"
+    else:
+        text = f"🏁 **Tournament over!** Nobody found `{t.word.upper()}`."
+    await asyncio.gather(
+        *(client.send_message(c, text) for c in t.boards),
+        return_exceptions=True,
+    )
+
+
+# ==========================================================
+# Handlers
+# ==========================================================
+def init_tournament(bot: Client):
+
+    # ---------------------- opt in / out ----------------------
+    @commands.command("tjoin", filter=filters.group)
+    async def tjoin(client: Client, msg: Message):
+        await run_db(tournament_chats.update_one, {"_id": msg.chat.id},
+                     {"$set": {"title": msg.chat.title}}, upsert=True)
+        if current and msg.chat.id not in current.boards:
+            await _post_board(client, current, msg.chat.id)
+            return
+        await msg.reply("✅ This chat will receive word tournaments.")
+
+    @commands.command("tleave", filter=filters.group)
+    async def tleave(_, msg: Message):
+        await run_db(tournament_chats.delete_one, {"_id": msg.chat.id})
+        if current:
+            current.boards.pop(msg.chat.id, None)
+            active.discard("tournament", chat=msg.chat.id)
+        await msg.reply("👋 This chat left word tournaments.")
+
+    # ---------------------- owner: start / end ----------------------
+    @commands.command("tstart", filter=filters.me)
+    async def tstart(client: Client, msg: Message):
+        global current
+        if current:
+            return await msg.reply("A tournament is already running. Use /tend first.")
+
+        args = msg.command[1:]
+        difficulty = args[0].lower() if args and args[0].lower() in ("easy", "medium", "hard") else "medium"
+        minutes = TOURNAMENT_MINUTES
+        if len(args) > 1 and args[1].isdigit():
+            minutes = max(1, min(120, int(args[1])))
+
+        for _ in range(PICK_TRIES):
+            word, hint = await pick_random_word(difficulty)
+            if not word or _guessable(word):
+                break
+        if not word or not _guessable(word):
+            return await msg.reply("❌ No words found.")
+
+        chats = set(await _joined_chats())
+        if msg.chat.id < 0:  # started from a group: include it
+            chats.add(msg.chat.id)
+
+        t = current = Tournament(difficulty, word, hint, minutes)
+        # Broadcast, a few sends at a time
+        sem = asyncio.Semaphore(TOURNAMENT_EDITS_PER_SEC)
+
+        async def post(chat_id):
+            async with sem:
+                return await _post_board(client, t, chat_id)
+
+        posted = await asyncio.gather(*(post(c) for c in chats))
+        t.start(client)
+        await msg.reply(
+            f"🏁 Tournament started in **{sum(posted)}/{len(chats)}** chat(s) — "
+            f"{difficulty.title()}, {minutes} min. {pretty_hint(hint, len(word), t.max_attempts)}"
+        )
+
+    @commands.command("tend", filter=filters.me)
+    async def tend(client: Client, msg: Message):
+        if not current:
+            return await msg.reply("❌ No tournament is running.")
+        await end_tournament(client)
+
+    @commands.command("tboard")
+    async def tboard(_, msg: Message):
+        if not current:
+            return await msg.reply("❌ No tournament is running.")
+        await msg.reply(current.render())
+
+    # ---------------------- guesses (chats showing a board) ----------------------
+    def tournament_guess_filter(_, msg: Message) -> bool:
+        t = current
+        if not t or t.finished or msg.chat.id not in t.boards:
+            return False
+        text = (msg.text or "").strip()
+        if len(text) != len(t.word) or not _guessable(text):
+            return False
+        # A /guess quiz in answer mode owns this chat's plain words
+        quiz = quizzes.live.peek(str(msg.chat.id))
+        return not (quiz and quiz.get("answer_mode"))
+
+    @commands.text("tournament", order=3, filter=tournament_guess_filter)
+    async def tournament_answer(_, msg: Message):
+        t = current
+        user = msg.from_user
+        if not t or not user or user.is_bot:
+            return
+
+        p = t.player(user)
+        if p["done"] or not can_answer(user.id):
+            return
+
+        guess = msg.text.strip().lower()
+        if not await WORDS.is_valid(t.difficulty, guess):
+            return await msg.reply("This Word Is Not Corrct Please Try another word.")
+
+        p["attempts"] += 1
+        feedback = compute_feedback(guess, t.word)
+
+        if guess == t.word:
+            p["done"] = True
+            rank = t.solve(msg.chat.id, user.id, p["attempts"])
+            # Take the answer off the chat (needs delete rights); the
+            # result is a fresh message so no reply quote shows the word
+            try:
+                await msg.delete()
+            except Exception:
+                pass
+            name = user.first_name or "Player"
+            if rank is None:
+                first = t.players[t.solved_in[msg.chat.id]]["name"]
+                return await msg.reply(
+                    f"{feedback}\n✅ {name} solved it too, but {first} was first in this chat "
+                    "— only one solve per chat is ranked.",
+                    quote=False,
+                )
+            return await msg.reply(
+                f"{feedback}\n🎉 {name} **solved** it in {p['attempts']} tries — **#{rank}**! "
+                "Keep it secret 🤫",
+                quote=False,
+            )
+
+        if p["attempts"] >= t.max_attempts:
+            p["done"] = True
+            return await msg.reply(f"{feedback}\n**Out of attempts!** Wait for the reveal.")
+
+        await msg.reply(f"{feedback}\n🔢 Attempt: **{p['attempts']}/{t.max_attempts}**")
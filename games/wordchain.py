@@ -1,14 +1,27 @@
 # File: games/wordchain.py
 
-from pyrogram import Client, filters
+from pyrogram import Client
 from pyrogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
+from importlib import metadata
+import asyncio
+import os
+import pickle
+import random
+
+from utils.commands import active, commands
+from utils.router import router
+from utils.state import ExpiringDict
 
 # Prevent double import
 if "module_loaded_wordchain" in globals():
     raise SystemExit
 module_loaded_wordchain = True
 
-games = {}
+# chat_id -> game; a chain nobody plays for 6 hours is dropped
+games = ExpiringDict("wordchain_games", ttl=6 * 3600, max_size=5000)
+
+# After each accepted word the bot answers with one of its own
+BOT_PLAYS_BACK = True
 
 # ======================= SAFE EDIT =======================
 
@@ -22,18 +35,13 @@ async def safe_edit(message, text, markup=None):
         return
 
 
-# ======================= AUTO WORD LISTS =======================
-
-from geonamescache import GeonamesCache
-gc = GeonamesCache()
-CITIES = sorted({city["name"].lower() for city in gc.get_cities().values()})
-
-from wordfreq import top_n_list
+# ======================= WORD LISTS (lazy) =======================
+# Nothing is built at import. A category's list is made on first use,
+# in a worker thread, and pickled under WORDCHAIN_CACHE_DIR keyed by the
+# source library's version, so later starts just unpickle it.
 
-WORDLIST = top_n_list("en", n=50000)
-WORDSET = set(WORDLIST)
-
-NOUNS = [w for w in WORDLIST if len(w) > 2]
+WORDCHAIN_CACHE_DIR = os.getenv("WORDCHAIN_CACHE_DIR", os.path.join(".cache", "wordchain"))
+DATASET_FORMAT = 1  # bump when a builder below changes
 
 ANIMAL_SEEDS = {
     "lion", "tiger", "elephant", "cat", "dog", "rabbit", "cow", "goat", "monkey",
@@ -55,24 +63,133 @@ VEG_SEEDS = {
     "radish", "turnip", "garlic", "ginger", "chili", "pepper"
 }
 
-ANIMALS = sorted({w for w in WORDLIST if w in ANIMAL_SEEDS})
-FRUITS = sorted({w for w in WORDLIST if w in FRUIT_SEEDS})
-VEGETABLES = sorted({w for w in WORDLIST if w in VEG_SEEDS})
 
-WORDSETS = {
-    "cities": CITIES,
-    "nouns": NOUNS,
-    "animals": ANIMALS,
-    "fruits": FRUITS,
-    "vegetables": VEGETABLES,
+def _top_words() -> list:
+    from wordfreq import top_n_list
+    return top_n_list("en", n=50000)
+
+
+def _build_cities() -> list:
+    from geonamescache import GeonamesCache
+    return sorted({city["name"].lower() for city in GeonamesCache().get_cities().values()})
+
+
+def _build_nouns() -> list:
+    return [w for w in _top_words() if len(w) > 2]
+
+
+def _seeded(seeds: set):
+    return lambda: sorted({w for w in _top_words() if w in seeds})
+
+
+# category -> (library the words come from, builder)
+DATASETS = {
+    "cities": ("geonamescache", _build_cities),
+    "nouns": ("wordfreq", _build_nouns),
+    "animals": ("wordfreq", _seeded(ANIMAL_SEEDS)),
+    "fruits": ("wordfreq", _seeded(FRUIT_SEEDS)),
+    "vegetables": ("wordfreq", _seeded(VEG_SEEDS)),
 }
 
+class WordSet:
+    """
+    One category: the ordered list (first word, random picks), a
+    frozenset for O(1) validation and a first-letter -> words index for
+    the bot's replies.
+    """
+    __slots__ = ("words", "members", "by_letter")
+
+    def __init__(self, words: list):
+        self.words = words
+        self.members = frozenset(words)
+        by_letter = {}
+        for w in words:
+            by_letter.setdefault(w[:1], []).append(w)
+        self.by_letter = {c: tuple(ws) for c, ws in by_letter.items()}
+
+    def __contains__(self, word) -> bool:
+        return word in self.members
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def __getitem__(self, i):
+        return self.words[i]
+
+    def pick_reply(self, letter: str, used: set):
+        """A random unused word starting with `letter`, or None."""
+        options = self.by_letter.get(letter, ())
+        # Used words are a tiny share of a letter's bucket: a few random
+        # probes almost always hit, so the full filter is a rare fallback
+        for _ in range(min(8, len(options))):
+            w = random.choice(options)
+            if w not in used:
+                return w
+        options = [w for w in options if w not in used]
+        return random.choice(options) if options else None
+
+
+WORDSETS = {}   # category -> WordSet, filled by get_wordset()
+_loading = {}   # category -> future, so concurrent first uses share one build
+
+
+def _cache_path(mode: str) -> str:
+    lib = DATASETS[mode][0]
+    try:
+        version = metadata.version(lib)
+    except metadata.PackageNotFoundError:
+        version = "0"
+    return os.path.join(WORDCHAIN_CACHE_DIR, f"{mode}-{lib}-{version}-v{DATASET_FORMAT}.pkl")
+
+
+def _load_or_build(mode: str) -> WordSet:
+    # Only the plain list is pickled; the set and index are cheap to rebuild
+    path = _cache_path(mode)
+    try:
+        with open(path, "rb") as f:
+            return WordSet(pickle.load(f))
+    except (OSError, EOFError, pickle.UnpicklingError):
+        pass
+
+    words = DATASETS[mode][1]()
+    try:
+        os.makedirs(WORDCHAIN_CACHE_DIR, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(words, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"[wordchain] could not cache {mode}: {e}")
+    return WordSet(words)
+
+
+async def get_wordset(mode: str) -> WordSet:
+    """WordSet for a category (an empty one if unknown or the build failed)."""
+    words = WORDSETS.get(mode)
+    if words is not None:
+        return words
+    if mode not in DATASETS:
+        return WordSet([])
+
+    fut = _loading.get(mode)
+    if fut is None:
+        fut = _loading[mode] = asyncio.get_running_loop().run_in_executor(None, _load_or_build, mode)
+    try:
+        words = await fut
+    except Exception as e:
+        print(f"[wordchain] building {mode} failed: {e}")
+        return WordSet([])
+    finally:
+        _loading.pop(mode, None)
+    WORDSETS[mode] = words
+    return words
+
 # ======================= BOT HANDLERS =======================
 
 def init_wordchain(bot: Client):
 
     # =================== /end ===================
-    @bot.on_message(filters.command("end"), group=15)
+    @commands.command("end")
     async def stop_game(_, message: Message):
         chat_id = message.chat.id
 
@@ -81,22 +198,23 @@ def init_wordchain(bot: Client):
             return
 
         del games[chat_id]
+        active.discard("wordchain", chat=chat_id)
 
         await message.reply("**Word Chain game ended.**\nYou can start again using \new.")
 
     # =================== SELECT CATEGORY ===================
-    @bot.on_message(filters.command("new"), group=15)
+    @commands.command("new")
     async def choose_category(_, message: Message):
 
         keyboard = InlineKeyboardMarkup([
             [
-                InlineKeyboardButton("🏙 Cities", callback_data="wc_cities"),
-                InlineKeyboardButton("📘 Nouns", callback_data="wc_nouns"),
+                InlineKeyboardButton("🏙 Cities", callback_data="wc:start:cities"),
+                InlineKeyboardButton("📘 Nouns", callback_data="wc:start:nouns"),
             ],
             [
-                InlineKeyboardButton("🐾 Animals", callback_data="wc_animals"),
-                InlineKeyboardButton("🍎 Fruits", callback_data="wc_fruits"),
-                InlineKeyboardButton("🥬 Vegetables", callback_data="wc_vegetables"),
+                InlineKeyboardButton("🐾 Animals", callback_data="wc:start:animals"),
+                InlineKeyboardButton("🍎 Fruits", callback_data="wc:start:fruits"),
+                InlineKeyboardButton("🥬 Vegetables", callback_data="wc:start:vegetables"),
             ]
         ])
 
@@ -106,17 +224,18 @@ def init_wordchain(bot: Client):
         )
 
     # =================== START GAME ===================
-    @bot.on_callback_query(filters.regex(r"wc_"), group=15)
+    @router.route("wc", "start")
     async def start_game(_, cq: CallbackQuery):
 
-        mode = cq.data.replace("wc_", "")
-        dataset = WORDSETS.get(mode, [])
+        mode = cq.args
+        if mode not in DATASETS:
+            return await cq.answer("Unknown category.", show_alert=True)
+        dataset = await get_wordset(mode)
 
         if not dataset:
             await cq.answer("No words available for this category.", show_alert=True)
             return
 
-        import random
         first_word = random.choice(dataset)
         last_letter = first_word[-1]
 
@@ -125,6 +244,7 @@ def init_wordchain(bot: Client):
             "last": last_letter,
             "used": {first_word},
         }
+        active.add("wordchain", chat=cq.message.chat.id)
 
         await safe_edit(
             cq.message,
@@ -137,12 +257,12 @@ def init_wordchain(bot: Client):
         await cq.answer()
 
     # =================== PLAYER RESPONSE ===================
-    @bot.on_message(filters.text & ~filters.command(["new", "end"]), group=15)
+    @commands.text("wordchain", order=15)
     async def word_handler(_, message: Message):
 
         chat_id = message.chat.id
         if chat_id not in games:
-            return
+            return active.discard("wordchain", chat=chat_id)
 
         user_word = message.text.strip().lower()
         state = games[chat_id]
@@ -154,7 +274,7 @@ def init_wordchain(bot: Client):
             )
             return
 
-        dataset = WORDSETS[state["mode"]]
+        dataset = await get_wordset(state["mode"])
 
         if user_word not in dataset:
             await message.reply(
@@ -170,7 +290,29 @@ def init_wordchain(bot: Client):
         next_letter = user_word[-1]
         state["last"] = next_letter
 
+        if not BOT_PLAYS_BACK:
+            await message.reply(
+                f"✅ Correct!\n"
+                f"Now send a word starting with **{next_letter.upper()}**."
+            )
+            return
+
+        bot_word = dataset.pick_reply(next_letter, state["used"])
+        if bot_word is None:
+            games.pop(chat_id, None)
+            active.discard("wordchain", chat=chat_id)
+            await message.reply(
+                f"✅ Correct!\n"
+                f"🏳️ I have no {state['mode']} left starting with **{next_letter.upper()}** — you win!\n"
+                "Start again using /new."
+            )
+            return
+
+        state["used"].add(bot_word)
+        state["last"] = bot_word[-1]
+
         await message.reply(
             f"✅ Correct!\n"
-            f"Now send a word starting with **{next_letter.upper()}**."
+            f"Bot's word: **{bot_word}**\n\n"
+            f"➡️ Now send a word starting with **{state['last'].upper()}**."
         )
@@ -1,7 +1,8 @@
-from pyrogram import Client, filters
+from pyrogram import Client
 from pyrogram.types import Message
-from database.mongo import get_user, update_user
-from utils.cooldown import check_cooldown, update_cooldown
+from database.mongo import get_user, credit
+from utils.commands import commands
+from utils.cooldown import check_cooldown, cooldown_set
 import random
 import asyncio
 
@@ -19,14 +20,14 @@ WORK_TASKS = [
 
 def init_work(bot: Client):
 
-    @bot.on_message(filters.command("work"))
+    @commands.command("work")
     async def work_cmd(_, msg: Message):
 
         if not msg.from_user:
             return
 
         user_id = msg.from_user.id
-        user = get_user(user_id)
+        user = await get_user(user_id)
 
         # Cooldown: 5 minutes
         ok, wait, pretty = check_cooldown(user, "work", 300)
@@ -41,29 +42,20 @@ def init_work(bot: Client):
 
         # Reward System A (your choice): 1–100 Bronze
         reward = random.randint(1, 100)
-        new_bronze = user.get("bronze", 0) + reward
 
-        # Track work count for badges
-        work_count = user.get("work_done", 0) + 1
-        badges = user.get("badges", [])
-
-        # Unlock badge at 20 jobs
-        if work_count >= 20 and "🛠️" not in badges:
-            badges.append("🛠️")  # Work Master badge
-
-        # Update cooldown
-        new_cd = update_cooldown(user, "work")
-
-        # Update database
-        update_user(
-            user_id,
-            {
-                "bronze": new_bronze,
-                "cooldowns": new_cd,
-                "work_done": work_count,
-                "badges": badges
-            }
-        )
+        # Reward + work count + cooldown in one write; the 20th job also
+        # adds the Work Master badge there (work_done only ever grows, so
+        # the guard holds whenever the snapshot says it does)
+        work_update = {"$inc": {"work_done": 1}, "$set": cooldown_set("work")}
+        updated = None
+        if user.get("work_done", 0) >= 19:
+            updated = await credit(
+                user_id, reward,
+                update={**work_update, "$addToSet": {"badges": "🛠️"}},
+                where={"work_done": {"$gte": 19}},
+            )
+        if updated is None:
+            await credit(user_id, reward, update=work_update)
 
         # Final edit
         try:
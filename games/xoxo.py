@@ -1,6 +1,8 @@
 # File: games/xoxo.py
 
-from pyrogram import Client, filters
+import asyncio
+
+from pyrogram import Client
 from pyrogram.types import (
     Message,
     InlineKeyboardMarkup,
@@ -8,12 +10,19 @@ from pyrogram.types import (
     CallbackQuery,
 )
 
-from database.mongo import get_user, update_user
+from database.escrow import ESCROW_TTL, open_escrow, refund_escrow, settle_escrow
+from database.mongo import get_user
+from utils.commands import active, commands
+from utils.router import router
+from utils.state import ExpiringDict
+from utils.tictactoe import best_return, choose_move, winner
 
 # ==========================================================
 # In-memory state
 # ==========================================================
 
+# All three expire when idle, so abandoned challenges/games don't pile up
+
 # Active challenges (before game starts)
 # key: (chat_id, message_id)
 # value: {
@@ -21,32 +30,77 @@ from database.mongo import get_user, update_user
 #   "creator_name": str,
 #   "bet": int,
 # }
-xoxo_challenges = {}
+xoxo_challenges = ExpiringDict("xoxo_challenges", ttl=3600, max_size=5000)
 
 # Active games (after bet accepted)
 # key: (chat_id, message_id)
 # value: {
-#   "board": list[str],  # 9 cells: " ", "X", "O"
+#   "x": int, "o": int,  # bitboards, bit i = cell i (utils/tictactoe.py)
 #   "current": "X" | "O",
 #   "player_x_id": int,
 #   "player_x_name": str,
-#   "player_o_id": int,
+#   "player_o_id": int | None,   # None when O is the bot
 #   "player_o_name": str,
 #   "bet": int,
 #   "pot": int,
+#   "bot_level": "easy" | "hard" | None,
+#   "escrow_id": str,            # stakes held in database/escrow.py
 #   "finished": bool,
 # }
-xoxo_games = {}
+def _game_dropped(key, game, reason):
+    # Removed before it finished: hand the stakes back
+    if not game.get("finished"):
+        asyncio.get_running_loop().create_task(refund_escrow(game["escrow_id"]))
+
+
+# A game lives a fixed time from its start (reads use peek, which doesn't
+# refresh the ttl) and always ends before its escrow would expire: the
+# escrow sweep must never refund a game that can still be won.
+GAME_TTL = ESCROW_TTL - min(600, ESCROW_TTL // 10)
+xoxo_games = ExpiringDict("xoxo_games", ttl=GAME_TTL, max_size=5000, on_remove=_game_dropped)
+
+
+def _drop_game(key):
+    # ExpiringDict only calls on_remove on expiry/eviction: every other
+    # removal goes through here so an unsettled game is always refunded
+    game = xoxo_games.pop(key, None)
+    if game is not None:
+        _game_dropped(key, game, "dropped")
+
 
 # Waiting for bet change input
 # key: (chat_id, user_id) -> message_id of the challenge message
-xoxo_bet_wait = {}
+xoxo_bet_wait = ExpiringDict("xoxo_bet_wait", ttl=600, max_size=5000)
+
+
+# vs-bot levels: chance per move that the bot plays any free cell instead
+# of a perfect move, and what a win pays back (stake included). A draw
+# returns half the stake. Even a player who plays to exploit the bot's
+# known policy gets back less than they stake: about 0.957x on Easy and
+# 0.931x on Hard (utils.tictactoe.best_return, checked below).
+BOT_LEVELS = {
+    "easy": {"mistake_rate": 0.25, "win_multiplier": 1.4},
+    "hard": {"mistake_rate": 0.05, "win_multiplier": 4.0},
+}
+BOT_DRAW_REFUND = 0.5
+
+for _name, _lvl in BOT_LEVELS.items():
+    _ev = best_return(_lvl["mistake_rate"], _lvl["win_multiplier"], BOT_DRAW_REFUND)
+    if _ev >= 1:
+        raise ValueError(f"xoxo bot level {_name!r} pays {_ev:.4f}x to a perfect exploiter; keep it below 1")
 
 
 def _make_key(chat_id: int, message_id: int):
     return (int(chat_id), int(message_id))
 
 
+def _stake_line(game: dict) -> str:
+    bet, pot = game["bet"], game["pot"]
+    if game.get("bot_level"):
+        return f"💰 <b>Bet:</b> <code>{bet}</code> 🥉 vs the house"
+    return f"💰 <b>Bet:</b> <code>{bet}</code> 🥉 each (Pot: <code>{pot}</code> 🥉)"
+
+
 def _symbol_to_emoji(symbol: str) -> str:
     if symbol == "X":
         return "❌"
@@ -55,21 +109,25 @@ def _symbol_to_emoji(symbol: str) -> str:
     return "⬜"   # empty
 
 
-def _build_board_markup(board, finished: bool = False) -> InlineKeyboardMarkup:
+def _cell(x: int, o: int, idx: int) -> str:
+    return "X" if x >> idx & 1 else "O" if o >> idx & 1 else " "
+
+
+def _build_board_markup(x: int, o: int, finished: bool = False) -> InlineKeyboardMarkup:
     """
-    Build 3×3 inline keyboard.
-    When finished=True, cells use 'xoxo_done' so game can't continue.
+    Build 3×3 inline keyboard from the two bitboards.
+    When finished=True, cells use 'xoxo:done' so game can't continue.
     """
     rows = []
     for r in range(3):
         buttons = []
         for c in range(3):
             idx = r * 3 + c
-            text = _symbol_to_emoji(board[idx])
+            text = _symbol_to_emoji(_cell(x, o, idx))
             if finished:
-                data = "xoxo_done"
+                data = "xoxo:done"
             else:
-                data = f"xoxo_{idx}"
+                data = f"xoxo:cell:{idx}"
             buttons.append(InlineKeyboardButton(text, callback_data=data))
         rows.append(buttons)
     return InlineKeyboardMarkup(rows)
@@ -83,44 +141,23 @@ def _build_challenge_markup() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(
         [
             [
-                InlineKeyboardButton("✅ Accept Bet", callback_data="xoxo_accept"),
-                InlineKeyboardButton("❌ Decline", callback_data="xoxo_decline"),
+                InlineKeyboardButton("✅ Accept Bet", callback_data="xoxo:accept"),
+                InlineKeyboardButton("❌ Decline", callback_data="xoxo:decline"),
             ],
             [
-                InlineKeyboardButton("🔄 Change Bet", callback_data="xoxo_change"),
-                InlineKeyboardButton("🛑 Cancel", callback_data="xoxo_cancel"),
+                InlineKeyboardButton("🔄 Change Bet", callback_data="xoxo:change"),
+                InlineKeyboardButton("🛑 Cancel", callback_data="xoxo:cancel"),
             ],
         ]
     )
 
 
-def _check_winner(board):
-    """
-    Returns:
-        "X" | "O" | "draw" | None
-    """
-    wins = [
-        (0, 1, 2), (3, 4, 5), (6, 7, 8),  # rows
-        (0, 3, 6), (1, 4, 7), (2, 5, 8),  # cols
-        (0, 4, 8), (2, 4, 6),             # diagonals
-    ]
-
-    for a, b, c in wins:
-        if board[a] != " " and board[a] == board[b] == board[c]:
-            return board[a]
-
-    if " " not in board:
-        return "draw"
-
-    return None
-
-
 def init_xoxo(bot: Client):
 
     # ======================================================
     # /xoxo <bet> — create challenge
     # ======================================================
-    @bot.on_message(filters.command("xoxo"))
+    @commands.command("xoxo")
     async def cmd_xoxo(_, msg: Message):
         if not msg.from_user or msg.from_user.is_bot:
             return
@@ -145,7 +182,7 @@ def init_xoxo(bot: Client):
 
         # Check user's balance
         try:
-            user = get_user(msg.from_user.id)
+            user = await get_user(msg.from_user.id)
         except Exception:
             user = None
 
@@ -184,6 +221,69 @@ def init_xoxo(bot: Client):
             "bet": bet,
         }
 
+    # ======================================================
+    # /xoxobot <bet> [easy|hard] — solo game against the house
+    # ======================================================
+    @commands.command("xoxobot")
+    async def cmd_xoxobot(_, msg: Message):
+        if not msg.from_user or msg.from_user.is_bot:
+            return
+
+        args = msg.command[1:]
+        if not args or not args[0].isdigit() or int(args[0]) <= 0:
+            return await msg.reply(
+                "🤖 Usage: <code>/xoxobot &lt;bet_amount&gt; [easy|hard]</code>\n"
+                "Example: <code>/xoxobot 50 hard</code>\n\n"
+                + "\n".join(
+                    f"• <b>{name.title()}</b>: a win pays <b>{lvl['win_multiplier']:g}×</b> your bet"
+                    for name, lvl in BOT_LEVELS.items()
+                ) + f"\n• A draw returns <b>{BOT_DRAW_REFUND:.0%}</b> of it",
+                quote=True,
+            )
+
+        bet = int(args[0])
+        level = args[1].lower() if len(args) > 1 and args[1].lower() in BOT_LEVELS else "easy"
+
+        # Stake is held in escrow until the game settles
+        try:
+            escrow_id, short = await open_escrow("xoxo", {msg.from_user.id: bet})
+        except Exception:
+            return await msg.reply("Database error, try again later.", quote=True)
+        if short is not None:
+            return await msg.reply(
+                f"❌ You don't have enough Bronze.\nRequired: <b>{bet}</b> 🥉",
+                quote=True,
+            )
+
+        game = {
+            "x": 0,
+            "o": 0,
+            "current": "X",
+            "player_x_id": msg.from_user.id,
+            "player_x_name": msg.from_user.first_name,
+            "player_o_id": None,
+            "player_o_name": f"🤖 Bot ({level.title()})",
+            "bet": bet,
+            "pot": bet,
+            "bot_level": level,
+            "escrow_id": escrow_id,
+            "finished": False,
+        }
+        text = (
+            "❌⭕ <b>XO XO — vs Bot</b>\n\n"
+            f"❌ <b>X:</b> {game['player_x_name']}\n"
+            f"⭕ <b>O:</b> {game['player_o_name']}\n"
+            f"{_stake_line(game)}\n\n"
+            f"Turn: ❌ <b>{game['player_x_name']}</b>\n"
+            "Tap a square to play."
+        )
+        try:
+            sent = await msg.reply(text, reply_markup=_build_board_markup(0, 0), quote=True)
+        except Exception:
+            await refund_escrow(escrow_id)  # couldn't show the board
+            raise
+        xoxo_games[_make_key(sent.chat.id, sent.id)] = game
+
     # ======================================================
     # Challenge callback helpers
     # ======================================================
@@ -194,7 +294,7 @@ def init_xoxo(bot: Client):
         return key, xoxo_challenges.get(key)
 
     # ---------------------- Accept Bet ----------------------
-    @bot.on_callback_query(filters.regex(r"^xoxo_accept$"))
+    @router.route("xoxo", "accept")
     async def cb_xoxo_accept(_, cq: CallbackQuery):
         key, challenge = await _get_challenge(cq)
         if not challenge:
@@ -213,20 +313,22 @@ def init_xoxo(bot: Client):
         if opponent_id == challenger_id:
             return await cq.answer("You can't accept your own challenge.", show_alert=True)
 
-        # Check balances for both
+        # Claim the challenge first so a double tap can't charge twice
+        xoxo_challenges.pop(key, None)
+
+        # Lock both stakes in one escrow (all or nothing)
         try:
-            user_a = get_user(challenger_id)
-            user_b = get_user(opponent_id)
+            escrow_id, short = await open_escrow("xoxo", {challenger_id: bet, opponent_id: bet})
         except Exception:
-            user_a = user_b = None
-
-        if not user_a or not user_b:
-            return await cq.answer("⚠️ One of the players has no profile. Use /start.", show_alert=True)
+            xoxo_challenges[key] = challenge
+            return await cq.answer("Database error, try again later.", show_alert=True)
 
-        bronze_a = int(user_a.get("bronze", 0))
-        bronze_b = int(user_b.get("bronze", 0))
+        if short is not None:
+            user_a = await get_user(challenger_id)
+            user_b = await get_user(opponent_id)
+            bronze_a = int(user_a.get("bronze", 0))
+            bronze_b = int(user_b.get("bronze", 0))
 
-        if bronze_a < bet or bronze_b < bet:
             msg_text = "❌ Bet cannot be started due to low balance:\n\n"
             if bronze_a < bet:
                 msg_text += (
@@ -237,25 +339,15 @@ def init_xoxo(bot: Client):
                     f"• {opponent_name}: <b>{bronze_b}</b> 🥉 (needs {bet})\n"
                 )
             msg_text += "\nChallenge cancelled."
-            xoxo_challenges.pop(key, None)
             await cq.message.edit_text(msg_text)
             return await cq.answer("Insufficient balance.", show_alert=True)
 
-        # Deduct bet from both (lock pot)
-        try:
-            update_user(challenger_id, {"bronze": bronze_a - bet})
-            update_user(opponent_id, {"bronze": bronze_b - bet})
-        except Exception:
-            return await cq.answer("Database error, try again later.", show_alert=True)
-
-        # Remove challenge, start game
-        xoxo_challenges.pop(key, None)
-
-        board = [" "] * 9
+        # Start game
         pot = bet * 2
 
         xoxo_games[key] = {
-            "board": board,
+            "x": 0,
+            "o": 0,
             "current": "X",
             "player_x_id": challenger_id,
             "player_x_name": challenger_name,
@@ -263,6 +355,8 @@ def init_xoxo(bot: Client):
             "player_o_name": opponent_name,
             "bet": bet,
             "pot": pot,
+            "bot_level": None,
+            "escrow_id": escrow_id,
             "finished": False,
         }
 
@@ -277,12 +371,12 @@ def init_xoxo(bot: Client):
 
         await cq.message.edit_text(
             text,
-            reply_markup=_build_board_markup(board),
+            reply_markup=_build_board_markup(0, 0),
         )
         await cq.answer("Bet accepted, game started!")
 
     # ---------------------- Decline Bet ----------------------
-    @bot.on_callback_query(filters.regex(r"^xoxo_decline$"))
+    @router.route("xoxo", "decline")
     async def cb_xoxo_decline(_, cq: CallbackQuery):
         key, challenge = await _get_challenge(cq)
         if not challenge:
@@ -307,7 +401,7 @@ def init_xoxo(bot: Client):
         await cq.answer("Challenge declined.")
 
     # ---------------------- Cancel Challenge (anyone) ----------------------
-    @bot.on_callback_query(filters.regex(r"^xoxo_cancel$"))
+    @router.route("xoxo", "cancel")
     async def cb_xoxo_cancel(_, cq: CallbackQuery):
         key, challenge = await _get_challenge(cq)
         if not challenge:
@@ -329,7 +423,7 @@ def init_xoxo(bot: Client):
         await cq.answer("Challenge cancelled.")
 
     # ---------------------- Change Bet (anyone triggers) ----------------------
-    @bot.on_callback_query(filters.regex(r"^xoxo_change$"))
+    @router.route("xoxo", "change")
     async def cb_xoxo_change(_, cq: CallbackQuery):
         key, challenge = await _get_challenge(cq)
         if not challenge:
@@ -343,6 +437,7 @@ def init_xoxo(bot: Client):
 
         # Mark that this user is about to send a new bet
         xoxo_bet_wait[(int(chat_id), int(user_id))] = cq.message.id
+        active.add("xoxo", user=user_id)
 
         await cq.answer()
         await cq.message.reply(
@@ -350,25 +445,19 @@ def init_xoxo(bot: Client):
             quote=True,
         )
 
-    # ======================================================
-    # Message filter for bet change input
-    # ======================================================
-    def bet_wait_filter(_, __, msg: Message) -> bool:
-        if not msg.from_user:
-            return False
-        key = (int(msg.chat.id), int(msg.from_user.id))
-        return key in xoxo_bet_wait
-
-    bet_wait = filters.create(bet_wait_filter)
-
     # ---------------------- Handle new bet amount ----------------------
-    @bot.on_message(filters.text & bet_wait)
+    # Plain text from users who tapped "Change Bet"
+    @commands.text("xoxo", order=0)
     async def handle_bet_change(_, msg: Message):
+        if not msg.from_user:
+            return
         chat_id = int(msg.chat.id)
         user_id = int(msg.from_user.id)
         key_wait = (chat_id, user_id)
 
         msg_id = xoxo_bet_wait.pop(key_wait, None)
+        if not any(u == user_id for _, u in xoxo_bet_wait):
+            active.discard("xoxo", user=user_id)  # not waiting in another chat
         if msg_id is None:
             return
 
@@ -420,10 +509,10 @@ def init_xoxo(bot: Client):
         if not cq.message:
             return None, None
         key = _make_key(cq.message.chat.id, cq.message.id)
-        return key, xoxo_games.get(key)
+        return key, xoxo_games.peek(key)
 
     # ---------------------- Handle board taps ----------------------
-    @bot.on_callback_query(filters.regex(r"^xoxo_\d$"))
+    @router.route("xoxo", "cell")
     async def cb_xoxo_tap(_, cq: CallbackQuery):
         key, game = await _get_game(cq)
         if not game:
@@ -437,16 +526,16 @@ def init_xoxo(bot: Client):
             return await cq.answer("Game already finished.", show_alert=True)
 
         try:
-            idx = int(cq.data.split("_")[1])
-        except (IndexError, ValueError):
+            idx = int(cq.args)
+        except ValueError:
             return await cq.answer()
 
-        board = game["board"]
-        if idx < 0 or idx >= len(board):
+        if idx < 0 or idx > 8:
             return await cq.answer()
 
         # Cell already taken
-        if board[idx] != " ":
+        cell = 1 << idx
+        if (game["x"] | game["o"]) & cell:
             return await cq.answer("That spot is already taken.", show_alert=True)
 
         current = game["current"]  # "X" or "O"
@@ -461,84 +550,26 @@ def init_xoxo(bot: Client):
                 return await cq.answer("It's ⭕'s turn.", show_alert=True)
 
         # Apply move
-        board[idx] = current
+        if current == "X":
+            game["x"] |= cell
+        else:
+            game["o"] |= cell
 
         # Check outcome
-        result = _check_winner(board)
-
-        # -------------------- Game finished --------------------
-        if result in ("X", "O", "draw"):
-            game["finished"] = True
-            bet = game["bet"]
-            pot = game["pot"]
-            px_name = game["player_x_name"]
-            po_name = game["player_o_name"]
-            px_id = game["player_x_id"]
-            po_id = game["player_o_id"]
-
-            if result == "draw":
-                # Refund both
-                try:
-                    ux = get_user(px_id)
-                    uo = get_user(po_id)
-                    if ux:
-                        update_user(px_id, {"bronze": int(ux.get("bronze", 0)) + bet})
-                    if uo:
-                        update_user(po_id, {"bronze": int(uo.get("bronze", 0)) + bet})
-                except Exception:
-                    pass
-
-                text = (
-                    "❌⭕ <b>XO XO — Game Over</b>\n\n"
-                    f"❌ <b>X:</b> {px_name}\n"
-                    f"⭕ <b>O:</b> {po_name}\n"
-                    f"💰 <b>Bet:</b> <code>{bet}</code> 🥉 each (Pot: <code>{pot}</code> 🥉)\n\n"
-                    "🤝 It's a <b>draw</b>.\n"
-                    "Both players have been refunded their bet.\n\n"
-                    "Start a new match with /xoxo."
-                )
+        result = winner(game["x"], game["o"])
 
-                await cq.message.edit_text(
-                    text,
-                    reply_markup=_build_board_markup(board, finished=True),
-                )
-                xoxo_games.pop(key, None)
-                return await cq.answer("Draw!")
-
-            # There is a winner
-            winner_symbol = result
-            winner_id = px_id if winner_symbol == "X" else po_id
-            winner_name = px_name if winner_symbol == "X" else po_name
-            winner_emoji = _symbol_to_emoji(winner_symbol)
-
-            # Give pot to winner
-            try:
-                uw = get_user(winner_id)
-                if uw:
-                    update_user(winner_id, {"bronze": int(uw.get("bronze", 0)) + pot})
-            except Exception:
-                pass
-
-            text = (
-                "❌⭕ <b>XO XO — Game Over</b>\n\n"
-                f"❌ <b>X:</b> {px_name}\n"
-                f"⭕ <b>O:</b> {po_name}\n"
-                f"💰 <b>Bet:</b> <code>{bet}</code> 🥉 each (Pot: <code>{pot}</code> 🥉)\n\n"
-                f"🏆 Winner: {winner_emoji} <b>{winner_name}</b>\n"
-                "The entire pot has been awarded to the winner.\n\n"
-                "Start a new match with /xoxo."
-            )
+        # vs bot: the reply is a table lookup, played in the same tap
+        if result is None and game.get("bot_level"):
+            level = BOT_LEVELS[game["bot_level"]]
+            game["o"] |= 1 << choose_move(game["x"], game["o"], level["mistake_rate"])
+            result = winner(game["x"], game["o"])
+        elif result is None:
+            game["current"] = "O" if current == "X" else "X"
 
-            await cq.message.edit_text(
-                text,
-                reply_markup=_build_board_markup(board, finished=True),
-            )
-            xoxo_games.pop(key, None)
-            return await cq.answer("Game over!")
+        if result is not None:
+            return await _finish_game(cq, key, game, result)
 
         # -------------------- Game continues --------------------
-        # Switch turn
-        game["current"] = "O" if current == "X" else "X"
         next_symbol = game["current"]
 
         if next_symbol == "X":
@@ -548,8 +579,6 @@ def init_xoxo(bot: Client):
             next_emoji = "⭕"
             next_name = game["player_o_name"]
 
-        bet = game["bet"]
-        pot = game["pot"]
         px_name = game["player_x_name"]
         po_name = game["player_o_name"]
 
@@ -557,19 +586,100 @@ def init_xoxo(bot: Client):
             "❌⭕ <b>XO XO — Ongoing Match</b>\n\n"
             f"❌ <b>X:</b> {px_name}\n"
             f"⭕ <b>O:</b> {po_name}\n"
-            f"💰 <b>Bet:</b> <code>{bet}</code> 🥉 each (Pot: <code>{pot}</code> 🥉)\n\n"
+            f"{_stake_line(game)}\n\n"
             f"Turn: {next_emoji} <b>{next_name}</b>\n"
             "Tap a square to play."
         )
 
         await cq.message.edit_text(
             text,
-            reply_markup=_build_board_markup(board),
+            reply_markup=_build_board_markup(game["x"], game["o"]),
         )
         await cq.answer()
 
+    # -------------------- Game finished --------------------
+    async def _settle(game: dict, payouts: dict) -> str:
+        """
+        One release of the escrow. Returns "" when paid, else a line
+        telling the players what happened to their stakes.
+        """
+        try:
+            if await settle_escrow(game["escrow_id"], payouts):
+                return ""
+            print(f"[xoxo] escrow {game['escrow_id']} was already released")
+            return "\n\n⚠️ <b>No payout:</b> this game ran past its deadline and its stakes were already refunded."
+        except Exception as e:
+            # Still held: the escrow sweep refunds it once it expires
+            print(f"[xoxo] settle {game['escrow_id']} failed: {e}")
+            return "\n\n⚠️ <b>Payout failed.</b> The stakes are held safely and will be refunded automatically."
+
+    async def _finish_game(cq: CallbackQuery, key, game: dict, result: str):
+        game["finished"] = True
+        bet = game["bet"]
+        pot = game["pot"]
+        px_name = game["player_x_name"]
+        po_name = game["player_o_name"]
+        px_id = game["player_x_id"]
+        po_id = game["player_o_id"]
+        board = _build_board_markup(game["x"], game["o"], finished=True)
+        header = (
+            "❌⭕ <b>XO XO — Game Over</b>\n\n"
+            f"❌ <b>X:</b> {px_name}\n"
+            f"⭕ <b>O:</b> {po_name}\n"
+            f"{_stake_line(game)}\n\n"
+        )
+
+        if game.get("bot_level"):
+            # House game: the player (X) staked `bet`, the bot nothing
+            if result == "X":
+                payout = int(bet * BOT_LEVELS[game["bot_level"]]["win_multiplier"])
+                outcome = "🏆 You beat the bot!"
+                paid = f" <b>+{payout}</b> 🥉 paid out."
+            elif result == "draw":
+                payout = int(bet * BOT_DRAW_REFUND)
+                outcome = "🤝 It's a <b>draw</b>."
+                paid = f" <b>{payout}</b> 🥉 of your bet comes back."
+            else:
+                payout = 0
+                outcome = "🤖 The bot wins."
+                paid = " Better luck next time!"
+            unpaid = await _settle(game, {px_id: payout})
+            await cq.message.edit_text(
+                header + outcome + (unpaid or paid) + "\n\nPlay again with /xoxobot.",
+                reply_markup=board,
+            )
+            _drop_game(key)
+            return await cq.answer("Game over!")
+
+        if result == "draw":
+            unpaid = await _settle(game, {px_id: bet, po_id: bet})
+
+            text = header + "🤝 It's a <b>draw</b>." + (
+                unpaid or "\nBoth players have been refunded their bet."
+            ) + "\n\nStart a new match with /xoxo."
+
+            await cq.message.edit_text(text, reply_markup=board)
+            _drop_game(key)
+            return await cq.answer("Draw!")
+
+        # There is a winner
+        winner_symbol = result
+        winner_id = px_id if winner_symbol == "X" else po_id
+        winner_name = px_name if winner_symbol == "X" else po_name
+        winner_emoji = _symbol_to_emoji(winner_symbol)
+
+        unpaid = await _settle(game, {winner_id: pot})
+
+        text = header + f"🏆 Winner: {winner_emoji} <b>{winner_name}</b>" + (
+            unpaid or "\nThe entire pot has been awarded to the winner."
+        ) + "\n\nStart a new match with /xoxo."
+
+        await cq.message.edit_text(text, reply_markup=board)
+        _drop_game(key)
+        return await cq.answer("Game over!")
+
     # ---------------------- Finished board tap ----------------------
-    @bot.on_callback_query(filters.regex(r"^xoxo_done$"))
+    @router.route("xoxo", "done")
     async def cb_xoxo_done(_, cq: CallbackQuery):
         await cq.answer("Game already finished. Start a new one with /xoxo.")
         # No further action
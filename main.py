@@ -1,17 +1,21 @@
 # File: GameBot/main.py
 
-from pyrogram import Client
+from pyrogram import Client, idle
 import importlib
 import traceback
-from config import API_ID, API_HASH, STRING_SESSION
-from database.mongo import client  # ensure MongoDB loads first
+from config import API_ID, API_HASH, STRING_SESSION, WORKERS
+from database.mongo import client, migrate_users, ensure_indexes, write_behind, SCHEMA_VERSION  # ensure MongoDB loads first
+from database.escrow import recover_escrows
+from database.gamestate import close_stores
+from utils.commands import commands
+from utils.router import router
 
 bot = Client(
     name="GameUserBot",
     api_id=API_ID,
     api_hash=API_HASH,
     session_string=STRING_SESSION,
-    workers=1
+    workers=WORKERS
 )
 
 
@@ -54,20 +58,46 @@ required_modules = [
     "wordchain",
     "xoxo",
     "guess",
-    "callbacks"
+    "tournament",
+    "callbacks",
+    "messages"
 ]
 
 optional_modules = []
 
 
+async def run_bot():
+    await bot.start()
+    print("✔ GameUserBot is running with MongoDB!")
+    try:
+        await idle()
+    finally:
+        await bot.stop()
+        # Running games (e.g. /guess quizzes) are restored after the restart
+        await close_stores()
+        # Shutdown hook: persist buffered counters once no more updates arrive
+        await write_behind.close()
+        print(f"[write-behind] flushed on shutdown {write_behind.stats()}")
+
+
 if __name__ == "__main__":
     print("Initializing GameUserBot...")
 
+    upgraded = migrate_users()
+    print(f"[migrate] {upgraded} user(s) upgraded to schema v{SCHEMA_VERSION}")
+    ensure_indexes()
+    # Wagers in flight at shutdown have no game any more: give stakes back
+    print(f"[escrow] {recover_escrows()} escrow(s) recovered")
+
     for module in required_modules:
         safe_init(module)
 
     for module in optional_modules:
         safe_init(module)
 
-    print("✔ GameUserBot is running with MongoDB!")
-    bot.run()
+    # One handler each for every module's commands/text and buttons
+    # (utils/commands.py, utils/router.py)
+    commands.install(bot)
+    router.install(bot)
+
+    bot.run(run_bot())
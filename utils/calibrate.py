@@ -0,0 +1,178 @@
+# File: utils/calibrate.py
+
+"""
+Offline difficulty calibration for the /guess word pools (a build
+step, like utils/wordassets.py; the output is committed).
+
+For every length bucket of every pool, a greedy entropy solver (guesses
+drawn from the words still possible, like a player would) builds one
+decision tree with LengthIndex.partition. Each word's score is the
+number of guesses the solver needs to find it. Results go next to the
+source JSON as <Pool>.calib.json:
+
+    {"solver": "entropy-hard", "mean": 3.61, "words": {"aback": 4, ...}}
+
+games/guess.py reads them through WordIndex.effort() and scales reward
+and attempt limits per word. Work is split across processes: first the
+root guess of each bucket (guess candidates chunked over workers), then
+each root branch as its own task.
+
+    python -m utils.calibrate [--workers N] [--max-guesses 3000]
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import time
+
+from utils.feedback import all_green
+from utils.wordindex import LengthIndex, _build
+from utils.wordassets import calibration_path, load_pool
+
+
+ASSETS_DIR = os.path.join("games", "assets")
+POOLS = ("Easy", "Medium", "Hard")
+
+SOLVER = "entropy-hard"
+
+
+# ---------------------------
+# SOLVER
+# ---------------------------
+
+def _members(mask: int) -> list:
+    """Bit numbers set in `mask`, in one pass over its binary string."""
+    bits = bin(mask)[:1:-1]
+    return [k for k, b in enumerate(bits) if b == "1"]
+
+
+def _entropy(index: LengthIndex, guess: str, mask: int, total: int) -> float:
+    h = 0.0
+    for part in index.partition(guess, mask).values():
+        p = LengthIndex.count(part) / total
+        h -= p * math.log2(p)
+    return h
+
+
+def best_guess(index: LengthIndex, mask: int, guesses=None) -> str:
+    """Highest-entropy guess among `guesses` (default: the words in `mask`)."""
+    total = LengthIndex.count(mask)
+    guesses = guesses if guesses is not None else [index.words[k] for k in _members(mask)]
+    # Ties go to the alphabetically first word so runs are reproducible
+    return max(guesses, key=lambda g: (_entropy(index, g, mask, total), [-ord(c) for c in g]))
+
+
+def _spread(words: list, limit: int) -> list:
+    """At most `limit` guess candidates, evenly spaced through the list."""
+    if len(words) <= limit:
+        return words
+    step = len(words) / limit
+    return [words[int(i * step)] for i in range(limit)]
+
+
+def solve(index: LengthIndex, mask: int, depth: int, out: dict, max_guesses: int):
+    """Fill out[word] = guesses needed, for every word in `mask`."""
+    members = _members(mask)
+    if len(members) == 1:
+        out[index.words[members[0]]] = depth + 1
+        return
+    guess = best_guess(index, mask, _spread([index.words[k] for k in members], max_guesses))
+    solved = all_green(len(guess))
+    for code, part in index.partition(guess, mask).items():
+        if code == solved:
+            out[guess] = depth + 1
+        else:
+            solve(index, part, depth + 1, out, max_guesses)
+
+
+# ---------------------------
+# WORKERS
+# ---------------------------
+
+_INDEXES = {}
+
+
+def _load(pool: str) -> dict:
+    """{length: LengthIndex} for one pool, cached per process."""
+    if pool not in _INDEXES:
+        _INDEXES[pool] = _build(load_pool(os.path.join(ASSETS_DIR, f"{pool}.json")))[2]
+    return _INDEXES[pool]
+
+
+def _root_chunk(job):
+    pool, length, guesses = job
+    index = _load(pool)[length]
+    guess = best_guess(index, index.all, guesses)
+    return guess, _entropy(index, guess, index.all, len(index.words))
+
+
+def _branch(job):
+    pool, length, mask, max_guesses = job
+    out = {}
+    solve(_load(pool)[length], mask, 1, out, max_guesses)
+    return pool, out
+
+
+# ---------------------------
+# DRIVER
+# ---------------------------
+
+def calibrate(workers: int = None, max_guesses: int = 3000) -> dict:
+    """Score every word in every pool; returns {pool: {word: guesses}}."""
+    workers = workers or os.cpu_count() or 1
+    buckets = [(pool, n) for pool in POOLS for n in sorted(_load(pool))]
+
+    with multiprocessing.Pool(workers) as procs:
+        # Phase 1: each bucket's opening guess, candidates chunked over workers
+        roots = {}
+        jobs, owners = [], []
+        for pool, n in buckets:
+            words = _spread(_load(pool)[n].words, max_guesses)
+            size = max(1, math.ceil(len(words) / workers))
+            for i in range(0, len(words), size):
+                jobs.append((pool, n, words[i:i + size]))
+                owners.append((pool, n))
+        for owner, (guess, h) in zip(owners, procs.map(_root_chunk, jobs)):
+            if owner not in roots or h > roots[owner][1]:
+                roots[owner] = (guess, h)
+
+        # Phase 2: every branch under each opening guess is independent
+        scores = {pool: {} for pool in POOLS}
+        branches = []
+        for (pool, n), (guess, _) in roots.items():
+            index = _load(pool)[n]
+            for code, part in index.partition(guess).items():
+                if code == all_green(n):
+                    scores[pool][guess] = 1
+                else:
+                    branches.append((pool, n, part, max_guesses))
+        for pool, out in procs.imap_unordered(_branch, branches):
+            scores[pool].update(out)
+    return scores
+
+
+def write(scores: dict):
+    for pool, words in scores.items():
+        path = calibration_path(os.path.join(ASSETS_DIR, f"{pool}.json"))
+        mean = sum(words.values()) / len(words) if words else 0
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"solver": SOLVER, "mean": round(mean, 3), "words": dict(sorted(words.items()))},
+                f, ensure_ascii=False, separators=(",", ":"),
+            )
+        print(f"[calibrate] {pool}: {len(words)} words, mean {mean:.2f} guesses -> {path}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--max-guesses", type=int, default=3000,
+                    help="guess candidates evaluated per node (evenly sampled above this)")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    result = calibrate(args.workers, args.max_guesses)
+    write(result)
+    print(f"[calibrate] done in {time.perf_counter() - t0:.1f}s")
@@ -19,6 +19,14 @@ BRONZE_PER_SILVER = 100
 BRONZE_PER_GOLD = BRONZE_PER_SILVER * 100        # 10,000
 BRONZE_PER_PLATINUM = BRONZE_PER_GOLD * 100      # 1,000,000
 
+# Bronze value of one unit of each ranked currency (black gold excluded)
+BRONZE_RATES = {
+    "platinum": BRONZE_PER_PLATINUM,
+    "gold": BRONZE_PER_GOLD,
+    "silver": BRONZE_PER_SILVER,
+    "bronze": 1,
+}
+
 
 # ---------------------------
 # STRUCTURED BREAKDOWN
@@ -79,3 +87,16 @@ def total_bronze_value(user: dict) -> int:
         silver * BRONZE_PER_SILVER +
         bronze
     )
+
+
+def bronze_delta(changes: dict) -> int:
+    """
+    Bronze value of a set of balance changes, e.g. an $inc document:
+        bronze_delta({"gold": 1, "silver": -50}) -> 5000
+    Non-currency keys are ignored.
+    """
+    return sum(
+        int(n) * BRONZE_RATES[k]
+        for k, n in changes.items()
+        if k in BRONZE_RATES
+    )
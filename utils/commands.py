@@ -0,0 +1,281 @@
+# File: utils/commands.py
+
+"""
+One message handler in front of every module's commands and free text.
+
+    from utils.commands import commands, active
+
+    @commands.command("flip")                  # /flip, /flip@me
+    async def flip_cmd(client, msg): ...
+
+    @commands.command("tstart", filter=filters.me)
+    async def tstart(client, msg): ...
+
+    @commands.text("wordchain", order=15)      # plain text in an active chat
+    async def word_handler(client, msg): ...
+
+    active.add("wordchain", chat=chat_id)      # game started
+    active.discard("wordchain", chat=chat_id)  # game over
+
+A command is parsed once (prefix "/", case-insensitive, "@username" of
+this account allowed) and looked up in a dict; msg.command is set the way
+Pyrogram's filters.command sets it. Text that isn't a command only reaches
+the modules `active` lists for that chat or sender, in `order` (what used
+to be the handler group). Marks may go stale: every text handler still
+checks its own state and returns if the game is gone. Handlers run in
+the chat's and sender's update queues (utils/locks.py).
+
+Two modules may share a command name if one of them passes `when=<text
+consumer name>`: it wins in chats where that module is active (/new starts
+a new quiz word during a quiz, a word-chain category pick otherwise).
+"""
+
+import asyncio
+import inspect
+import os
+import re
+import time
+import traceback
+
+from pyrogram import Client, filters as pyro_filters
+from pyrogram.handlers import MessageHandler
+from pyrogram.types import Message
+
+from utils.locks import update_queues
+from utils.state import ExpiringDict
+
+
+# How long a chat/user stays in the active index without any game touching it
+ACTIVE_TTL = int(os.getenv("ACTIVE_TTL", 172800))
+ACTIVE_MAX = int(os.getenv("ACTIVE_MAX", 50000))
+# How often per-command latency is logged (seconds, 0 = never)
+COMMANDS_REPORT_INTERVAL = float(os.getenv("COMMANDS_REPORT_INTERVAL", 3600))
+
+PREFIX = "/"
+_ARG_RE = re.compile(r'([\"\'])(.*?)(?<!\\)\1|(\S+)')  # as pyrogram's filters.command
+
+
+def parse_args(text: str) -> list:
+    """Split command arguments the way filters.command does (quotes group words)."""
+    return [re.sub(r"\\([\"'])", r"\1", m.group(2) or m.group(3) or "") for m in _ARG_RE.finditer(text)]
+
+
+# -------------------------------------------------
+# ACTIVE GAMES INDEX
+# -------------------------------------------------
+class ActiveIndex:
+    """chat id / user id -> names of modules with live state there."""
+
+    def __init__(self):
+        self.chats = ExpiringDict("active_chats", ttl=ACTIVE_TTL, max_size=ACTIVE_MAX)
+        self.users = ExpiringDict("active_users", ttl=ACTIVE_TTL, max_size=ACTIVE_MAX)
+
+    @staticmethod
+    def _scopes(chat, user):
+        if chat is not None:
+            yield "chats", int(chat)
+        if user is not None:
+            yield "users", int(user)
+
+    def add(self, name: str, *, chat=None, user=None):
+        for scope, key in self._scopes(chat, user):
+            table = getattr(self, scope)
+            names = table.get(key)
+            if names is None:
+                table[key] = names = set()
+            names.add(name)
+
+    def discard(self, name: str, *, chat=None, user=None):
+        for scope, key in self._scopes(chat, user):
+            table = getattr(self, scope)
+            names = table.peek(key)
+            if names is not None:
+                names.discard(name)
+                if not names:
+                    table.pop(key, None)
+
+    def lookup(self, chat_id, user_id) -> set:
+        found = set()
+        if chat_id is not None:
+            found |= self.chats.get(chat_id) or set()
+        if user_id is not None:
+            found |= self.users.get(user_id) or set()
+        return found
+
+
+active = ActiveIndex()
+
+
+# -------------------------------------------------
+# DISPATCHER
+# -------------------------------------------------
+class _Entry:
+    __slots__ = ("name", "handler", "filter", "when", "order", "calls", "errors", "total", "max")
+
+    def __init__(self, name, handler, flt, when=None, order=0):
+        self.name, self.handler, self.filter = name, handler, flt
+        self.when, self.order = when, order
+        self.calls = self.errors = 0
+        self.total = self.max = 0.0
+
+
+class CommandDispatcher:
+    def __init__(self):
+        self._commands = {}     # "flip" -> [_Entry], `when` entries first
+        self._text = {}         # consumer name -> _Entry
+        self._warm = []         # coroutines seeding `active` once, e.g. after a restart
+        self._warmed = None
+        self._last_report = time.monotonic()
+
+    # ---- registration ----
+    def command(self, *names: str, filter=None, when: str = None):
+        """Decorator: handle /name for each of `names`."""
+        def register(fn):
+            for name in names:
+                name = name.lower()
+                entries = self._commands.setdefault(name, [])
+                if any(e.when == when for e in entries):
+                    raise ValueError(f"/{name} registered twice" + (f" for {when}" if when else ""))
+                entries.append(_Entry(f"/{name}" + (f"[{when}]" if when else ""), fn, filter, when))
+                entries.sort(key=lambda e: e.when is None)
+            return fn
+        return register
+
+    def text(self, name: str, order: int = 0, filter=None, warm=None):
+        """
+        Decorator: free text from chats/users where `name` is active.
+        `warm` (optional coroutine function) runs once before the first
+        text dispatch, to mark state that outlived a restart.
+        """
+        def register(fn):
+            if name in self._text:
+                raise ValueError(f"text consumer {name} registered twice")
+            self._text[name] = _Entry(name, fn, filter, order=order)
+            self._text = dict(sorted(self._text.items(), key=lambda kv: kv[1].order))
+            if warm is not None:
+                self._warm.append(warm)
+            return fn
+        return register
+
+    def install(self, bot: Client, group: int = 0):
+        bot.add_handler(MessageHandler(self.dispatch, pyro_filters.text | pyro_filters.caption), group)
+
+    # ---- dispatch ----
+    async def dispatch(self, client: Client, msg: Message):
+        text = msg.text or msg.caption or ""
+        if text.startswith(PREFIX):
+            return await self._dispatch_command(client, msg, text)
+        if not msg.text:
+            return
+        if self._warmed is None:
+            self._warmed = asyncio.ensure_future(self._run_warm())
+        if not self._warmed.done():
+            await asyncio.shield(self._warmed)
+
+        chat_id = msg.chat.id if msg.chat else None
+        user_id = msg.from_user.id if msg.from_user else None
+        names = active.lookup(chat_id, user_id)
+        if not names:
+            return
+        # One update at a time per chat and per user (utils/locks.py)
+        tail = update_queues.enter(chat_id, user_id)
+        if tail is None:
+            return await update_queues.submit((chat_id, user_id), self._run_text, names, client, msg)
+        try:
+            await self._run_text(names, client, msg)
+        finally:
+            update_queues.leave(chat_id, user_id, tail)
+
+    async def _run_text(self, names, client, msg):
+        # Same order the old handler groups ran in; each consumer sees the message
+        for name, entry in self._text.items():
+            if name in names:
+                await self._run(entry, client, msg)
+
+    async def _dispatch_command(self, client, msg, text):
+        head, rest = (text[len(PREFIX):].split(None, 1) + ["", ""])[:2]
+        # "/Bal@MyBot" -> "bal": names are case-insensitive, as with filters.command
+        name, _, target = head.partition("@")
+        name = name.lower()
+        if target:
+            me = getattr(client, "me", None)
+            if not me or not me.username or target.lower() != me.username.lower():
+                return  # addressed to someone else
+        entries = self._commands.get(name)
+        if not entries:
+            return
+
+        chat_id = msg.chat.id if msg.chat else None
+        user_id = msg.from_user.id if msg.from_user else None
+        names = None
+        for entry in entries:
+            if entry.when is not None:
+                if names is None:
+                    names = active.lookup(chat_id, user_id)
+                if entry.when not in names:
+                    continue
+            msg.command = [name] + parse_args(rest)
+            # One update at a time per chat and per user (utils/locks.py)
+            tail = update_queues.enter(chat_id, user_id)
+            if tail is None:
+                return await update_queues.submit((chat_id, user_id), self._run, entry, client, msg)
+            try:
+                await self._run(entry, client, msg)
+            finally:
+                update_queues.leave(chat_id, user_id, tail)
+            return True
+
+    async def _run(self, entry: _Entry, client, msg):
+        if entry.filter is not None:
+            ok = entry.filter(client, msg)
+            if inspect.isawaitable(ok):
+                ok = await ok
+            if not ok:
+                return
+        failed = False
+        t0 = time.perf_counter()
+        try:
+            await entry.handler(client, msg)
+        except Exception:
+            failed = True
+            print(f"[commands] {entry.name} failed")
+            traceback.print_exc()
+        finally:
+            took = time.perf_counter() - t0
+            entry.calls += 1
+            entry.errors += failed
+            entry.total += took
+            entry.max = max(entry.max, took)
+            if COMMANDS_REPORT_INTERVAL and time.monotonic() - self._last_report >= COMMANDS_REPORT_INTERVAL:
+                self._report()
+
+    async def _run_warm(self):
+        for warm in self._warm:
+            try:
+                await warm()
+            except Exception as e:
+                print(f"[commands] warm-up failed: {e}")
+
+    # ---- stats ----
+    def stats(self) -> dict:
+        """{"/cmd" or text consumer: calls / errors / avg_ms / max_ms}, busiest first."""
+        entries = [e for es in self._commands.values() for e in es] + list(self._text.values())
+        entries.sort(key=lambda e: -e.calls)
+        return {
+            e.name: {
+                "calls": e.calls,
+                "errors": e.errors,
+                "avg_ms": round(e.total / e.calls * 1000, 2),
+                "max_ms": round(e.max * 1000, 2),
+            }
+            for e in entries if e.calls
+        }
+
+    def _report(self):
+        self._last_report = time.monotonic()
+        busiest = list(self.stats().items())[:10]
+        line = " ".join(f"{name}={s['calls']}/{s['avg_ms']}ms" for name, s in busiest)
+        print(f"[commands] commands={len(self._commands)} text={len(self._text)} {line}")
+
+
+commands = CommandDispatcher()
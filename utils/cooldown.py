@@ -59,6 +59,14 @@ def update_cooldown(user: dict, cmd: str):
     return user
 
 
+def cooldown_set(cmd: str) -> dict:
+    """
+    `$set` fragment stamping a cooldown, for atomic wallet/update calls:
+        await credit(uid, 10, update={"$set": cooldown_set("flip")})
+    """
+    return {f"cooldowns.{cmd}": int(time.time())}
+
+
 def cleanup_cooldowns(user: dict, max_age_seconds: int = 604800):
     """
     Removes cooldowns older than max_age_seconds (default: 7 days).
@@ -0,0 +1,58 @@
+# File: utils/feedback.py
+
+"""
+Table-driven Wordle feedback.
+
+A result is one integer: digit i (base 3) is the mark for letter i,
+RED = 0, YELLOW = 1, GREEN = 2. Scoring is two fixed passes over the
+word (greens + leftover letter counts, then yellows over the misses
+only), and pattern codes compare / hash as plain ints.
+
+To split a whole candidate set by pattern (the calibration solver in
+utils/calibrate.py) use LengthIndex.partition in utils/wordindex.py.
+"""
+
+RED, YELLOW, GREEN = 0, 1, 2
+MARK_CHARS = "ryg"
+
+# POW3[i] = 3 ** i, enough for any word we will ever see
+POW3 = tuple(3 ** i for i in range(64))
+
+
+def all_green(length: int) -> int:
+    return (POW3[length] - 1)  # every digit == 2
+
+
+def pattern(guess: str, target: str) -> int:
+    """Duplicate-aware feedback code for one guess/target pair."""
+    if guess == target:
+        return all_green(len(guess))
+    code = 0
+    left = {}
+    misses = []
+    for i, (g, t) in enumerate(zip(guess, target)):
+        if g == t:
+            code += 2 * POW3[i]
+        else:
+            left[t] = left.get(t, 0) + 1
+            misses.append(i)
+    misses.extend(range(len(target), len(guess)))  # guess longer than target
+    for i in misses:
+        k = left.get(guess[i])
+        if k:
+            code += POW3[i]
+            left[guess[i]] = k - 1
+    return code
+
+
+def marks(code: int, length: int) -> str:
+    """Code -> "gyr" string, one char per letter."""
+    out = []
+    for _ in range(length):
+        code, digit = divmod(code, 3)
+        out.append(MARK_CHARS[digit])
+    return "".join(out)
+
+
+def from_marks(marks_str: str) -> int:
+    return sum("ryg".index(m) * POW3[i] for i, m in enumerate(marks_str))
@@ -0,0 +1,185 @@
+# File: utils/locks.py
+
+"""
+Per-chat / per-user update queues: updates for the same chat or the
+same user run one at a time, in arrival order; updates for unrelated
+chats run side by side.
+
+    from utils.locks import update_queues
+
+    tail = update_queues.enter(chat_id, user_id)    # None: a key is busy
+    if tail is None:
+        return await update_queues.submit((chat_id, user_id), handler, client, msg)
+    try:
+        await handler(client, msg)
+    finally:
+        update_queues.leave(chat_id, user_id, tail)
+
+utils/commands.py and utils/router.py run every handler this way, so
+game modules don't have to. Keys are plain chat and user ids (group
+chat ids are negative; a private chat's id is its user's, which is the
+same queue anyway). An update whose chat and user are idle runs right
+away in the Pyrogram worker that received it: enter()/leave() are two
+dict checks, no task, no future, no extra coroutine. One that has to
+wait is chained behind the last update of each of its keys as its own
+task, and the worker returns at once: a chat stuck behind /flip's 3 s
+animation never ties up the worker pool. Chains only ever point at
+earlier arrivals, so two updates can't deadlock.
+
+A key with UPDATE_QUEUE_MAX updates already waiting drops new ones
+(a spammed chat can't grow its backlog without bound).
+"""
+
+import asyncio
+import os
+import time
+
+
+# Updates allowed to wait per chat / user before new ones are dropped
+UPDATE_QUEUE_MAX = int(os.getenv("UPDATE_QUEUE_MAX", 50))
+# How often queue stats are logged (seconds, 0 = never)
+LOCKS_REPORT_INTERVAL = float(os.getenv("LOCKS_REPORT_INTERVAL", 3600))
+
+
+class KeyedQueues:
+    def __init__(self, name: str, max_waiting: int = UPDATE_QUEUE_MAX):
+        self.name = name
+        self.max_waiting = max_waiting
+        # key -> tail of its latest unfinished update. A tail is [future or
+        # None]: the future is only made once another update waits on it.
+        self._tails = {}
+        self._waiting = {}      # key -> updates chained behind it, not started yet
+        self.inline = 0         # ran straight away in the caller
+        self.deferred = 0       # chained behind a busy key
+        self.dropped = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self._last_report = time.monotonic()
+
+    def __len__(self):
+        return len(self._tails)
+
+    def busy(self, key) -> bool:
+        return key in self._tails
+
+    def enter(self, chat_id, user_id):
+        """
+        Fast path: if neither id has an unfinished update, mark both busy
+        and return the token to pass to leave(). Returns None otherwise
+        (or if an id is None); the caller then goes through submit().
+        """
+        tails = self._tails
+        if chat_id is None or user_id is None or chat_id in tails or user_id in tails:
+            return None
+        tails[chat_id] = tails[user_id] = tail = [None]
+        self.inline += 1
+        if not self.inline & 1023:
+            self._maybe_report()
+        return tail
+
+    def leave(self, chat_id, user_id, tail):
+        tails = self._tails
+        if tails.get(chat_id) is tail:
+            del tails[chat_id]
+        if tails.get(user_id) is tail:
+            del tails[user_id]
+        if tail[0] is not None:
+            tail[0].set_result(None)
+
+    async def submit(self, keys, fn, *args) -> bool:
+        """
+        Run `await fn(*args)` once every earlier update of `keys` is done.
+        Returns False if it was dropped, True once it ran or was queued.
+        """
+        keys = tuple(dict.fromkeys(k for k in keys if k is not None))
+        waiting = self._waiting
+        if any(waiting.get(k, 0) >= self.max_waiting for k in keys):
+            self.dropped += 1
+            return False
+
+        loop = asyncio.get_running_loop()
+        before = set()
+        for key in keys:
+            prev = self._tails.get(key)
+            if prev is not None:
+                if prev[0] is None:
+                    prev[0] = loop.create_future()
+                before.add(prev[0])
+        tail = [None]
+        for key in keys:
+            self._tails[key] = tail
+
+        if not before:
+            self.inline += 1
+            await self._run(keys, tail, fn, args)
+        else:
+            self.deferred += 1
+            for key in keys:
+                waiting[key] = waiting.get(key, 0) + 1
+            loop.create_task(self._run_after(before, keys, tail, fn, args))
+        return True
+
+    async def _run_after(self, before, keys, tail, fn, args):
+        t0 = time.perf_counter()
+        try:
+            await asyncio.wait(before)
+        except BaseException:
+            self._started(keys)
+            self._finish(keys, tail)  # cancelled while queued: don't block the keys
+            raise
+        self._started(keys)
+        waited = time.perf_counter() - t0
+        self.wait_total += waited
+        self.wait_max = max(self.wait_max, waited)
+        try:
+            await self._run(keys, tail, fn, args)
+        except Exception as e:
+            # Nobody awaits a queued update: log instead of losing it
+            print(f"[locks] queued update failed: {e!r}")
+
+    async def _run(self, keys, tail, fn, args):
+        try:
+            await fn(*args)
+        finally:
+            self._finish(keys, tail)
+
+    def _started(self, keys):
+        for key in keys:
+            left = self._waiting[key] - 1
+            if left:
+                self._waiting[key] = left
+            else:
+                del self._waiting[key]
+
+    def _finish(self, keys, tail):
+        for key in keys:
+            if self._tails.get(key) is tail:
+                del self._tails[key]
+        if tail[0] is not None:
+            tail[0].set_result(None)
+        self._maybe_report()
+
+    def _maybe_report(self):
+        if LOCKS_REPORT_INTERVAL and time.monotonic() - self._last_report >= LOCKS_REPORT_INTERVAL:
+            self._report()
+
+    def stats(self) -> dict:
+        return {
+            "busy_keys": len(self._tails),
+            "inline": self.inline,
+            "deferred": self.deferred,
+            "dropped": self.dropped,
+            "avg_wait_ms": round(self.wait_total / self.deferred * 1000, 2) if self.deferred else 0.0,
+            "max_wait_ms": round(self.wait_max * 1000, 2),
+        }
+
+    def _report(self):
+        self._last_report = time.monotonic()
+        s = self.stats()
+        print(
+            f"[locks] {self.name} busy={s['busy_keys']} inline={s['inline']} deferred={s['deferred']} "
+            f"dropped={s['dropped']} avg_wait={s['avg_wait_ms']}ms max_wait={s['max_wait_ms']}ms"
+        )
+
+
+update_queues = KeyedQueues("updates")
@@ -0,0 +1,146 @@
+# File: utils/router.py
+
+"""
+One callback-query handler for the whole bot.
+
+Button data is "namespace:action:args" ("xoxo:cell:4", "shop:item:Potion",
+"top:coins:2"; action and args are optional). The router splits it once
+and looks the handler up in a dict, so a tap costs the same however many
+modules are loaded, and a namespace can only ever reach its own module.
+
+    from utils.router import router
+
+    @router.route("xoxo", "accept")      # exactly xoxo:accept[:...]
+    async def cb_accept(client, cq): ...
+
+    @router.route("flip")                # any flip:<action> not routed above
+    async def cb_flip(client, cq):
+        choice = cq.action
+
+The handler finds the parsed parts on the query as `cq.action` and
+`cq.args` ("" when absent), in the chat's and tapper's update queues
+(utils/locks.py). main.py calls router.install(bot) once all
+modules have registered. Per-route call counts and latency are in
+router.stats() and logged every ROUTER_REPORT_INTERVAL seconds.
+"""
+
+import os
+import time
+import traceback
+
+from pyrogram import Client
+from pyrogram.handlers import CallbackQueryHandler
+from pyrogram.types import CallbackQuery
+
+from utils.locks import update_queues
+
+
+# How often dispatch latency per route is logged (seconds, 0 = never)
+ROUTER_REPORT_INTERVAL = float(os.getenv("ROUTER_REPORT_INTERVAL", 3600))
+
+
+class RouteStats:
+    __slots__ = ("calls", "errors", "total", "max")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, took: float, failed: bool):
+        self.calls += 1
+        self.errors += failed
+        self.total += took
+        if took > self.max:
+            self.max = took
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "avg_ms": round(self.total / self.calls * 1000, 2) if self.calls else 0.0,
+            "max_ms": round(self.max * 1000, 2),
+        }
+
+
+class CallbackRouter:
+    def __init__(self):
+        # (namespace, action) -> (label, handler, stats); action None = whole namespace
+        self._routes = {}
+        self.unrouted = 0
+        self._last_report = time.monotonic()
+
+    def route(self, namespace: str, action: str = None):
+        """Decorator: register a handler for namespace[:action]."""
+        key = (namespace, action)
+        label = f"{namespace}:{action}" if action else f"{namespace}:*"
+
+        def register(fn):
+            if key in self._routes:
+                raise ValueError(f"callback route {label} registered twice")
+            self._routes[key] = (label, fn, RouteStats())
+            return fn
+
+        return register
+
+    def install(self, bot: Client, group: int = 0):
+        bot.add_handler(CallbackQueryHandler(self.dispatch), group)
+
+    async def dispatch(self, client: Client, cq: CallbackQuery, queued: bool = False):
+        namespace, _, rest = (cq.data or "").partition(":")
+        action, _, args = rest.partition(":")
+        entry = self._routes.get((namespace, action)) or self._routes.get((namespace, None))
+        if entry is None:
+            # Spinner-only buttons and buttons from before a data format change
+            self.unrouted += 1
+            try:
+                await cq.answer()
+            except Exception:
+                pass
+            return
+
+        if not queued:
+            # One update at a time per chat and per user (utils/locks.py)
+            chat_id = cq.message.chat.id if cq.message else None  # None for inline messages
+            user_id = cq.from_user.id
+            tail = update_queues.enter(chat_id, user_id)
+            if tail is None:
+                # Busy: run this tap again behind them, off the worker
+                await update_queues.submit((chat_id, user_id), self.dispatch, client, cq, True)
+                return
+
+        label, handler, stats = entry
+        cq.action, cq.args = action, args
+        failed = False
+        t0 = time.perf_counter()
+        try:
+            await handler(client, cq)
+        except Exception:
+            failed = True
+            print(f"[router] {label} failed on {cq.data!r}")
+            traceback.print_exc()
+            try:
+                await cq.answer()  # don't leave the button spinning
+            except Exception:
+                pass
+        finally:
+            if not queued:
+                update_queues.leave(chat_id, user_id, tail)
+            stats.add(time.perf_counter() - t0, failed)
+            if ROUTER_REPORT_INTERVAL and time.monotonic() - self._last_report >= ROUTER_REPORT_INTERVAL:
+                self._report()
+
+    def stats(self) -> dict:
+        """{route label: calls / errors / avg_ms / max_ms}, busiest first."""
+        rows = sorted(self._routes.values(), key=lambda e: -e[2].calls)
+        return {label: stats.as_dict() for label, _, stats in rows if stats.calls}
+
+    def _report(self):
+        self._last_report = time.monotonic()
+        busiest = list(self.stats().items())[:10]
+        line = " ".join(f"{label}={s['calls']}/{s['avg_ms']}ms" for label, s in busiest)
+        print(f"[router] routes={len(self._routes)} unrouted={self.unrouted} {line}")
+
+
+router = CallbackRouter()
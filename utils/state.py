@@ -0,0 +1,194 @@
+# File: utils/state.py
+
+"""
+Bounded, self-expiring dicts for in-process game state.
+
+    games = ExpiringDict("wordchain", ttl=6 * 3600, max_size=5000)
+    games[chat_id] = {...}               # default ttl
+    games.set(key, value, ttl=60)        # per-entry ttl
+    state = games.get(chat_id)           # refreshes the entry's ttl
+
+An entry expires after its ttl passes without a read or write, and the
+least recently used entry is evicted once max_size is reached. Expired
+entries are invisible right away. One background sweeper task, shared
+by every container, deletes them and now and then logs live sizes
+(state_stats() returns the same numbers on demand).
+
+on_remove sees every entry that leaves on its own (expired/evicted),
+including an expired one that get/pop/del reaches before the sweeper
+does. Code that pops or deletes a live entry owns whatever cleanup the
+hook would have done; modules holding resources (e.g. xoxo's escrowed
+stakes) route every removal through one helper that does it.
+"""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+
+# How often the shared sweeper drops expired entries (seconds)
+STATE_SWEEP_INTERVAL = float(os.getenv("STATE_SWEEP_INTERVAL", 60))
+# How often it logs live sizes (seconds, 0 = never)
+STATE_REPORT_INTERVAL = float(os.getenv("STATE_REPORT_INTERVAL", 3600))
+
+
+_MISSING = object()
+
+
+class ExpiringDict(MutableMapping):
+    def __init__(self, name: str, ttl: float, max_size: int, on_remove=None):
+        """
+        on_remove(key, value, reason) is called for entries that leave on
+        their own, with reason "expired" or "evicted". It is NOT called
+        when del/pop/clear remove a live entry: callers clean up themselves.
+        """
+        self.name = name
+        self.ttl = ttl
+        self.max_size = max_size
+        self.on_remove = on_remove
+        self._data = OrderedDict()   # key -> [value, expires_at, ttl], LRU first
+        self.expired = 0
+        self.evicted = 0
+        _registry.append(self)
+
+    # ---- mapping ----
+    def __getitem__(self, key):
+        entry = self._data.get(key)
+        if entry is None or entry[1] <= time.monotonic():
+            if entry is not None:
+                self._remove(key, "expired")
+            raise KeyError(key)
+        entry[1] = time.monotonic() + entry[2]
+        self._data.move_to_end(key)
+        return entry[0]
+
+    def __setitem__(self, key, value):
+        self.set(key, value)
+
+    def __delitem__(self, key):
+        entry = self._data.get(key)
+        if entry is None or entry[1] <= time.monotonic():
+            if entry is not None:
+                self._remove(key, "expired")
+            raise KeyError(key)
+        del self._data[key]
+
+    def __contains__(self, key) -> bool:
+        # Membership doesn't count as use: no ttl refresh, no LRU bump
+        entry = self._data.get(key)
+        return entry is not None and entry[1] > time.monotonic()
+
+    def __iter__(self):
+        now = time.monotonic()
+        return iter([k for k, e in self._data.items() if e[1] > now])
+
+    def __len__(self) -> int:
+        # Counts not-yet-swept entries too; the sweeper keeps this honest
+        return len(self._data)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def peek(self, key, default=None):
+        """Read without refreshing the ttl or LRU position."""
+        return self._data[key][0] if key in self else default
+
+    def pop(self, key, default=_MISSING):
+        entry = self._data.get(key)
+        if entry is None or entry[1] <= time.monotonic():
+            if entry is not None:
+                # Expired but not swept yet: it leaves the way the sweeper
+                # would have removed it, on_remove included
+                self._remove(key, "expired")
+            if default is _MISSING:
+                raise KeyError(key)
+            return default
+        del self._data[key]
+        return entry[0]
+
+    def clear(self):
+        self._data.clear()
+
+    # ---- ttl ----
+    def set(self, key, value, ttl: float = None):
+        ttl = self.ttl if ttl is None else ttl
+        self._data[key] = [value, time.monotonic() + ttl, ttl]
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._remove(next(iter(self._data)), "evicted")
+        _start_sweeper()
+
+    def touch(self, key) -> bool:
+        """Restart an entry's ttl (e.g. after mutating it in place)."""
+        return self.get(key, _MISSING) is not _MISSING
+
+    def _remove(self, key, reason: str):
+        value = self._data.pop(key)[0]
+        if reason == "expired":
+            self.expired += 1
+        else:
+            self.evicted += 1
+        if self.on_remove is not None:
+            try:
+                self.on_remove(key, value, reason)
+            except Exception as e:
+                print(f"[state:{self.name}] on_remove failed: {e}")
+
+    def sweep(self) -> int:
+        """Drop every expired entry; returns how many went."""
+        now = time.monotonic()
+        dead = [k for k, e in self._data.items() if e[1] <= now]
+        for key in dead:
+            self._remove(key, "expired")
+        return len(dead)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "expired": self.expired,
+            "evicted": self.evicted,
+        }
+
+
+# -------------------------------------------------
+# SHARED SWEEPER
+# -------------------------------------------------
+_registry = []
+_sweeper = None
+
+
+def state_stats() -> dict:
+    """{container name: stats} for every ExpiringDict in the process."""
+    return {d.name: d.stats() for d in _registry}
+
+
+def _start_sweeper():
+    global _sweeper
+    if _sweeper is not None:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return  # no loop yet (import time); the first set() on the loop starts it
+    _sweeper = loop.create_task(_sweep_forever())
+
+
+async def _sweep_forever():
+    last_report = time.monotonic()
+    while True:
+        await asyncio.sleep(STATE_SWEEP_INTERVAL)
+        for d in list(_registry):
+            try:
+                d.sweep()
+            except Exception as e:
+                print(f"[state:{d.name}] sweep failed: {e}")
+        if STATE_REPORT_INTERVAL and time.monotonic() - last_report >= STATE_REPORT_INTERVAL:
+            last_report = time.monotonic()
+            sizes = " ".join(f"{d.name}={len(d)}" for d in _registry)
+            print(f"[state] live entries: {sizes}")
@@ -0,0 +1,139 @@
+# File: utils/tictactoe.py
+
+"""
+Bitboard tic-tac-toe with a precomputed perfect-play table.
+
+A position is two 9-bit ints, `x` and `o` (bit i = cell i, row-major).
+Win detection is one lookup in WINNING, a 512-entry table of "does this
+set of cells contain a line". X always moves first, so the side to move
+follows from the piece counts.
+
+At import, a negamax pass from the empty board fills two tables indexed
+by the base-3 position code (3 ** 9 = 19683 slots; the 5478 positions
+reachable in play are filled, the rest are never looked up):
+- SCORE[i]    value for the side to move: +n win, -n loss, 0 draw, where
+              n - 1 is the number of empty cells left when the game ends
+              (so faster wins / slower losses score higher)
+- OPTIMAL[i]  9-bit mask of every move that keeps that value
+
+A bot move is then a table read plus random.choice. best_return()
+prices a vs-bot game against exactly that policy.
+"""
+
+import random
+from array import array
+from functools import lru_cache
+
+FULL = 0x1FF
+WIN_LINES = (
+    0b000000111, 0b000111000, 0b111000000,  # rows
+    0b001001001, 0b010010010, 0b100100100,  # cols
+    0b100010001, 0b001010100,               # diagonals
+)
+
+# WINNING[cells] == 1 if `cells` contains a full line
+WINNING = bytes(any(cells & w == w for w in WIN_LINES) for cells in range(512))
+# Set bits of every 9-bit mask, as tuples of cell numbers
+MOVES_OF = tuple(tuple(i for i in range(9) if m >> i & 1) for m in range(512))
+POPCOUNT = bytes(bin(m).count("1") for m in range(512))
+# TERN[cells] = sum(3 ** i for each set bit): index = TERN[x] + 2 * TERN[o]
+TERN = tuple(sum(3 ** i for i in MOVES_OF[m]) for m in range(512))
+
+_UNSOLVED = -128
+SCORE = array("b", [_UNSOLVED]) * 3 ** 9
+OPTIMAL = array("H", [0]) * 3 ** 9
+
+
+def index(x: int, o: int) -> int:
+    return TERN[x] + 2 * TERN[o]
+
+
+def side_to_move(x: int, o: int) -> str:
+    return "X" if POPCOUNT[x] == POPCOUNT[o] else "O"
+
+
+def winner(x: int, o: int):
+    """"X" | "O" | "draw" | None (game still running)."""
+    if WINNING[x]:
+        return "X"
+    if WINNING[o]:
+        return "O"
+    if x | o == FULL:
+        return "draw"
+    return None
+
+
+def _solve(me: int, opp: int, idx: int) -> int:
+    # `idx` is the position code; `me` is the side to move
+    if WINNING[opp]:
+        score = -(10 - POPCOUNT[me | opp])
+    elif me | opp == FULL:
+        score = 0
+    else:
+        mover = 1 if POPCOUNT[me] == POPCOUNT[opp] else 2  # X = 1, O = 2 in base 3
+        score, best = -99, 0
+        for m in MOVES_OF[FULL & ~(me | opp)]:
+            child = idx + mover * 3 ** m
+            s = SCORE[child]
+            if s == _UNSOLVED:
+                s = _solve(opp, me | 1 << m, child)
+            s = -s
+            if s > score:
+                score, best = s, 1 << m
+            elif s == score:
+                best |= 1 << m
+        OPTIMAL[idx] = best
+    SCORE[idx] = score
+    return score
+
+
+_solve(0, 0, 0)
+
+
+def best_moves(x: int, o: int) -> tuple:
+    """Every perfect-play move in this position."""
+    return MOVES_OF[OPTIMAL[index(x, o)]]
+
+
+def choose_move(x: int, o: int, mistake_rate: float = 0.0) -> int:
+    """
+    A move for the side to move: a random perfect one, or with
+    probability `mistake_rate` any free cell.
+    """
+    if mistake_rate and random.random() < mistake_rate:
+        return random.choice(MOVES_OF[FULL & ~(x | o)])
+    return random.choice(best_moves(x, o))
+
+
+def cells(x: int, o: int) -> list:
+    """The board as 9 strings: "X", "O" or " "."""
+    return ["X" if x >> i & 1 else "O" if o >> i & 1 else " " for i in range(9)]
+
+
+def best_return(mistake_rate: float, win: float, draw: float) -> float:
+    """
+    Expected payout (per unit staked) for an X player who knows the bot
+    (O, choose_move at `mistake_rate`) and plays to maximise it: exact
+    expectimax over every reachable position. A loss pays 0.
+    """
+    @lru_cache(maxsize=None)
+    def x_to_move(x, o):
+        best = 0.0
+        for m in MOVES_OF[FULL & ~(x | o)]:
+            nx = x | 1 << m
+            result = winner(nx, o)
+            value = win if result == "X" else draw if result == "draw" else o_to_move(nx, o)
+            best = max(best, value)
+        return best
+
+    def settled(x, o):
+        result = winner(x, o)
+        return 0.0 if result == "O" else draw if result == "draw" else x_to_move(x, o)
+
+    @lru_cache(maxsize=None)
+    def o_to_move(x, o):
+        def mean(moves):
+            return sum(settled(x, o | 1 << m) for m in moves) / len(moves)
+        return (1 - mistake_rate) * mean(best_moves(x, o)) + mistake_rate * mean(MOVES_OF[FULL & ~(x | o)])
+
+    return x_to_move(0, 0)
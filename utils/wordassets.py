@@ -0,0 +1,208 @@
+# File: utils/wordassets.py
+
+"""
+Compiled word assets: Easy/Medium/Hard.json -> *.wab, read via mmap.
+
+Layout (little-endian):
+    header   magic, version, count, source size + mtime, section offsets
+    words    sorted words, "\\n"-joined UTF-8          (the word table)
+    offsets  (count + 1) x u64 into the blob          (8-byte aligned)
+    blob     compact JSON hint per word, same order
+
+Only the word table is decoded at load; a hint is decoded when its word
+is picked. The header records the source JSON's size and mtime so a
+stale build is ignored rather than trusted.
+
+Build step (also run by the Procfile before the bot starts):
+    python -m utils.wordassets [games/assets/Easy.json ...]
+"""
+
+import bisect
+import glob
+import json
+import mmap
+import os
+import struct
+import sys
+from collections.abc import Mapping
+
+
+MAGIC = b"GBWA"
+VERSION = 1
+SUFFIX = ".wab"
+CALIB_SUFFIX = ".calib.json"
+
+# magic, version, count, src_size, src_mtime_ns, words_off, words_len, offsets_off, blob_off
+_HEADER = struct.Struct("<4sIIQQQQQQ")
+
+
+def compiled_path(json_path: str) -> str:
+    return os.path.splitext(json_path)[0] + SUFFIX
+
+
+def calibration_path(json_path: str) -> str:
+    """Solver-effort metadata written by utils/calibrate.py."""
+    return os.path.splitext(json_path)[0] + CALIB_SUFFIX
+
+
+def _source_stamp(json_path: str):
+    st = os.stat(json_path)
+    return st.st_size, st.st_mtime_ns
+
+
+def _pad(n: int) -> int:
+    return (8 - n % 8) % 8
+
+
+# ---------------------------
+# BUILD
+# ---------------------------
+
+def compile_json(json_path: str, out_path: str = None) -> int:
+    """Compile one {word: hint} JSON file; returns the word count."""
+    out_path = out_path or compiled_path(json_path)
+    size, mtime_ns = _source_stamp(json_path)
+    with open(json_path, "r", encoding="utf-8") as f:
+        pool = json.load(f)
+    if not isinstance(pool, dict):
+        raise ValueError(f"{json_path}: expected a {{word: hint}} object")
+
+    words = sorted(pool)
+    if any("\n" in w for w in words):
+        raise ValueError(f"{json_path}: words may not contain newlines")
+
+    table = "\n".join(words).encode("utf-8")
+    offsets, blobs, pos = [0], [], 0
+    for w in words:
+        b = json.dumps(pool[w], ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        blobs.append(b)
+        pos += len(b)
+        offsets.append(pos)
+
+    words_off = _HEADER.size
+    offsets_off = words_off + len(table) + _pad(words_off + len(table))
+    blob_off = offsets_off + 8 * len(offsets)
+    header = _HEADER.pack(
+        MAGIC, VERSION, len(words), size, mtime_ns,
+        words_off, len(table), offsets_off, blob_off,
+    )
+
+    tmp = out_path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(header)
+        f.write(table)
+        f.write(b"\0" * (offsets_off - words_off - len(table)))
+        f.write(struct.pack(f"<{len(offsets)}Q", *offsets))
+        for b in blobs:
+            f.write(b)
+    # Atomic swap: a running bot keeps its old mapping until it reloads
+    os.replace(tmp, out_path)
+    return len(words)
+
+
+# ---------------------------
+# LOAD
+# ---------------------------
+
+class MappedPool(Mapping):
+    """Read-only {word: hint} backed by an mmapped .wab file."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, count, _, _, words_off, words_len,
+         offsets_off, blob_off) = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path}: not a v{VERSION} word asset")
+
+        table = self._mm[words_off:words_off + words_len].decode("utf-8")
+        self._words = table.split("\n") if count else []
+        view = memoryview(self._mm)[offsets_off:offsets_off + 8 * (count + 1)]
+        if sys.byteorder == "little":
+            self._offsets = view.cast("Q")  # zero-copy
+        else:
+            self._offsets = struct.unpack(f"<{count + 1}Q", view)
+        self._blob_off = blob_off
+
+    def _find(self, word) -> int:
+        k = bisect.bisect_left(self._words, word)
+        if k < len(self._words) and self._words[k] == word:
+            return k
+        return -1
+
+    def __getitem__(self, word):
+        k = self._find(word)
+        if k < 0:
+            raise KeyError(word)
+        start = self._blob_off + self._offsets[k]
+        end = self._blob_off + self._offsets[k + 1]
+        return json.loads(self._mm[start:end].decode("utf-8"))
+
+    def __contains__(self, word) -> bool:
+        return self._find(word) >= 0
+
+    def __iter__(self):
+        return iter(self._words)
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+
+def is_fresh(json_path: str, wab_path: str) -> bool:
+    """True if `wab_path` was compiled from the current `json_path`."""
+    try:
+        with open(wab_path, "rb") as f:
+            head = f.read(_HEADER.size)
+        magic, version, _, size, mtime_ns, *_ = _HEADER.unpack(head)
+    except (OSError, struct.error):
+        return False
+    if magic != MAGIC or version != VERSION:
+        return False
+    try:
+        return (size, mtime_ns) == _source_stamp(json_path)
+    except OSError:
+        return True  # JSON gone: the build is all we have
+
+
+def pick_source(json_path: str) -> str:
+    """The compiled asset if it matches `json_path`, else the JSON itself."""
+    wab = compiled_path(json_path)
+    return wab if is_fresh(json_path, wab) else json_path
+
+
+def load_calibration(path: str) -> dict:
+    """{"mean": float, "words": {word: guesses}} from a .calib.json, or {} if absent."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) and data.get("words") else {}
+
+
+def load_pool(path: str):
+    """{word: hint} from either a .wab (mmapped) or a .json file."""
+    if path.endswith(SUFFIX):
+        return MappedPool(path)
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError(f"{path}: expected a {{word: hint}} object")
+    return data
+
+
+# ---------------------------
+# CLI
+# ---------------------------
+
+if __name__ == "__main__":
+    paths = sys.argv[1:] or sorted(
+        p for p in glob.glob(os.path.join("games", "asset*", "*.json"))
+        if not p.endswith(CALIB_SUFFIX)
+    )
+    for p in paths:
+        try:
+            n = compile_json(p)
+            print(f"[wordassets] {p} -> {compiled_path(p)} ({n} words)")
+        except Exception as e:
+            print(f"[wordassets] {p}: {e}")
@@ -0,0 +1,347 @@
+# File: utils/wordindex.py
+
+"""
+Loaded-once word pools for the word games.
+
+Each difficulty keeps:
+- pool    : {word: hint}           (hint/meaning lookups)
+- words   : [word, ...]            (O(1) random.choice)
+- lengths : {n: LengthIndex}       (O(1) "valid word of this length",
+                                    position/letter bitmaps for counting
+                                    words still consistent with feedback)
+- effort  : solver guesses per word from <Pool>.calib.json, if present
+
+Files are re-parsed only when their mtime (or resolved path) changes,
+or on an explicit reload. Parsing runs in a worker thread so the event
+loop never blocks on the 500 KB Easy.json. When a compiled .wab built
+from the current JSON exists (utils/wordassets.py) it is mmapped
+instead, and hints are decoded only for the word that gets picked.
+"""
+
+import asyncio
+import os
+import random
+import time
+from collections import Counter
+
+from utils.feedback import POW3, marks, pattern
+from utils.wordassets import calibration_path, load_calibration, load_pool, pick_source
+
+
+# How often ensure_fresh() may stat the files (seconds)
+WORDS_CHECK_INTERVAL = float(os.getenv("WORDS_CHECK_INTERVAL", 5))
+
+
+def _resolve(repo_path: str, local_path: str = None) -> str:
+    """Prefer the local override file if present (local testing)."""
+    if local_path and os.path.exists(local_path):
+        return local_path
+    return repo_path
+
+
+def _signature(path: str):
+    try:
+        return path, os.stat(path).st_mtime_ns
+    except OSError:
+        return path, None
+
+
+# ---------------------------
+# FEEDBACK SCORING
+# ---------------------------
+
+def score(guess: str, target: str) -> str:
+    """
+    Per-letter result of a guess, duplicate-aware (Wordle rules):
+    "g" right letter + spot, "y" in the word elsewhere, "r" absent.
+    """
+    return marks(pattern(guess, target), len(guess))
+
+
+# ---------------------------
+# PER-LENGTH BITMAP INDEX
+# ---------------------------
+
+def _column_masks(column: str) -> dict:
+    """
+    {ch: mask} for one letter position; bit k set when word k has ch
+    there. Runs at C speed: each mask is a bytes.translate to b"0"/b"1"
+    read back by int(..., 2), never a Python loop over words.
+    """
+    chars = sorted(set(column))
+    codes = {ch: i for i, ch in enumerate(chars)}
+    if column.isascii():
+        raw = column.encode("ascii")
+        codes = {ch: ord(ch) for ch in chars}
+    elif len(chars) <= 256:
+        raw = column.translate({ord(ch): i for ch, i in codes.items()}).encode("latin-1")
+    else:
+        raise ValueError("more than 256 distinct characters at one position")
+    masks = {}
+    for ch in chars:
+        table = bytearray(b"0" * 256)
+        table[codes[ch]] = ord("1")
+        masks[ch] = int(raw.translate(table)[::-1], 2)
+    return masks
+
+
+class LengthIndex:
+    """
+    All words of one length. Bit k of every mask stands for words[k]:
+    - pos[i][ch]      words with `ch` at position i
+    - at_least[ch][j] words with more than j copies of `ch`
+    Feedback constraints become a few big-int ANDs instead of a rescan.
+    """
+    __slots__ = ("words", "members", "all", "pos", "at_least")
+
+    def __init__(self, words):
+        self.words = sorted(words)
+        self.members = frozenset(self.words)
+        self.all = (1 << len(self.words)) - 1
+        length = len(self.words[0]) if self.words else 0
+
+        self.pos = [
+            _column_masks("".join([w[i] for w in self.words]))
+            for i in range(length)
+        ]
+
+        # at_least[ch] via a bitwise counter over positions:
+        # levels[j] |= levels[j-1] & here, so level j = "seen j+1 times"
+        self.at_least = {}
+        for ch in set().union(*self.pos):
+            levels = []
+            for spot in self.pos:
+                here = spot.get(ch, 0)
+                if not here:
+                    continue
+                levels.append(0)
+                for j in range(len(levels) - 1, 0, -1):
+                    levels[j] |= levels[j - 1] & here
+                levels[0] |= here
+            while levels and not levels[-1]:
+                levels.pop()
+            self.at_least[ch] = levels
+
+    def __contains__(self, word: str) -> bool:
+        return word in self.members
+
+    def _at_least(self, ch: str, n: int) -> int:
+        if n <= 0:
+            return self.all
+        levels = self.at_least.get(ch, ())
+        return levels[n - 1] if n <= len(levels) else 0
+
+    def constrain(self, mask: int, guess: str, marks: str) -> int:
+        """Narrow `mask` to words that would have produced `marks` for `guess`."""
+        for i, (ch, m) in enumerate(zip(guess, marks)):
+            at = self.pos[i].get(ch, 0)
+            mask &= at if m == "g" else ~at
+        hits = Counter(ch for ch, m in zip(guess, marks) if m != "r")
+        capped = {ch for ch, m in zip(guess, marks) if m == "r"}
+        for ch in set(guess):
+            n = hits[ch]
+            mask &= self._at_least(ch, n)
+            if ch in capped:
+                mask &= ~self._at_least(ch, n + 1)  # exactly n copies
+        return mask
+
+    def partition(self, guess: str, mask: int = None) -> dict:
+        """
+        Split the words in `mask` (default: all) by the feedback `guess`
+        would get: {pattern code: mask}, the same classes as grouping
+        pattern(guess, w) over every w. Big-int ANDs per letter, then one
+        refinement pass over the non-empty classes.
+        """
+        mask = self.all if mask is None else mask
+        n = len(guess)
+        green = [mask & self.pos[i].get(ch, 0) for i, ch in enumerate(guess)]
+        yellow = [0] * n
+
+        spots = {}
+        for i, ch in enumerate(guess):
+            spots.setdefault(ch, []).append(i)
+        for ch, where in spots.items():
+            if ch not in self.at_least:
+                continue
+            # Which of this letter's spots are green fixes how many copies
+            # are used up; each extra copy turns the next miss yellow
+            for greens in range(1 << len(where)):
+                cls = mask
+                for j, i in enumerate(where):
+                    cls &= green[i] if greens >> j & 1 else ~green[i]
+                if not cls:
+                    continue
+                used = bin(greens).count("1")
+                misses = [i for j, i in enumerate(where) if not greens >> j & 1]
+                for r, i in enumerate(misses, 1):
+                    hit = cls & self._at_least(ch, used + r)
+                    if not hit:
+                        break
+                    yellow[i] |= hit
+
+        classes = {0: mask} if mask else {}
+        for i in range(n):
+            red = mask & ~green[i] & ~yellow[i]
+            split = {}
+            for code, cls in classes.items():
+                for mark, marked in ((2, green[i]), (1, yellow[i]), (0, red)):
+                    part = cls & marked
+                    if part:
+                        split[code + mark * POW3[i]] = part
+            classes = split
+        return classes
+
+    @staticmethod
+    def count(mask: int) -> int:
+        return bin(mask).count("1")
+
+
+def _build(pool: dict, calibration: dict = None):
+    """Everything derived from one {word: hint} pool (runs off the loop)."""
+    # pool may be a MappedPool: only its word table is touched here
+    by_length = {}
+    for word in pool:
+        by_length.setdefault(len(word), []).append(word.lower())
+    lengths = {n: LengthIndex(ws) for n, ws in by_length.items()}
+    return pool, list(pool), lengths, calibration or {}
+
+
+class WordIndex:
+    def __init__(self, sources: dict):
+        """
+        sources: {difficulty: (repo_path, local_override_path or None)}
+        """
+        self.sources = sources
+        self.pools = {d: {} for d in sources}
+        self.words = {d: [] for d in sources}
+        self.lengths = {d: {} for d in sources}
+        self.calibration = {d: {} for d in sources}
+        self._signatures = {}
+        self._checked_at = 0.0
+        self._reload = None
+        self.loads = 0
+
+    # ---- loading ----
+    def _changed(self, force: bool) -> dict:
+        """{difficulty: signature} for files that need a (re)parse."""
+        out = {}
+        for diff, (repo_path, local_path) in self.sources.items():
+            json_path = _resolve(repo_path, local_path)
+            sig = _signature(pick_source(json_path)) + _signature(calibration_path(json_path))
+            if force or sig != self._signatures.get(diff):
+                out[diff] = sig
+        return out
+
+    def _parse_changed(self, force: bool) -> list:
+        """Worker thread: parse what changed, return [(difficulty, pool, signature)]."""
+        parsed = []
+        for diff, sig in self._changed(force).items():
+            path = sig[0]
+            try:
+                pool = _build(load_pool(path), load_calibration(sig[2]))
+            except Exception as e:
+                # Keep serving the previous pool (e.g. file mid-write);
+                # retried once the file changes again
+                print(f"[words] {diff}: failed to load {path}: {e}")
+                pool = None
+            parsed.append((diff, pool, sig))
+        return parsed
+
+    def _install(self, diff: str, built):
+        # Runs on the loop; whole objects are swapped so a reader never
+        # pairs a new word list with an old pool
+        self.pools[diff], self.words[diff], self.lengths[diff], self.calibration[diff] = built
+        self.loads += 1
+
+    async def _do_reload(self, force: bool) -> list:
+        loop = asyncio.get_running_loop()
+        try:
+            parsed = await loop.run_in_executor(None, self._parse_changed, force)
+        finally:
+            self._reload = None
+        for diff, pool, sig in parsed:
+            self._signatures[diff] = sig
+            if pool is not None:
+                self._install(diff, pool)
+        return [diff for diff, pool, _ in parsed if pool is not None]
+
+    async def reload(self, force: bool = False) -> list:
+        """
+        Re-parse changed (or, with force, all) files off the loop. Callers
+        arriving mid-reload share it. Returns the difficulties loaded.
+        """
+        if self._reload is None:
+            self._reload = asyncio.ensure_future(self._do_reload(force))
+        return await asyncio.shield(self._reload)
+
+    async def ensure_fresh(self):
+        """Cheap on the hot path: stats the files at most every WORDS_CHECK_INTERVAL."""
+        now = time.monotonic()
+        if self._signatures and now - self._checked_at < WORDS_CHECK_INTERVAL:
+            return
+        self._checked_at = now
+        if self._changed(force=False):
+            await self.reload()
+
+    # ---- lookups ----
+    async def pick(self, difficulty: str):
+        """Random (word, hint) for a difficulty, or (None, None) if empty."""
+        await self.ensure_fresh()
+        words = self.words.get(difficulty)
+        if not words:
+            return None, None
+        word = random.choice(words)
+        return word, self.pools[difficulty][word]
+
+    async def is_valid(self, difficulty: str, word: str) -> bool:
+        """Is `word` a listed word of its length? An empty/missing pool accepts anything."""
+        await self.ensure_fresh()
+        if not self.words.get(difficulty):
+            return True
+        index = self.lengths[difficulty].get(len(word))
+        return index is not None and word.lower() in index
+
+    def effort(self, difficulty: str, word: str):
+        """
+        (solver guesses for `word`, pool mean) from the calibration job,
+        or None if the pool or word isn't calibrated.
+        """
+        calib = self.calibration.get(difficulty) or {}
+        guesses = calib.get("words", {}).get(word.lower())
+        if not guesses or not calib.get("mean"):
+            return None
+        return guesses, calib["mean"]
+
+    def _consistent(self, difficulty: str, target: str, guesses) -> tuple:
+        index = self.lengths.get(difficulty, {}).get(len(target))
+        if index is None:
+            return None, 0
+        mask = index.all
+        for guess in guesses:
+            guess = guess.lower()
+            mask = index.constrain(mask, guess, score(guess, target))
+        return index, mask
+
+    def remaining(self, difficulty: str, target: str, guesses) -> int:
+        """How many listed words still fit the feedback the guesses got."""
+        _, mask = self._consistent(difficulty, target.lower(), guesses)
+        return LengthIndex.count(mask)
+
+    def hint_position(self, difficulty: str, target: str, guesses, known=()) -> int:
+        """
+        Position to reveal: among spots not already known, the one whose
+        letter rules out the most remaining candidates (ties at random).
+        """
+        target = target.lower()
+        open_spots = [i for i in range(len(target)) if i not in set(known)]
+        if not open_spots:
+            return random.randrange(len(target))
+        index, mask = self._consistent(difficulty, target, guesses)
+        if index is None:
+            return random.choice(open_spots)
+        left = {i: LengthIndex.count(mask & index.pos[i].get(target[i], 0)) for i in open_spots}
+        best = min(left.values())
+        return random.choice([i for i, n in left.items() if n == best])
+
+    def stats(self) -> dict:
+        return {**{d: len(w) for d, w in self.words.items()}, "loads": self.loads}